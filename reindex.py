@@ -1,4 +1,4 @@
-from src.utils.vector_store import VectorStore
+from src.utils import registry
 from src.utils.document_loader import DocumentLoader, Document
 from src.utils.config import Config
 import os
@@ -104,7 +104,7 @@ def ingest_learning_material(topic: str, sources: Dict[str, List[str]]):
     print(f"{'='*50}")
 
     loader = DocumentLoader()
-    vector_store = VectorStore(in_memory=False)
+    vector_store = registry.get_vector_store()
     
     # 1. Clear previous data if needed (optional based on workflow)
     print("🧹 Cleaning previous index for fresh start...")
@@ -138,4 +138,8 @@ SOURCES = {
 }
 
 if __name__ == "__main__":
-    ingest_learning_material(MY_TOPIC, SOURCES)
+    try:
+        ingest_learning_material(MY_TOPIC, SOURCES)
+    finally:
+        # Flushes the embedded store and releases the local Qdrant lock
+        registry.close()
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from src.models.schemas import ResearchDeps
+from src.utils.tracing import TOOL, traced
 from src.tools.save_note import save_note
 from src.tools.research_local_docs import research_local_docs
 from src.tools.perform_web_search import perform_web_search
@@ -37,11 +38,9 @@ def dynamic_system_prompt(ctx: RunContext[ResearchDeps]) -> str:
         "3. **Reasoning**: Always state your gap analysis in a 'Thought:' block *before* tool calls. Never put text after a tool call in the same message."
     )
 
-# Register Tools
-agent.tool(save_note)
-agent.tool(research_local_docs)
-agent.tool(perform_web_search)
-agent.tool(get_youtube_transcript)
+# Register Tools (each call is recorded as a trace span)
+for tool in (save_note, research_local_docs, perform_web_search, get_youtube_transcript):
+    agent.tool(traced(tool.__name__, TOOL)(tool))
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,131 @@
+"""Streaming agent runs: text deltas and tool calls as they happen, driven from synchronous code"""
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import (
+    FunctionToolCallEvent, FunctionToolResultEvent, PartDeltaEvent, PartStartEvent, TextPart, TextPartDelta
+)
+
+from src.utils import tracing
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide event loop that agent runs are scheduled on.
+
+    The loop lives on a daemon thread for the life of the process, so async HTTP
+    clients created by the models stay bound to one loop across runs instead of a
+    fresh loop per request (as run_sync does).
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agent-event-loop", daemon=True).start()
+        return _loop
+
+
+@dataclass
+class StreamEvent:
+    """
+    One step of a streamed run.
+
+    kind is "text" (a chunk of the current model response), "response_end" (the model
+    response is finished), "tool_start", "tool_end" or "done" (with the run result).
+    """
+    kind: str
+    text: str = ""
+    tool_name: Optional[str] = None
+    tool_call_id: Optional[str] = None
+    args: Any = None
+    content: Any = None
+    result: Any = None
+    elapsed: float = 0.0
+
+
+async def stream_run(agent: Agent, prompt: str, deps=None, message_history=None) -> AsyncIterator[StreamEvent]:
+    """Run the agent with agent.iter, yielding text deltas and tool calls as they occur."""
+    started = time.perf_counter()
+
+    def event(kind, **fields):
+        return StreamEvent(kind, elapsed=time.perf_counter() - started, **fields)
+
+    # Each run is one trace: model requests and tool calls (and what they call) nest under it
+    with tracing.span("agent_run", tracing.AGENT, prompt=prompt[:200]) as run_span:
+        async with agent.iter(prompt, deps=deps, message_history=message_history) as run:
+            async for node in run:
+                if Agent.is_model_request_node(node):
+                    with tracing.span("llm_call", tracing.LLM) as llm_span:
+                        first_token = None
+                        async with node.stream(run.ctx) as response_stream:
+                            async for part_event in response_stream:
+                                text = None
+                                if isinstance(part_event, PartStartEvent) and isinstance(part_event.part, TextPart):
+                                    text = part_event.part.content
+                                elif isinstance(part_event, PartDeltaEvent) and isinstance(part_event.delta, TextPartDelta):
+                                    text = part_event.delta.content_delta
+                                if text:
+                                    if first_token is None:
+                                        first_token = time.perf_counter() - started
+                                    yield event("text", text=text)
+                        if llm_span is not None:
+                            llm_span.set(first_token_at=first_token)
+                    yield event("response_end")
+                elif Agent.is_call_tools_node(node):
+                    async with node.stream(run.ctx) as tool_stream:
+                        async for tool_event in tool_stream:
+                            if isinstance(tool_event, FunctionToolCallEvent):
+                                yield event("tool_start", tool_name=tool_event.part.tool_name,
+                                            tool_call_id=tool_event.part.tool_call_id, args=tool_event.part.args)
+                            elif isinstance(tool_event, FunctionToolResultEvent):
+                                yield event("tool_end", tool_name=tool_event.part.tool_name,
+                                            tool_call_id=tool_event.part.tool_call_id, content=tool_event.part.content)
+            if run_span is not None:
+                # A method in older pydantic-ai releases, a property in newer ones
+                usage = run.usage() if callable(run.usage) else run.usage
+                run_span.set(input_tokens=getattr(usage, "input_tokens", None),
+                             output_tokens=getattr(usage, "output_tokens", None))
+    yield event("done", result=run.result)
+
+
+def stream_run_sync(agent: Agent, prompt: str, deps=None, message_history=None) -> Iterator[StreamEvent]:
+    """
+    Synchronous wrapper around stream_run for Streamlit and scripts.
+
+    The run executes on the persistent loop; events are handed over through a queue
+    as they are produced. Exceptions from the run are re-raised here. Abandoning the
+    iterator cancels the run.
+    """
+    events: "queue.Queue" = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for item in stream_run(agent, prompt, deps=deps, message_history=message_history):
+                events.put(item)
+        except BaseException as e:
+            events.put(e)
+            raise
+        finally:
+            events.put(finished)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_event_loop())
+    try:
+        while True:
+            item = events.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        if not future.done():
+            future.cancel()
@@ -9,17 +9,19 @@ project_root = str(Path(__file__).parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+import atexit
 import time
-import pandas as pd
+from types import SimpleNamespace
 import streamlit as st
 
 # Now that path is set, we can safely import from src
 from src.utils.config import Config
-from src.agents.research_agent import agent
 from src.models.schemas import ResearchDeps
-from src.utils.vector_store import VectorStore
-from src.utils.document_loader import DocumentLoader
+from src.utils import registry
+from src.utils import tracing
 from src.utils.agent_logger import AgentLogger
+from src.utils.answer_cache import AnswerCache
+from src.utils.ingestion_jobs import IngestionJobs, describe_source, save_upload
 
 
 # --- Configuration & Styling ---
@@ -96,11 +98,26 @@ st.markdown("""
 # --- Shared Resources (Cached) ---
 @st.cache_resource
 def get_vector_store():
-    return VectorStore(in_memory=False)
+    # Shared with ResearchDeps and anything else in this process; registered once, so the
+    # shared stores and clients are closed (embedded files flushed) when the server exits
+    atexit.register(registry.close)
+    return registry.get_vector_store()
 
 @st.cache_resource
 def get_logger():
-    return AgentLogger()
+    logger = AgentLogger()
+    # Trace spans (agent runs, LLM calls, tools, embeddings, vector queries) go to the same database
+    tracing.set_sink(logger.record_span)
+    return logger
+
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache()
+
+@st.cache_resource
+def get_ingestion_jobs():
+    # One worker per process; jobs survive page reruns and resume after a restart
+    return IngestionJobs(get_vector_store())
 
 # --- Session State Initialization ---
 if "messages" not in st.session_state:
@@ -109,6 +126,9 @@ if "messages" not in st.session_state:
 # Get shared resources
 vector_store = get_vector_store()
 logger = get_logger()
+# With ANSWER_CACHE_ENABLED off, questions are neither embedded for the cache nor stored
+answer_cache = get_answer_cache() if Config.ANSWER_CACHE_ENABLED else None
+ingestion_jobs = get_ingestion_jobs()
 
 # Store in session state for easy access in handlers if needed, 
 # though we can just call the cached functions.
@@ -120,33 +140,50 @@ def append_message(role, content):
     st.session_state.messages.append({"role": role, "content": content})
 
 def process_ingestion(file_objs=None, url=None):
-    loader = DocumentLoader()
-    docs = []
-    
-    with st.spinner("Processing sources..."):
-        if file_objs:
-            for file_obj in file_objs:
-                st.write(f"Loading PDF: {file_obj.name}")
-                docs.extend(loader.load_pdf(file_obj))
-        
-        if url:
-            gh_info = loader.parse_github_url(url)
-            if gh_info:
-                st.write(f"Loading GitHub repository: {gh_info['owner']}/{gh_info['repo']}")
-                docs.extend(loader.load_github_repo(gh_info['owner'], gh_info['repo']))
-            elif "youtube.com" in url or "youtu.be" in url:
-                st.write(f"Loading YouTube transcript: {url}")
-                docs.append(loader.load_youtube_transcript(url))
-            else:
-                st.write(f"Loading Web Page: {url}")
-                docs.append(loader.load_web_page(url))
-        
-        if docs:
-            count = vector_store.add_documents(docs)
-            st.success(f"Successfully indexed {count} chunks!")
-            st.session_state.ingested_sources = vector_store.get_all_sources()
-        else:
-            st.warning("No documents found to index.")
+    """Queue the sources as a background job; progress is shown by show_ingestion_jobs."""
+    sources = []
+    for file_obj in file_objs or []:
+        sources.append({"type": "pdf", "path": save_upload(file_obj.name, file_obj.getvalue()), "name": file_obj.name})
+    if url:
+        sources.append({"type": "url", "url": url})
+
+    job_id = ingestion_jobs.submit(sources)
+    st.toast(f"Indexing job #{job_id} queued")
+
+@st.fragment(run_every=2)
+def show_ingestion_jobs():
+    """Poll the job table; only this fragment reruns, so chatting is not interrupted."""
+    jobs = ingestion_jobs.list(limit=5)
+    if not jobs:
+        return
+    st.subheader("Indexing Jobs")
+    for job in jobs:
+        names = ", ".join(describe_source(s) for s in job["sources"])
+        if len(names) > 40:
+            names = names[:37] + "..."
+        st.caption(f"#{job['id']} {job['status'].upper()} · {names}")
+        if job["status"] in ("queued", "running"):
+            st.progress(
+                min(1.0, job["upserted"] / job["chunked"]) if job["chunked"] else 0.0,
+                text=f"{job['fetched']} docs fetched · {job['chunked']} chunked · "
+                     f"{job['embedded']} embedded · {job['upserted']} upserted"
+            )
+            if st.button("Cancel", key=f"cancel_job_{job['id']}", disabled=job["cancel_requested"]):
+                ingestion_jobs.cancel(job["id"])
+        elif job["status"] == "completed":
+            skipped = f", {job['skipped']} already indexed" if job["skipped"] else ""
+            st.caption(f"Indexed {job['upserted']} chunks from {job['fetched']} docs{skipped}")
+        elif job["status"] == "failed":
+            st.caption(f"Error: {job['error']}")
+
+    # Refresh the source list once a job this session is watching has finished
+    finished = {j["id"] for j in jobs if j["status"] not in ("queued", "running")}
+    watching = st.session_state.setdefault("watched_jobs", set())
+    watching.update(j["id"] for j in jobs if j["status"] in ("queued", "running"))
+    if watching & finished:
+        watching -= finished
+        st.session_state.ingested_sources = vector_store.get_all_sources()
+        st.rerun(scope="app")
 
 # --- Sidebar: Source Management ---
 with st.sidebar:
@@ -162,6 +199,8 @@ with st.sidebar:
             process_ingestion(uploaded_files, source_url)
         else:
             st.error("Please provide a file or URL.")
+
+    show_ingestion_jobs()
     
     st.divider()
     
@@ -173,6 +212,12 @@ with st.sidebar:
         value=1,
         help="Filter search results by the trust level of the source."
     )
+    use_answer_cache = answer_cache is not None and st.checkbox(
+        "Reuse cached answers",
+        value=True,
+        help="Answer near-identical questions from the answer cache instead of re-running the agent. "
+             "Untick to force a fresh run."
+    )
     
     st.divider()
     
@@ -180,7 +225,7 @@ with st.sidebar:
     
     # Show point count for debugging
     try:
-        count = vector_store.qdrant_client.count(vector_store.collection_name).count
+        count = vector_store.count()
         st.caption(f"Points in DB: {count}")
     except:
         st.caption("Points in DB: 0")
@@ -225,6 +270,11 @@ with st.sidebar:
         st.success("Logs cleared!")
         st.rerun()
 
+    if answer_cache is not None and st.button("Clear Answer Cache", type="secondary", use_container_width=True):
+        answer_cache.clear()
+        st.success("Answer cache cleared!")
+        st.rerun()
+
     if st.button("Clear History", type="secondary", use_container_width=True):
         st.session_state.messages = []
         st.rerun()
@@ -259,6 +309,30 @@ if prompt := st.chat_input("What would you like to research?"):
             start_time = time.time()
             with st.status("Agent is thinking...", expanded=True) as status:
                 try:
+                    # Near-identical questions against an unchanged collection reuse the earlier answer
+                    cached = None
+                    if answer_cache is not None:
+                        query_embedding = vector_store.embed_query(prompt)
+                        collection_version = vector_store.collection_version()
+                    if use_answer_cache:
+                        cached = answer_cache.lookup(query_embedding, min_authority, collection_version)
+                    if cached:
+                        note = (f"_⚡ From answer cache (similarity {cached['similarity']:.2f} to "
+                                f"\"{cached['query']}\"). Untick \"Reuse cached answers\" to re-run._")
+                        status.update(label=f"Answered from cache in {time.time() - start_time:.2f}s",
+                                      state="complete", expanded=False)
+                        message_placeholder.markdown(f"{cached['answer']}\n\n{note}")
+                        # Counted in Monitoring like any answer: no tokens spent, marked by its "tool"
+                        logger.log_interaction(
+                            query=prompt,
+                            response=cached["answer"],
+                            usage=SimpleNamespace(input_tokens=0, output_tokens=0, total_tokens=0),
+                            latency=time.time() - start_time,
+                            tools=["answer_cache"]
+                        )
+                        append_message("assistant", f"{cached['answer']}\n\n{note}")
+                        st.rerun()
+
                     # Initialize dependencies
                     deps = ResearchDeps(
                         api_key=os.getenv("GROQ_API_KEY", "mock-key"),
@@ -266,31 +340,50 @@ if prompt := st.chat_input("What would you like to research?"):
                         min_authority=min_authority
                     )
                     
-                    # Run the agent synchronously
-                    # Note: For real-time tool updates, we'd need to use run_async 
-                    # and handle the event stream, but st.status captures the spirit.
+                    # Imported on first use: pydantic-ai and the Groq model are not needed to render the page
+                    from src.agents.research_agent import agent
+                    from src.agents.streaming import stream_run_sync
+
+                    # Stream the run: text renders as it arrives, tool calls show as they start and finish
                     st.write("Checking sources and analyzing...")
-                    result = agent.run_sync(prompt, deps=deps)
+                    tools_called = []
+                    current_text = ""
+                    first_token = None
+                    result = None
+                    for event in stream_run_sync(agent, prompt, deps=deps):
+                        if event.kind == "text":
+                            if first_token is None:
+                                first_token = event.elapsed
+                            current_text += event.text
+                            message_placeholder.markdown(current_text + "▌")
+                        elif event.kind == "tool_start":
+                            # Text before a tool call is the agent's reasoning; keep it with the tool log
+                            if current_text.strip():
+                                st.markdown(current_text)
+                                current_text = ""
+                                message_placeholder.empty()
+                            tools_called.append(event.tool_name)
+                            st.write(f"Calling tool: `{event.tool_name}`...")
+                        elif event.kind == "tool_end":
+                            st.write(f"Finished tool: `{event.tool_name}` ({event.elapsed:.1f}s)")
+                        elif event.kind == "done":
+                            result = event.result
+
                     full_response = result.output
                     end_time = time.time()
-                    
-                    # Log interaction
-                    tools_called = []
-                    for msg in result.new_messages():
-                        if hasattr(msg, 'parts'):
-                            for part in msg.parts:
-                                if hasattr(part, 'tool_name'):
-                                    tools_called.append(part.tool_name)
-                                    st.write(f"Used tool: `{part.tool_name}`")
-                    
-                    status.update(label="Research Complete!", state="complete", expanded=False)
+                    if answer_cache is not None:
+                        answer_cache.store(prompt, query_embedding, min_authority, collection_version,
+                                           full_response, tools_called)
+
+                    ttft = f" · first token {first_token:.1f}s" if first_token is not None else ""
+                    status.update(label=f"Research Complete!{ttft}", state="complete", expanded=False)
                     
                     message_placeholder.markdown(full_response)
                     
                     logger.log_interaction(
                         query=prompt,
                         response=full_response,
-                        usage=result.usage(),
+                        usage=result.usage() if callable(result.usage) else result.usage,
                         latency=end_time - start_time,
                         tools=tools_called
                     )
@@ -308,6 +401,7 @@ if prompt := st.chat_input("What would you like to research?"):
 with tab2:
     st.title("Performance & Monitoring")
     
+    # Everything here reads the rollup tables, so rendering cost doesn't grow with the log
     stats = logger.get_stats()
     
     col1, col2, col3, col4 = st.columns(4)
@@ -315,8 +409,61 @@ with tab2:
     col2.metric("Total Tokens", f"{stats['total_tokens']:,}")
     col3.metric("Total Cost", f"${stats['total_cost']:.4f}")
     col4.metric("Avg Latency", f"{stats['avg_latency']:.2f}s")
+
+    col5, col6, col7, col8 = st.columns(4)
+    col5.metric("p50 Latency", f"{stats['p50_latency']:.2f}s")
+    col6.metric("p95 Latency", f"{stats['p95_latency']:.2f}s")
+    col7.metric("p99 Latency", f"{stats['p99_latency']:.2f}s")
+    col8.metric("Tokens / sec", f"{stats['tokens_per_second']:.1f}")
     
     st.divider()
+
+    if stats["total_queries"]:
+        granularity = st.radio("Resolution", ["minute", "hour", "day"], index=1, horizontal=True)
+        rollups_df = logger.get_rollups(granularity, limit={"minute": 180, "hour": 72, "day": 90}[granularity])
+
+        # Performance Charts
+        col_chart1, col_chart2 = st.columns(2)
+        with col_chart1:
+            st.subheader("Cost Trend")
+            st.line_chart(rollups_df.set_index('timestamp')['total_cost'])
+        
+        with col_chart2:
+            st.subheader("Latency Percentiles")
+            st.line_chart(
+                rollups_df.set_index('timestamp')[['p50_latency', 'p95_latency', 'p99_latency']]
+            )
+
+        st.subheader("Cost per Tool")
+        st.dataframe(logger.get_tool_stats(), use_container_width=True, hide_index=True)
+
+    traces_df = logger.get_traces(limit=20)
+    if not traces_df.empty:
+        import altair as alt
+
+        st.subheader("Where Time Goes")
+        stage_df = logger.get_stage_totals(traces=100)
+        st.caption("Total time per stage over the last 100 traced runs (nested stages overlap their parents).")
+        st.bar_chart(stage_df.groupby("kind")["total_seconds"].sum().sort_values(ascending=False))
+
+        st.subheader("Run Waterfall")
+        labels = {
+            row.trace_id: f"{row.start:%Y-%m-%d %H:%M:%S} · {row.name} · {row.duration:.2f}s"
+            for row in traces_df.itertuples()
+        }
+        trace_id = st.selectbox("Run", options=list(labels), format_func=labels.get)
+        trace_df = logger.get_trace(trace_id)
+        trace_df["span"] = [f"{i:02d} {'  ' * d}{n}" for i, (d, n) in enumerate(zip(trace_df["depth"], trace_df["name"]))]
+        st.altair_chart(
+            alt.Chart(trace_df).mark_bar().encode(
+                x=alt.X("offset:Q", title="Seconds since start"),
+                x2="end:Q",
+                y=alt.Y("span:N", sort=None, title=None),
+                color="kind:N",
+                tooltip=["name", "kind", alt.Tooltip("duration:Q", format=".3f"), "status", "attributes"]
+            ),
+            use_container_width=True
+        )
     
     st.subheader("Interaction Logs")
     logs_df = logger.get_logs()
@@ -327,17 +474,6 @@ with tab2:
             use_container_width=True,
             hide_index=True
         )
-        
-        # Performance Charts
-        col_chart1, col_chart2 = st.columns(2)
-        with col_chart1:
-            st.subheader("Cost Trend")
-            logs_df['timestamp'] = pd.to_datetime(logs_df['timestamp'])
-            st.line_chart(logs_df.set_index('timestamp')['cost'])
-        
-        with col_chart2:
-            st.subheader("Latency Trend")
-            st.line_chart(logs_df.set_index('timestamp')['latency'])
     else:
         st.info("No logs available yet. Start chatting to see metrics!")
 
@@ -402,3 +538,4 @@ with tab4:
     rag_col3.metric("Top K Results", Config.TOP_K_RESULTS)
     
     st.checkbox("Use Intelligent Chunking", value=Config.USE_INTELLIGENT_CHUNKING, disabled=True)
+    st.info(f"**Chunking Mode:** `{Config.CHUNKING_MODE}`")
@@ -2,7 +2,10 @@
 import sys
 import os
 import json
-from typing import List, Dict
+import asyncio
+import hashlib
+import argparse
+from typing import List, Dict, Set
 from tqdm import tqdm
 from groq import Groq
 from dotenv import load_dotenv
@@ -12,17 +15,27 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from src.utils.config import Config
 from src.utils.document_loader import Document, DocumentLoader
-from src.utils.vector_store import VectorStore
+from src.utils import registry
+from src.utils.chunking import sliding_window_spans
+from src.utils.rate_limit import RateBudget
+
+
+def context_key(source: str, context: str) -> str:
+    """Identity of a (source, context) pair, used to skip contexts already in the output."""
+    return hashlib.sha256(f"{source}\n{context}".encode("utf-8")).hexdigest()[:16]
+
 
 class EvalDataGenerator:
     """Generates synthetic evaluation data from documents."""
     
-    def __init__(self, model: str = None):
+    def __init__(self, model: str = None, concurrency: int = None, requests_per_minute: float = None):
         load_dotenv()
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
+        self.client = registry.get_client("groq", Config.GROQ_API_KEY, lambda: Groq(api_key=Config.GROQ_API_KEY))
         self.model = model or Config.GROQ_MODEL
         self.loader = DocumentLoader()
-        self.vector_store = VectorStore(in_memory=True) # Used for chunking logic if needed
+        # Groq requests in flight at once, and started per minute (0 = unlimited)
+        self.concurrency = concurrency or Config.EVAL_CONCURRENCY
+        self.requests_per_minute = Config.EVAL_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
 
     def generate_qa_pair(self, context: str) -> Dict[str, str]:
         """Generate a Question-Answer pair from a given context."""
@@ -58,31 +71,102 @@ class EvalDataGenerator:
             print(f"Error generating QA pair: {e}")
             return None
 
-    def generate_from_file(self, file_path: str, num_samples: int = 5) -> List[Dict]:
-        """Load a file, chunk it, and generate samples."""
+    def chunk_file(self, file_path: str) -> List[str]:
+        """Load a file and split it into the contexts questions are generated from."""
         print(f"Loading {file_path}...")
-        docs = self.loader.load_pdf(file_path)
+        docs = self.loader.load_file(file_path)
         
         # Combine and re-chunk for more context per sample if needed
-        # Or just use pages. Let's use the VectorStore's chunking logic.
+        # Or just use pages. Let's use the same sliding-window chunking as the VectorStore.
         full_text = " ".join([doc.content for doc in docs])
-        chunks = self.vector_store._chunk_text(full_text, chunk_size=2000, overlap=200)
-        
+        return [full_text[start:end] for start, end in sliding_window_spans(full_text, 2000, 200)]
+
+    @staticmethod
+    def load_covered(output_path: str) -> Set[str]:
+        """Keys of the (source, context) pairs already in an output JSONL."""
+        covered = set()
+        if not output_path or not os.path.exists(output_path):
+            return covered
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line torn by an interrupted write; its context is generated again
+                    continue
+                covered.add(context_key(sample["source"], sample["context"]))
+        return covered
+
+    async def generate(self, file_paths: List[str], num_samples: int = 5, output_path: str = None) -> List[Dict]:
+        """
+        Generate up to `num_samples` QA pairs per file, with `concurrency` Groq requests in flight.
+
+        With an `output_path`, each sample is appended to it as soon as it is generated,
+        and contexts already present there are skipped, so an interrupted run resumes.
+        """
+        covered = self.load_covered(output_path)
+        pending = []
+        for file_path in file_paths:
+            # Limit to num_samples or available chunks
+            contexts = self.chunk_file(file_path)[:num_samples]
+            todo = [c for c in contexts if context_key(file_path, c) not in covered]
+            if len(todo) < len(contexts):
+                print(f"   Skipping {len(contexts) - len(todo)} contexts of {file_path} already in {output_path}")
+            pending.extend((file_path, context) for context in todo)
+
+        if not pending:
+            print("Nothing to generate.")
+            return []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        budget = RateBudget(self.requests_per_minute)
+        output = None
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            output = open(output_path, 'a', encoding='utf-8')
+            if output.tell() > 0:
+                with open(output_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Start after a line torn by an interrupted write
+                        output.write("\n")
+        progress = tqdm(total=len(pending))
         samples = []
-        # Limit to num_samples or available chunks
-        num_to_generate = min(num_samples, len(chunks))
-        
-        print(f"Generating {num_to_generate} QA pairs...")
-        for i in tqdm(range(num_to_generate)):
-            context = chunks[i]
-            qa = self.generate_qa_pair(context)
+
+        async def generate_one(file_path: str, context: str):
+            async with semaphore:
+                await budget.acquire()
+                # The Groq client is synchronous, so each request runs in a worker thread
+                qa = await asyncio.to_thread(self.generate_qa_pair, context)
             if qa:
                 qa["context"] = context
                 qa["source"] = file_path
                 samples.append(qa)
-                
+                # Written from the event loop thread, so lines never interleave
+                if output:
+                    output.write(json.dumps(qa) + "\n")
+                    output.flush()
+            progress.update(1)
+
+        print(f"Generating {len(pending)} QA pairs ({self.concurrency} at a time)...")
+        try:
+            await asyncio.gather(*(generate_one(f, c) for f, c in pending))
+        finally:
+            progress.close()
+            if output:
+                output.close()
+
+        failed = len(pending) - len(samples)
+        if failed:
+            print(f"[WARNING] {failed} contexts failed and will be retried on the next run")
+        if output_path:
+            print(f"Appended {len(samples)} samples to {output_path}")
         return samples
 
+    def generate_from_file(self, file_path: str, num_samples: int = 5) -> List[Dict]:
+        """Load a file, chunk it, and generate samples."""
+        return asyncio.run(self.generate([file_path], num_samples))
+
     def save_to_jsonl(self, samples: List[Dict], output_path: str):
         """Save samples to a JSONL file."""
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -91,19 +175,28 @@ class EvalDataGenerator:
         print(f"Saved {len(samples)} samples to {output_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic QA testset from one or more documents")
+    parser.add_argument("files", nargs="*", default=[os.path.join("data", "docker_cheatsheet.pdf")],
+                        help="PDF, Markdown or text files")
+    parser.add_argument("--num-samples", type=int, default=3, help="QA pairs per file")
+    parser.add_argument("--output", default=os.path.join("logs", "eval", "testset.jsonl"))
+    parser.add_argument("--concurrency", type=int, default=Config.EVAL_CONCURRENCY, help="Groq requests in flight")
+    parser.add_argument("--rpm", type=float, default=Config.EVAL_REQUESTS_PER_MINUTE,
+                        help="Max Groq requests started per minute (0 = unlimited)")
+    parser.add_argument("--fresh", action="store_true", help="Overwrite the output instead of resuming it")
+    args = parser.parse_args()
+
     if not Config.GROQ_API_KEY:
         print("GROQ_API_KEY not found. Please set it in .env")
         sys.exit(1)
-        
-    generator = EvalDataGenerator()
-    
-    # Example: generate from the docker cheatsheet
-    data_path = os.path.join("data", "docker_cheatsheet.pdf")
-    if os.path.exists(data_path):
-        eval_samples = generator.generate_from_file(data_path, num_samples=3)
-        
-        output_dir = "logs/eval"
-        os.makedirs(output_dir, exist_ok=True)
-        generator.save_to_jsonl(eval_samples, os.path.join(output_dir, "testset.jsonl"))
-    else:
-        print(f"File not found: {data_path}")
+
+    files = [f for f in args.files if os.path.exists(f)]
+    for missing in set(args.files) - set(files):
+        print(f"File not found: {missing}")
+    if not files:
+        sys.exit(1)
+
+    if args.fresh and os.path.exists(args.output):
+        os.remove(args.output)
+    generator = EvalDataGenerator(concurrency=args.concurrency, requests_per_minute=args.rpm)
+    asyncio.run(generator.generate(files, num_samples=args.num_samples, output_path=args.output))
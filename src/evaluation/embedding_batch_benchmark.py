@@ -0,0 +1,104 @@
+
+import sys
+import os
+import json
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils import registry
+from src.utils.embedding_service import MicroBatcher
+
+QUERIES = [
+    "How do I remove stopped docker containers?",
+    "What is the capital of France?",
+    "Explain retrieval augmented generation",
+    "Which port does Qdrant listen on by default?",
+    "How are chunks scored against a query?",
+    "What does the min_authority filter do?",
+    "Summarize the docker networking commands",
+    "How do I list running containers?",
+]
+
+
+def stub_encoder(call_overhead_ms: float, per_text_ms: float) -> Callable[[List[str]], List[List[float]]]:
+    """
+    Stand-in for a CPU-bound model: a fixed cost per call plus a cost per text,
+    with calls serialized as they would be on a busy CPU.
+    """
+    cpu = threading.Lock()
+
+    def encode(texts: List[str]) -> List[List[float]]:
+        with cpu:
+            time.sleep((call_overhead_ms + per_text_ms * len(texts)) / 1000)
+        return [[float(len(t))] for t in texts]
+    return encode
+
+
+def model_encoder() -> Callable[[List[str]], List[List[float]]]:
+    from sentence_transformers import SentenceTransformer
+    model = registry.get_model("local", Config.LOCAL_EMBEDDING_MODEL, SentenceTransformer)
+    return lambda texts: model.encode(texts, batch_size=32, show_progress_bar=False).tolist()
+
+
+def run_load(embed: Callable[[str], List[float]], concurrency: int, total: int) -> Dict:
+    latencies: List[float] = []
+
+    def one(i: int):
+        start = time.perf_counter()
+        embed(QUERIES[i % len(QUERIES)])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput_qps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2)
+    }
+
+
+def run_embedding_batch_benchmark(encode, concurrency: int, total: int, max_batch_size: int, max_wait_ms: float) -> Dict:
+    # Warm up so model initialization is not measured
+    encode(QUERIES[:1])
+
+    results = {"per_call": run_load(lambda q: encode([q])[0], concurrency, total)}
+
+    batcher = MicroBatcher(encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    results["micro_batched"] = run_load(batcher.embed, concurrency, total)
+    batcher.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-call and micro-batched query embedding under concurrent load")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--queries", type=int, default=400, help="Total queries")
+    parser.add_argument("--max-batch-size", type=int, default=Config.EMBEDDING_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=Config.EMBEDDING_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--stub", action="store_true", help="Use a synthetic encoder instead of the local model")
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    encode = stub_encoder(call_overhead_ms=4, per_text_ms=0.5) if args.stub else model_encoder()
+    results = run_embedding_batch_benchmark(encode, args.concurrency, args.queries, args.max_batch_size, args.max_wait_ms)
+
+    print(f"\n--- Embedding Batch Benchmark ({args.concurrency} concurrent callers, {args.queries} queries) ---")
+    for mode, r in results.items():
+        print(f"{mode:<14} {r['throughput_qps']:>8.1f} q/s   p50 {r['p50_ms']:>8.2f} ms   p99 {r['p99_ms']:>8.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
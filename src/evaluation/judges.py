@@ -3,12 +3,13 @@ import json
 from typing import Dict
 from groq import Groq
 from src.utils.config import Config
+from src.utils import registry
 
 class LLMJudge:
     """Uses an LLM to evaluate the quality of RAG responses."""
     
     def __init__(self, model: str = None):
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
+        self.client = registry.get_client("groq", Config.GROQ_API_KEY, lambda: Groq(api_key=Config.GROQ_API_KEY))
         self.model = model or Config.GROQ_MODEL
 
     def evaluate_correctness(self, question: str, ground_truth: str, generated_answer: str) -> Dict:
@@ -0,0 +1,288 @@
+
+import sys
+import os
+import json
+import time
+import zlib
+import random
+import resource
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils import registry
+from src.utils.document_loader import Document
+
+VOCABULARY = (
+    "docker container image volume network port compose build layer cache registry tag "
+    "vector embedding chunk query filter payload collection index score retrieval ranking "
+    "agent tool model prompt token context answer citation source authority document "
+    "python stream thread batch queue latency throughput memory disk upsert search"
+).split()
+
+TOPICS = ["docker", "retrieval", "agents", "python", "databases"]
+SOURCE_TYPES = ["pdf", "web", "youtube", "text"]
+
+QUERIES = [
+    "How do I remove stopped docker containers?",
+    "How are chunks scored against a query?",
+    "What does the min_authority filter do?",
+    "Which tool answers questions about videos?",
+    "How is the embedding cache invalidated?",
+    "Summarize the docker networking commands",
+]
+
+# Lower is better for these metrics; every other metric is a throughput
+LOWER_IS_BETTER = ("_ms", "_mb")
+
+
+class StubEmbeddingModel:
+    """
+    Deterministic stand-in for SentenceTransformer: words are hashed into `dim` buckets
+    (feature hashing) and the vector is normalized. No downloads, same vectors every run.
+    """
+    tokenizer = None
+    max_seq_length = None
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+        return vectors[0] if single else vectors
+
+
+def synthetic_corpus(num_chunks: int, chunk_size: int, chunks_per_doc: int = 10, seed: int = 42) -> List[Document]:
+    """
+    Documents of paragraphs built from a fixed vocabulary, sized to yield roughly
+    `num_chunks` chunks of `chunk_size` characters. The same seed gives the same corpus.
+    """
+    rng = random.Random(seed)
+    documents = []
+    for doc_index in range((num_chunks + chunks_per_doc - 1) // chunks_per_doc):
+        paragraphs = []
+        for _ in range(chunks_per_doc):
+            words, length = [], 0
+            while length < chunk_size * 0.9:
+                word = rng.choice(VOCABULARY)
+                words.append(word)
+                length += len(word) + 1
+            paragraphs.append(" ".join(words).capitalize() + ".")
+        documents.append(Document(
+            content="\n\n".join(paragraphs),
+            metadata={
+                "filename": f"synthetic_{doc_index:06d}.txt",
+                "source_type": rng.choice(SOURCE_TYPES),
+                "source_authority": rng.randint(1, 10),
+                "topic": rng.choice(TOPICS),
+            }
+        ))
+    return documents
+
+
+def calibrated_corpus(num_chunks: int, chunk_size: int, chunk_texts: Callable[[List[str]], List[list]],
+                      chunks_per_doc: int = 10, seed: int = 42) -> List[Document]:
+    """
+    The shortest prefix of the synthetic corpus that `chunk_texts` (the active chunker) splits
+    into at least `num_chunks` chunks. Chunkers rarely cut exactly one chunk per paragraph, so
+    the corpus grows until it reaches the target; it overshoots by less than one document.
+    """
+    documents, counts = [], []
+    target = num_chunks
+    while True:
+        # The corpus is generated sequentially from the seed, so a larger one extends a smaller one
+        grown = synthetic_corpus(target, chunk_size, chunks_per_doc=chunks_per_doc, seed=seed)
+        counts.extend(len(spans) for spans in chunk_texts([doc.content for doc in grown[len(documents):]]))
+        documents = grown
+        if sum(counts) >= num_chunks or not sum(counts):
+            break
+        # Scale by the observed chunks per document, adding at least one document
+        needed = max(-(-len(documents) * num_chunks // sum(counts)), len(documents) + 1)
+        target = needed * chunks_per_doc
+
+    total = 0
+    for keep, count in enumerate(counts, start=1):
+        total += count
+        if total >= num_chunks:
+            return documents[:keep]
+    return documents
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident memory (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    latencies = sorted(latencies)
+    return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 2)
+
+
+def time_queries(vector_store, queries: int, min_authority: int = None) -> Dict:
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        vector_store.search(QUERIES[i % len(QUERIES)], min_authority=min_authority)
+        latencies.append(time.perf_counter() - start)
+    return {"p50_ms": percentile_ms(latencies, 0.5), "p99_ms": percentile_ms(latencies, 0.99)}
+
+
+def benchmark_size(num_chunks: int, backend: str, batch_docs: int, queries: int, seed: int) -> Dict:
+    """Ingest a synthetic corpus of `num_chunks` chunks (within one document), then time filtered and unfiltered searches."""
+    from src.utils.vector_store import VectorStore
+
+    vector_store = VectorStore(collection_name=f"perf_benchmark_{num_chunks}", in_memory=True, backend=backend)
+    # Sizing the corpus with the active chunker also builds it (tokenizer lookup) outside the timed loop
+    documents = calibrated_corpus(num_chunks, Config.CHUNK_SIZE, vector_store._chunk_documents, seed=seed)
+
+    # add_documents reports each stage as it completes, which splits its time per stage
+    stage_seconds = {"chunked": 0.0, "embedded": 0.0, "upserted": 0.0}
+    chunks = 0
+    for i in range(0, len(documents), batch_docs):
+        marks = {"start": time.perf_counter()}
+
+        def progress(stage, count):
+            marks[stage] = time.perf_counter()
+
+        chunks += vector_store.add_documents(documents[i:i + batch_docs], progress=progress)
+        end = time.perf_counter()
+        if "embedded" not in marks:
+            continue
+        stage_seconds["chunked"] += marks["chunked"] - marks["start"]
+        stage_seconds["embedded"] += marks["embedded"] - marks["chunked"]
+        stage_seconds["upserted"] += end - marks["embedded"]
+
+    # Warm up the query path (batcher thread, first backend search) before timing
+    vector_store.search(QUERIES[0])
+    unfiltered = time_queries(vector_store, queries)
+    filtered = time_queries(vector_store, queries, min_authority=7)
+
+    def rate(stage):
+        return round(chunks / stage_seconds[stage], 1) if stage_seconds[stage] else 0.0
+
+    results = {
+        "documents": len(documents),
+        "chunks": chunks,
+        "chunking_chunks_per_s": rate("chunked"),
+        "embedding_chunks_per_s": rate("embedded"),
+        "upsert_chunks_per_s": rate("upserted"),
+        "query_p50_ms": unfiltered["p50_ms"],
+        "query_p99_ms": unfiltered["p99_ms"],
+        "filtered_query_p50_ms": filtered["p50_ms"],
+        "filtered_query_p99_ms": filtered["p99_ms"],
+        # Sizes run smallest first, so the process high-water mark belongs to this size
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    vector_store.clear()
+    return results
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Metrics more than `threshold` (a fraction) worse than the baseline, as readable lines."""
+    regressions = []
+    for size, metrics in results["sizes"].items():
+        base_metrics = baseline.get("sizes", {}).get(size)
+        if not base_metrics:
+            continue
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if metric in ("documents", "chunks") or not base or not isinstance(value, (int, float)):
+                continue
+            if metric.endswith(LOWER_IS_BETTER):
+                change = (value - base) / base
+            else:
+                change = (base - value) / base
+            if change > threshold:
+                regressions.append(f"{size} chunks: {metric} {base} -> {value} ({change:+.0%} worse)")
+    return regressions
+
+
+def run_perf_benchmark(sizes: List[int], embedder: str, backend: str, batch_docs: int, queries: int, seed: int) -> Dict:
+    if embedder == "stub":
+        # Seed the shared model slot, so every VectorStore picks up the stub instead of loading a model
+        registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL,
+                            lambda name: StubEmbeddingModel(Config.VECTOR_SIZE)).result()
+
+    results = {
+        "config": {
+            "embedder": embedder if embedder == "stub" else f"{Config.EMBEDDING_PROVIDER}:{Config.EMBEDDING_MODEL}",
+            "backend": backend,
+            "chunking_mode": Config.CHUNKING_MODE,
+            "chunk_size": Config.CHUNK_SIZE,
+            "vector_size": Config.VECTOR_SIZE,
+            "queries": queries,
+            "seed": seed,
+        },
+        "sizes": {}
+    }
+    for size in sorted(sizes):
+        print(f"\n--- {size} chunks ---")
+        results["sizes"][str(size)] = benchmark_size(size, backend, batch_docs, queries, seed)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingestion and retrieval performance benchmark on a synthetic corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Corpus sizes in chunks")
+    parser.add_argument("--embedder", choices=["stub", "model"], default="stub",
+                        help="Deterministic hashing stub (offline) or the configured embedding provider")
+    parser.add_argument("--backend", choices=["embedded", "qdrant"], default=Config.VECTOR_BACKEND)
+    parser.add_argument("--batch-docs", type=int, default=200, help="Documents per add_documents call")
+    parser.add_argument("--queries", type=int, default=200, help="Timed searches per size and filter setting")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Optional JSON output path")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative regression per metric before failing (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results to --baseline instead of comparing")
+    args = parser.parse_args()
+
+    if args.embedder == "stub" and Config.EMBEDDING_PROVIDER == "openai":
+        parser.error("--embedder stub replaces the local model; set EMBEDDING_PROVIDER=local or use --embedder model")
+    if Config.CHUNKING_MODE == "llm" and args.embedder == "stub":
+        print("[WARNING] CHUNKING_MODE=llm calls Groq; set CHUNKING_MODE=token or sliding for an offline run.")
+
+    results = run_perf_benchmark(args.sizes, args.embedder, args.backend, args.batch_docs, args.queries, args.seed)
+
+    print(f"\n--- Performance Benchmark ({results['config']['embedder']}, {args.backend} backend) ---")
+    print(f"{'chunks':>8} {'chunk/s':>10} {'embed/s':>10} {'upsert/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'f-p50 ms':>9} {'f-p99 ms':>9} {'RSS MB':>8}")
+    for r in results["sizes"].values():
+        print(f"{r['chunks']:>8} {r['chunking_chunks_per_s']:>10.1f} {r['embedding_chunks_per_s']:>10.1f} "
+              f"{r['upsert_chunks_per_s']:>10.1f} {r['query_p50_ms']:>8.2f} {r['query_p99_ms']:>8.2f} "
+              f"{r['filtered_query_p50_ms']:>9.2f} {r['filtered_query_p99_ms']:>9.2f} {r['peak_rss_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print("[WARNING] Baseline was recorded with a different configuration; comparison may not be meaningful.")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n[OK] No regressions beyond {args.threshold:.0%} against {args.baseline}")
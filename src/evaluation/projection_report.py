@@ -0,0 +1,78 @@
+
+import sys
+import os
+import json
+import random
+import argparse
+from typing import List
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils.projection import recall_report
+from src.utils.vector_store import VectorStore
+
+
+def sample_chunk_texts(vector_store: VectorStore, limit: int) -> List[str]:
+    """Scroll chunk texts from the collection, stopping after `limit` chunks."""
+    texts, offset = [], None
+    while len(texts) < limit:
+        page, offset = vector_store.backend.scroll(
+            vector_store.collection_name, limit=min(1000, limit - len(texts)), offset=offset
+        )
+        texts.extend(p.payload["text"] for p in page if p.payload.get("text"))
+        if offset is None:
+            break
+    return texts
+
+
+def load_questions(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line)["question"] for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval recall of reduced vector sizes, to choose REDUCED_VECTOR_SIZE")
+    parser.add_argument("--collection", default=Config.COLLECTION_NAME)
+    parser.add_argument("--dims", type=int, nargs="+", default=[Config.VECTOR_SIZE // 2, Config.VECTOR_SIZE // 4, Config.VECTOR_SIZE // 8])
+    parser.add_argument("--methods", nargs="+", default=["pca", "random"], choices=["pca", "random"])
+    parser.add_argument("--sample", type=int, default=Config.REDUCTION_FIT_SAMPLE, help="Chunks to embed from the collection")
+    parser.add_argument("--queries", help="Testset JSONL whose questions are used as queries (default: held-out chunks)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    # Re-embed stored chunk texts at full width, since the collection may already hold reduced vectors
+    vector_store = VectorStore(collection_name=args.collection, in_memory=False)
+    texts = sample_chunk_texts(vector_store, args.sample)
+    if not texts:
+        print(f"Collection '{args.collection}' has no chunks to sample.")
+        sys.exit(1)
+
+    if args.queries:
+        corpus_texts, query_texts = texts, load_questions(args.queries)
+    else:
+        # Hold out a few chunks as queries, as if a user had asked for exactly that passage
+        random.Random(0).shuffle(texts)
+        n_queries = max(1, min(200, len(texts) // 10))
+        query_texts, corpus_texts = texts[:n_queries], texts[n_queries:]
+
+    corpus = np.asarray(vector_store._get_embeddings(corpus_texts), dtype=np.float32)
+    queries = np.asarray(vector_store._get_embeddings(query_texts, show_progress=False), dtype=np.float32)
+
+    report = []
+    for method in args.methods:
+        dims = [d for d in args.dims if method != "pca" or d <= len(corpus)]
+        report.extend(recall_report(corpus, queries, dims, method=method, k=args.k))
+
+    print(f"\n--- Projection Recall ({len(corpus)} chunks, {len(queries)} queries, full width {corpus.shape[1]}) ---")
+    for row in report:
+        print(f"{row['method']:<7} dim {row['dim']:>5}   recall@{args.k} {row[f'recall@{args.k}']:.3f}   size {row['size_ratio']:.0%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}")
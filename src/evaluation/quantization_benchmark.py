@@ -0,0 +1,117 @@
+
+import sys
+import os
+import json
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils.quantized_embeddings import load_quantized_model
+
+SAMPLE_QUERIES = [
+    "How do I remove stopped docker containers?",
+    "How can I list the images on my machine?",
+    "What is retrieval augmented generation?",
+    "How are documents split before indexing?",
+]
+
+SAMPLE_PASSAGES = [
+    "docker container prune removes all stopped containers. Use -f to skip the confirmation prompt.",
+    "docker image ls lists the images stored locally, including their tags and sizes.",
+    "Retrieval augmented generation answers questions by first retrieving relevant passages and then "
+    "passing them to a language model as context.",
+    "Documents are split into chunks of a few hundred tokens, preferably at paragraph or sentence boundaries.",
+    "Qdrant stores vectors together with a JSON payload and supports filtering on payload fields.",
+    "Streamlit reruns the whole script on every interaction, so expensive resources should be cached.",
+]
+
+
+def load_texts(path: str) -> List[str]:
+    """Read passages from a testset JSONL (context/question fields) or a plain text file (one per line)."""
+    texts = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                sample = json.loads(line)
+                texts.extend(sample[k] for k in ("question", "context") if sample.get(k))
+            else:
+                texts.append(line)
+    return texts
+
+
+def encode_timed(model, texts: List[str], batch_size: int, repeats: int):
+    # One warm-up pass so lazy initialization is not measured
+    model.encode(texts[:batch_size], batch_size=batch_size, show_progress_bar=False)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True)
+    elapsed = time.perf_counter() - start
+    return np.asarray(embeddings), len(texts) * repeats / elapsed
+
+
+def run_quantization_benchmark(model_name: str, texts: List[str], queries: List[str],
+                               batch_size: int = 32, repeats: int = 3) -> Dict:
+    """Compare int8 against fp32 embeddings: per-text cosine agreement, retrieval agreement and throughput."""
+    from sentence_transformers import SentenceTransformer
+
+    fp32 = SentenceTransformer(model_name, device="cpu")
+    int8 = load_quantized_model(model_name)
+
+    fp32_emb, fp32_rate = encode_timed(fp32, texts, batch_size, repeats)
+    int8_emb, int8_rate = encode_timed(int8, texts, batch_size, repeats)
+
+    # Embeddings are normalized, so the row-wise dot product is the cosine similarity
+    cosines = np.einsum("ij,ij->i", fp32_emb, int8_emb)
+
+    results = {
+        "model": model_name,
+        "texts": len(texts),
+        "cosine_mean": round(float(cosines.mean()), 4),
+        "cosine_min": round(float(cosines.min()), 4),
+        "cosine_p5": round(float(np.percentile(cosines, 5)), 4),
+        "fp32_texts_per_s": round(fp32_rate, 1),
+        "int8_texts_per_s": round(int8_rate, 1),
+        "speedup": round(int8_rate / fp32_rate, 2),
+    }
+
+    if queries:
+        # Does the int8 model retrieve the same passage as fp32 for each query?
+        q32 = fp32.encode(queries, normalize_embeddings=True, show_progress_bar=False)
+        q8 = int8.encode(queries, normalize_embeddings=True, show_progress_bar=False)
+        top32 = np.argmax(q32 @ fp32_emb.T, axis=1)
+        top8 = np.argmax(q8 @ int8_emb.T, axis=1)
+        results["top1_agreement"] = round(float(np.mean(top32 == top8)), 4)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parity and throughput of the int8 (local_int8) embedding backend against fp32")
+    parser.add_argument("--model", default=Config.LOCAL_EMBEDDING_MODEL, help="SentenceTransformer name or local path")
+    parser.add_argument("--texts", help="Testset JSONL or text file with one passage per line")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed passes over the texts")
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts) if args.texts else SAMPLE_PASSAGES
+    queries = [] if args.texts else SAMPLE_QUERIES
+    results = run_quantization_benchmark(args.model, texts, queries, args.batch_size, args.repeats)
+
+    print("\n--- int8 vs fp32 Embeddings ---")
+    for key, value in results.items():
+        print(f"{key:<18} {value}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
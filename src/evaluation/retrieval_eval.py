@@ -0,0 +1,296 @@
+
+import sys
+import os
+import re
+import json
+import math
+import time
+import argparse
+import hashlib
+import itertools
+from contextlib import contextmanager
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils.document_loader import Document, DocumentLoader
+from src.utils.embedding_service import EmbeddingCache
+
+# Settings each chunking mode actually reads; they are swept per mode, never across modes
+MODE_SETTINGS = {
+    "token": ("CHUNK_MAX_TOKENS", "CHUNK_OVERLAP_TOKENS"),
+    "sliding": ("CHUNK_SIZE", "CHUNK_OVERLAP"),
+    "semantic": ("SEMANTIC_CHUNK_MIN_SIZE", "SEMANTIC_CHUNK_MAX_SIZE", "SEMANTIC_BREAKPOINT_PERCENTILE"),
+    "llm": ("CHUNK_SIZE", "CHUNKING_WINDOW_SIZE", "CHUNKING_WINDOW_OVERLAP"),
+}
+
+# Swept when no --sweep is given. LLM chunking is left out: it is the one mode that calls Groq.
+DEFAULT_MODE_GRIDS = {
+    "token": {"CHUNK_MAX_TOKENS": [100, 200], "CHUNK_OVERLAP_TOKENS": [0, 50]},
+    "sliding": {"CHUNK_SIZE": [400, 800], "CHUNK_OVERLAP": [0, 200]},
+}
+DEFAULT_SWEEP = {"TOP_K_RESULTS": [1, 3, 5, 10]}
+
+
+def _parse_values(key: str, values: str) -> list:
+    if not hasattr(Config, key):
+        raise ValueError(f"Unknown setting: {key}")
+    current = getattr(Config, key)
+    cast = type(current) if isinstance(current, (int, float)) and not isinstance(current, bool) else str
+    return [cast(v.strip()) for v in values.split(",") if v.strip()]
+
+
+def parse_sweep(specs: List[str]) -> Tuple[Dict[str, list], Dict[str, Dict[str, list]]]:
+    """
+    Parse "KEY=v1,v2" and "MODE:KEY=v1,v2" specs, typed like the current Config attribute.
+
+    Returns (sweep, mode_grids): settings swept for every configuration (e.g. TOP_K_RESULTS,
+    EMBEDDING_PROVIDER) and a grid of chunking settings per mode. CHUNKING_MODE=a,b picks
+    the modes; a mode without its own specs uses its default grid.
+    """
+    sweep, mode_grids = {}, {}
+    chunking_keys = {key for keys in MODE_SETTINGS.values() for key in keys}
+    for spec in specs:
+        target, _, values = spec.partition("=")
+        mode, _, key = target.rpartition(":")
+        key, mode = key.strip().upper(), mode.strip().lower()
+        if mode:
+            if key not in MODE_SETTINGS.get(mode, ()):
+                raise ValueError(f"{mode} chunking does not read {key}; it reads {', '.join(MODE_SETTINGS.get(mode, ())) or 'nothing'}")
+            mode_grids.setdefault(mode, {})[key] = _parse_values(key, values)
+        elif key in chunking_keys:
+            raise ValueError(f"{key} only affects some chunking modes; sweep it per mode, e.g. sliding:{key}=...")
+        else:
+            sweep[key] = _parse_values(key, values)
+
+    modes = sweep.pop("CHUNKING_MODE", None) or list(mode_grids) or list(DEFAULT_MODE_GRIDS)
+    for mode in modes:
+        if mode not in MODE_SETTINGS:
+            raise ValueError(f"Unknown chunking mode: {mode}")
+    return sweep, {mode: mode_grids.get(mode, DEFAULT_MODE_GRIDS.get(mode, {})) for mode in modes}
+
+
+def expand_grid(sweep: Dict[str, list], mode_grids: Dict[str, Dict[str, list]]) -> List[Dict]:
+    """Every configuration (without TOP_K_RESULTS, which is evaluated from one ranking)."""
+    shared = {key: values for key, values in sweep.items() if key != "TOP_K_RESULTS"}
+    configurations = []
+    for mode, grid in mode_grids.items():
+        keys = list(shared) + list(grid)
+        for values in itertools.product(*(shared.get(key) or grid[key] for key in keys)):
+            configurations.append({"CHUNKING_MODE": mode, **dict(zip(keys, values))})
+    return configurations
+
+
+@contextmanager
+def config_overrides(overrides: Dict):
+    """Temporarily set Config attributes; VectorStore reads them at call time."""
+    overrides = dict(overrides)
+    # The embedding model and vector size follow the provider unless set explicitly
+    provider = overrides.get("EMBEDDING_PROVIDER")
+    if provider and "EMBEDDING_MODEL" not in overrides:
+        overrides["EMBEDDING_MODEL"] = Config.OPENAI_EMBEDDING_MODEL if provider == "openai" else Config.LOCAL_EMBEDDING_MODEL
+    if provider and "VECTOR_SIZE" not in overrides:
+        overrides["VECTOR_SIZE"] = 1536 if provider == "openai" else 768
+    saved = {key: getattr(Config, key) for key in overrides}
+    try:
+        for key, value in overrides.items():
+            setattr(Config, key, value)
+        yield
+    finally:
+        for key, value in saved.items():
+            setattr(Config, key, value)
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def shingles(text: str, n: int = 3) -> Set[Tuple[str, ...]]:
+    """Word n-grams of a text; whitespace and page joins do not affect them."""
+    words = _words(text)
+    if len(words) < n:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def overlap(a: Set, b: Set) -> float:
+    """Share of the smaller shingle set found in the other one."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def ranking_metrics(ranked: List[int], relevant: Set[int], k: int) -> Dict[str, float]:
+    """recall@k, reciprocal rank and binary nDCG@k of a ranked list of chunk indices."""
+    top = ranked[:k]
+    hits = [1 if i in relevant else 0 for i in top]
+    first = next((rank for rank, hit in enumerate(hits, 1) if hit), None)
+    dcg = sum(hit / math.log2(rank + 1) for rank, hit in enumerate(hits, 1))
+    ideal = sum(1 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return {
+        "recall": sum(hits) / len(relevant),
+        "mrr": 1 / first if first else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def load_testset(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_corpus(samples: List[Dict]) -> List[Tuple[str, Document]]:
+    """(source, document) pairs for every source referenced by the testset."""
+    loader = DocumentLoader()
+    corpus = []
+    for source in sorted({s["source"] for s in samples}):
+        if not os.path.exists(source):
+            print(f"[WARNING] Skipping missing source: {source}")
+            continue
+        corpus.extend((source, doc) for doc in loader.load_file(source))
+    return corpus
+
+
+def chunk_corpus(vector_store, corpus: List[Tuple[str, Document]]) -> List[Tuple[str, str]]:
+    """(source, chunk text) pairs, chunked exactly as add_documents would with the current Config."""
+    vector_store.reset_chunkers()
+    spans = vector_store._chunk_documents([doc.content for _, doc in corpus])
+    return [(source, doc.content[start:end]) for (source, doc), doc_spans in zip(corpus, spans) for start, end in doc_spans]
+
+
+def evaluate_configuration(samples: List[Dict], chunks: List[Tuple[str, str]], question_vectors: np.ndarray,
+                           chunk_vectors: np.ndarray, top_ks: List[int], min_overlap: float) -> Dict:
+    """Average recall@k, MRR and nDCG@k per k; a chunk is relevant if it overlaps the sample's context."""
+    chunk_shingles = [shingles(text) for _, text in chunks]
+
+    def normalized(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    # Exact cosine ranking, as the embedded backend does for collections of this size
+    scores = normalized(question_vectors) @ normalized(chunk_vectors).T
+    depth = min(max(top_ks), len(chunks))
+
+    totals = {k: {"recall": 0.0, "mrr": 0.0, "ndcg": 0.0} for k in top_ks}
+    matched = 0
+    for sample, row in zip(samples, scores):
+        context = shingles(sample["context"])
+        relevant = {
+            i for i, (source, _) in enumerate(chunks)
+            if source == sample["source"] and overlap(chunk_shingles[i], context) >= min_overlap
+        }
+        if not relevant:
+            continue
+        matched += 1
+        top = np.argpartition(-row, depth - 1)[:depth] if depth < len(chunks) else np.arange(len(chunks))
+        ranked = top[np.argsort(-row[top])].tolist()
+        for k in top_ks:
+            for metric, value in ranking_metrics(ranked, relevant, k).items():
+                totals[k][metric] += value
+
+    results = {"chunks": len(chunks), "matched_questions": matched}
+    for k in top_ks:
+        for metric, total in totals[k].items():
+            results[f"{metric}@{k}"] = round(total / matched, 4) if matched else 0.0
+    return results
+
+
+def run_retrieval_sweep(testset_path: str, sweep: Dict[str, list], mode_grids: Dict[str, Dict[str, list]] = None,
+                        min_overlap: float = 0.5, cache_path: str = None) -> List[Dict]:
+    """
+    Evaluate retrieval for every combination of the swept settings, without any LLM calls.
+    A configuration that chunks the corpus exactly like one already evaluated (with the
+    same embedding model) is skipped, so settings with no effect are not reported twice.
+    """
+    from src.utils.vector_store import VectorStore
+
+    samples = load_testset(testset_path)
+    corpus = load_corpus(samples)
+    samples = [s for s in samples if any(source == s["source"] for source, _ in corpus)]
+    if not samples:
+        print("No samples with a loadable source.")
+        return []
+
+    cache = EmbeddingCache(cache_path or Config.EMBEDDING_CACHE_PATH)
+    top_ks = sorted(sweep.get("TOP_K_RESULTS") or [Config.TOP_K_RESULTS])
+    stores = {}
+    evaluated = {}
+    results = []
+
+    for settings in expand_grid(sweep, mode_grids if mode_grids is not None else DEFAULT_MODE_GRIDS):
+        with config_overrides(settings):
+            if Config.CHUNKING_MODE == "sliding" and Config.CHUNK_OVERLAP >= Config.CHUNK_SIZE:
+                continue
+            model_key = f"{Config.EMBEDDING_PROVIDER}:{Config.EMBEDDING_MODEL}"
+            if model_key not in stores:
+                stores[model_key] = VectorStore(collection_name="retrieval_eval", in_memory=True, backend="embedded")
+            vector_store = stores[model_key]
+
+            def encode(texts):
+                return vector_store._get_embeddings(texts, show_progress=False)
+
+            start = time.perf_counter()
+            chunks = chunk_corpus(vector_store, corpus)
+            # e.g. overlap is dropped when NEIGHBOR_EXPANSION is on
+            fingerprint = hashlib.sha256(
+                "\x00".join([model_key, *(text for _, text in chunks)]).encode("utf-8")
+            ).hexdigest()
+            if fingerprint in evaluated:
+                print(f"   {settings} -> same chunks as {evaluated[fingerprint]}, skipped")
+                continue
+            evaluated[fingerprint] = settings
+            chunk_vectors = cache.embed(model_key, [text for _, text in chunks], encode)
+            question_vectors = cache.embed(model_key, [s["question"] for s in samples], encode)
+            metrics = evaluate_configuration(samples, chunks, question_vectors, chunk_vectors, top_ks, min_overlap)
+
+        results.append({**settings, **metrics, "seconds": round(time.perf_counter() - start, 2)})
+        print(f"   {settings} -> {metrics['chunks']} chunks, nDCG@{top_ks[-1]} {metrics[f'ndcg@{top_ks[-1]}']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrieval-only evaluation (recall@k, MRR, nDCG) over a sweep of settings")
+    parser.add_argument("--testset", default="logs/eval/testset.jsonl")
+    parser.add_argument("--sweep", action="append", default=[], metavar="KEY=V1,V2",
+                        help="Setting and values to sweep (repeatable): chunking settings per mode, e.g. "
+                             "token:CHUNK_MAX_TOKENS=100,200 or sliding:CHUNK_SIZE=400,800, and shared ones such as "
+                             "TOP_K_RESULTS=3,5 or EMBEDDING_PROVIDER=local,local_int8. CHUNKING_MODE=token,sliding picks modes "
+                             "(default grids for modes without specs)")
+    parser.add_argument("--min-overlap", type=float, default=0.5,
+                        help="Share of word trigrams a chunk must share with the context to count as relevant")
+    parser.add_argument("--sort-by", default=None, help="Metric to rank configurations by (default: nDCG at the largest k)")
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.testset):
+        print(f"Testset not found: {args.testset}")
+        sys.exit(1)
+
+    sweep, mode_grids = parse_sweep(args.sweep)
+    sweep = {**DEFAULT_SWEEP, **sweep}
+    results = run_retrieval_sweep(args.testset, sweep, mode_grids, args.min_overlap)
+    if not results:
+        sys.exit(1)
+
+    top_ks = sorted(sweep.get("TOP_K_RESULTS") or [Config.TOP_K_RESULTS])
+    sort_by = args.sort_by or f"ndcg@{top_ks[-1]}"
+    results.sort(key=lambda r: r.get(sort_by, 0), reverse=True)
+
+    setting_keys = ["CHUNKING_MODE"] + [key for key in sweep if key != "TOP_K_RESULTS"]
+    setting_keys += list(dict.fromkeys(key for grid in mode_grids.values() for key in grid))
+    metric_keys = [f"{m}@{k}" for k in top_ks for m in ("recall", "mrr", "ndcg")]
+    columns = setting_keys + ["chunks", "matched_questions"] + metric_keys
+    print(f"\n--- Retrieval Evaluation (sorted by {sort_by}) ---")
+    print("  ".join(f"{key:>14}" for key in columns))
+    for r in results:
+        print("  ".join(f"{str(r.get(key, '-')):>14}" for key in columns))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"sweep": sweep, "mode_grids": mode_grids, "min_overlap": args.min_overlap, "results": results},
+                      f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -2,7 +2,10 @@
 import sys
 import os
 import json
+import time
 import asyncio
+import hashlib
+import argparse
 from typing import List, Dict
 from tqdm import tqdm
 
@@ -15,8 +18,84 @@ from src.utils.document_loader import Document, DocumentLoader
 from src.agents.research_agent import agent
 from src.models.schemas import ResearchDeps
 from src.evaluation.judges import LLMJudge
+from src.utils.rate_limit import RateBudget, RateLimitedModel
 
-async def run_benchmark(testset_path: str):
+def sample_key(sample: Dict) -> str:
+    """Stable identity of a testset sample, used to match it against checkpointed results."""
+    return hashlib.sha256(f"{sample['question']}\n{sample.get('context', '')}".encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(checkpoint_path: str) -> Dict[str, Dict]:
+    """Results already written to the checkpoint JSONL, by sample key (a torn last line is ignored)."""
+    done = {}
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[result["key"]] = result
+    return done
+
+
+async def evaluate_sample(sample: Dict, vs: VectorStore, judge: LLMJudge, budget: RateBudget) -> Dict:
+    """Answer one question with the agent, then grade it with both judges in parallel."""
+    question = sample["question"]
+    ground_truth = sample["answer"]
+    context = sample["context"]
+    error = False
+
+    # Get Agent Answer
+    try:
+        # Fresh deps per question: the per-run tool cache must not carry over between questions
+        deps = ResearchDeps(api_key=Config.GROQ_API_KEY, vector_store=vs)
+        # Each model request of the run (one per tool round trip) takes its own slot
+        agent_result = await agent.run(question, deps=deps, model=RateLimitedModel(agent.model, budget))
+        generated_answer = agent_result.output
+    except Exception as e:
+        print(f"Error running agent for '{question}': {e}")
+        generated_answer = "ERROR"
+        error = True
+
+    # Run Judges: the Groq client is synchronous, so each call runs in a worker thread
+    async def judged(evaluate, *args):
+        await budget.acquire()
+        return await asyncio.to_thread(evaluate, *args)
+
+    correctness, faithfulness = await asyncio.gather(
+        judged(judge.evaluate_correctness, question, ground_truth, generated_answer),
+        judged(judge.evaluate_faithfulness, question, context, generated_answer)
+    )
+    # The judge scores failed calls 0; those samples are retried on resume
+    error = error or not correctness.get("score") or not faithfulness.get("score")
+
+    return {
+        "key": sample_key(sample),
+        "question": question,
+        "ground_truth": ground_truth,
+        "generated_answer": generated_answer,
+        "correctness_score": correctness.get("score", 0),
+        "correctness_reasoning": correctness.get("reasoning", ""),
+        "faithfulness_score": faithfulness.get("score", 0),
+        "faithfulness_reasoning": faithfulness.get("reasoning", ""),
+        "error": error
+    }
+
+
+async def run_benchmark(testset_path: str, concurrency: int = None, requests_per_minute: float = None,
+                        checkpoint_path: str = None, output_path: str = "logs/eval/benchmark_results.json"):
+    """
+    Evaluate every sample of the testset, `concurrency` samples at a time.
+
+    LLM calls (each model request of an agent run, and each judge call) start no faster
+    than `requests_per_minute`.
+    Each successfully graded result is appended to `checkpoint_path` as it completes;
+    samples already in the checkpoint are not evaluated again.
+    """
+    concurrency = concurrency or Config.EVAL_CONCURRENCY
+    requests_per_minute = Config.EVAL_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
     print(f"--- Starting Benchmark: {testset_path} ---")
     
     # 1. Load testset
@@ -31,52 +110,57 @@ async def run_benchmark(testset_path: str):
         print("No samples found.")
         return
 
+    done = load_checkpoint(checkpoint_path)
+    pending = [s for s in samples if sample_key(s) not in done]
+    if done:
+        print(f"Resuming: {len(samples) - len(pending)} samples already evaluated in {checkpoint_path}")
+
     # 2. Setup Vector Store with in-memory storage for the benchmark
     print("Pre-loading documents into vector store...")
-    vs = VectorStore(collection_name="benchmark_collection", in_memory=True)
+    # The embedded backend scans the ephemeral benchmark collection far faster than Qdrant local mode
+    vs = VectorStore(collection_name="benchmark_collection", in_memory=True, backend="embedded")
     loader = DocumentLoader()
     
     # Get unique sources from samples
-    sources = list(set([s["source"] for s in samples]))
+    sources = list(set([s["source"] for s in pending]))
     for source in sources:
-        if source.endswith(".pdf"):
-            docs = loader.load_pdf(source)
+        if os.path.exists(source):
+            docs = loader.load_file(source)
             vs.add_documents(docs)
     
-    # 3. Initialize Agent Dependencies
-    deps = ResearchDeps(api_key=Config.GROQ_API_KEY, vector_store=vs)
+    # 3. Initialize the judge (agent dependencies are created per question)
     judge = LLMJudge()
-    
-    results = []
+    semaphore = asyncio.Semaphore(concurrency)
+    budget = RateBudget(requests_per_minute)
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
     
     # 4. Run Evaluation
-    print(f"Evaluating {len(samples)} samples...")
-    for sample in tqdm(samples):
-        question = sample["question"]
-        ground_truth = sample["answer"]
-        context = sample["context"]
-        
-        # Get Agent Answer
-        try:
-            agent_result = await agent.run(question, deps=deps)
-            generated_answer = agent_result.output
-        except Exception as e:
-            print(f"Error running agent for '{question}': {e}")
-            generated_answer = "ERROR"
-            
-        # Run Judge
-        correctness = judge.evaluate_correctness(question, ground_truth, generated_answer)
-        faithfulness = judge.evaluate_faithfulness(question, context, generated_answer)
-        
-        results.append({
-            "question": question,
-            "ground_truth": ground_truth,
-            "generated_answer": generated_answer,
-            "correctness_score": correctness["score"],
-            "correctness_reasoning": correctness["reasoning"],
-            "faithfulness_score": faithfulness["score"],
-            "faithfulness_reasoning": faithfulness["reasoning"]
-        })
+    print(f"Evaluating {len(pending)} samples ({concurrency} at a time)...")
+    progress = tqdm(total=len(pending))
+
+    async def bounded(sample):
+        async with semaphore:
+            result = await evaluate_sample(sample, vs, judge, budget)
+        # Written from the event loop thread, so lines never interleave
+        if checkpoint and not result["error"]:
+            checkpoint.write(json.dumps(result) + "\n")
+            checkpoint.flush()
+        progress.update(1)
+        return result
+
+    start = time.perf_counter()
+    try:
+        fresh = await asyncio.gather(*(bounded(s) for s in pending))
+    finally:
+        progress.close()
+        if checkpoint:
+            checkpoint.close()
+    elapsed = time.perf_counter() - start
+
+    # Report in testset order, combining checkpointed and fresh results
+    by_key = {**done, **{r["key"]: r for r in fresh}}
+    results = [by_key[sample_key(s)] for s in samples]
+    failed = sum(1 for r in results if r.get("error"))
 
     # 5. Report Results
     avg_correctness = sum(r["correctness_score"] for r in results) / len(results)
@@ -85,9 +169,11 @@ async def run_benchmark(testset_path: str):
     print("\n--- Benchmark Results ---")
     print(f"Average Correctness: {avg_correctness:.2f}/5")
     print(f"Average Faithfulness: {avg_faithfulness:.2f}/5")
+    print(f"Evaluated {len(pending)} samples in {elapsed:.1f}s")
+    if failed:
+        print(f"[WARNING] {failed} samples failed and will be retried on the next run")
     
     # Save results
-    output_path = "logs/eval/benchmark_results.json"
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump({
             "average_correctness": avg_correctness,
@@ -97,8 +183,20 @@ async def run_benchmark(testset_path: str):
     print(f"Detailed results saved to {output_path}")
 
 if __name__ == "__main__":
-    testset = "logs/eval/testset.jsonl"
-    if os.path.exists(testset):
-        asyncio.run(run_benchmark(testset))
+    parser = argparse.ArgumentParser(description="Evaluate the research agent on a testset with LLM judges")
+    parser.add_argument("--testset", default="logs/eval/testset.jsonl")
+    parser.add_argument("--concurrency", type=int, default=Config.EVAL_CONCURRENCY, help="Samples evaluated at once")
+    parser.add_argument("--rpm", type=float, default=Config.EVAL_REQUESTS_PER_MINUTE,
+                        help="Max LLM calls started per minute (0 = unlimited)")
+    parser.add_argument("--checkpoint", default="logs/eval/benchmark_checkpoint.jsonl",
+                        help="JSONL of completed results; samples found here are skipped")
+    parser.add_argument("--fresh", action="store_true", help="Discard the checkpoint and evaluate every sample")
+    parser.add_argument("--output", default="logs/eval/benchmark_results.json")
+    args = parser.parse_args()
+
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    if os.path.exists(args.testset):
+        asyncio.run(run_benchmark(args.testset, args.concurrency, args.rpm, args.checkpoint, args.output))
     else:
-        print(f"Testset not found: {testset}")
+        print(f"Testset not found: {args.testset}")
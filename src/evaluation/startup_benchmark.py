@@ -0,0 +1,98 @@
+
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+# Add project root to sys.path
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(PROJECT_ROOT)
+
+# Each scenario runs in a fresh interpreter so that nothing is already imported or loaded.
+SCENARIOS = {
+    "import_config": "import src.utils.config",
+    "import_vector_store": "import src.utils.vector_store",
+    "import_reindex": "import reindex",
+    "vector_store_constructed": (
+        "from src.utils.vector_store import VectorStore\n"
+        "VectorStore(collection_name='startup_benchmark', in_memory=True)"
+    ),
+    "vector_store_model_ready": (
+        "from src.utils.vector_store import VectorStore\n"
+        "vs = VectorStore(collection_name='startup_benchmark', in_memory=True)\n"
+        "vs.local_model"
+    ),
+    # Streamlit's AppTest executes src/app.py exactly like the first page render, without a browser
+    "streamlit_first_render": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "at = AppTest.from_file('src/app.py', default_timeout=300).run()\n"
+        "assert not at.exception, at.exception"
+    ),
+}
+
+
+# The snippet reports its own elapsed time and exits immediately, so background
+# threads (e.g. a model still loading) do not inflate the measurement.
+WRAPPER = """
+import os, time
+_start = time.perf_counter()
+{code}
+print("__ELAPSED__", time.perf_counter() - _start, flush=True)
+os._exit(0)
+"""
+
+
+def time_scenario(code: str, runs: int) -> Dict:
+    """Run a snippet in fresh interpreters and return its timings in seconds."""
+    timings: List[float] = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", WRAPPER.format(code=code)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True
+        )
+        marker = [line for line in proc.stdout.splitlines() if line.startswith("__ELAPSED__")]
+        if proc.returncode != 0 or not marker:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        timings.append(float(marker[-1].split()[1]))
+    return {
+        "runs": runs,
+        "median_s": round(statistics.median(timings), 3),
+        "min_s": round(min(timings), 3),
+        "max_s": round(max(timings), 3)
+    }
+
+
+def run_startup_benchmark(scenarios: List[str], runs: int) -> Dict[str, Dict]:
+    results = {}
+    for name in scenarios:
+        print(f"Timing {name}...")
+        results[name] = time_scenario(SCENARIOS[name], runs)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the app and reindex.py")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per scenario")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Only run these scenarios")
+    parser.add_argument("--output", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    results = run_startup_benchmark(args.scenario or list(SCENARIOS), args.runs)
+
+    print("\n--- Startup Benchmark ---")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<28} ERROR: {result['error']}")
+        else:
+            print(f"{name:<28} median {result['median_s']:.2f}s  (min {result['min_s']:.2f}s, max {result['max_s']:.2f}s)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -1,8 +1,9 @@
 from datetime import date
-from typing import Optional
+from typing import Dict, Hashable, List, Optional, Tuple
 from pydantic import BaseModel
-from tavily import TavilyClient
 import os
+import re
+import threading
 from dotenv import load_dotenv
 
 # Load env for Tavily
@@ -15,6 +16,7 @@ load_dotenv()
 # VectorStore DOES NOT depend on models (it returns dicts or simple types mostly).
 # So importing VectorStore here is safe.)
 
+from src.utils import registry
 from src.utils.vector_store import VectorStore
 
 class SearchResult(BaseModel):
@@ -24,12 +26,88 @@ class SearchResult(BaseModel):
     snippet: str
     date_published: date
 
+def _tavily_client():
+    # Imported here to keep module import cheap
+    from tavily import TavilyClient
+    return TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+
+class ToolRunCache:
+    """
+    Per-run memory of tool calls, so the agent's gap-analysis loop doesn't pay twice.
+
+    Calls are memoized by tool name and normalized arguments; a repeat returns a short
+    pointer to the earlier results instead of running the search again. Every passage
+    returned gets a label ([R1], [R2], ...); a passage that comes back in a later call
+    is replaced by a back-reference to its label, so it isn't sent to the model twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple, List[str]] = {}
+        self._labels: Dict[Hashable, str] = {}
+        self.memo_hits = 0
+        self.back_references = 0
+
+    @staticmethod
+    def _normalize(value):
+        if isinstance(value, str):
+            # Case, spacing and trailing punctuation don't change what a search returns
+            return re.sub(r"\s+", " ", value).strip().rstrip("?.!").lower()
+        return value
+
+    def call_key(self, tool_name: str, *args) -> Tuple:
+        return (tool_name, *(self._normalize(a) for a in args))
+
+    def earlier_results(self, key: Tuple) -> Optional[List[str]]:
+        """Labels returned by an identical earlier call, or None."""
+        with self._lock:
+            labels = self._calls.get(key)
+            if labels is not None:
+                self.memo_hits += 1
+            return labels
+
+    def record_call(self, key: Tuple, labels: List[str]):
+        with self._lock:
+            self._calls[key] = labels
+
+    def label(self, item_id: Hashable) -> Tuple[str, bool]:
+        """Label of a passage and whether it is new in this run."""
+        with self._lock:
+            label = self._labels.get(item_id)
+            if label is not None:
+                self.back_references += 1
+                return label, False
+            label = f"R{len(self._labels) + 1}"
+            self._labels[item_id] = label
+            return label, True
+
+    @staticmethod
+    def repeated_call_result(labels: List[str]) -> SearchResult:
+        refs = ", ".join(f"[{l}]" for l in labels) or "no results"
+        return SearchResult(
+            title="Repeated call",
+            url="memo",
+            snippet=f"This exact call already ran earlier in this research; see {refs} above.",
+            date_published=date.today()
+        )
+
+    @staticmethod
+    def back_reference(label: str, url: str) -> SearchResult:
+        return SearchResult(
+            title=f"[{label}] (already returned)",
+            url=url,
+            snippet=f"Same passage as [{label}] above.",
+            date_published=date.today()
+        )
+
 class ResearchDeps:
     """Dependencies for the research agent."""
     def __init__(self, api_key: str, vector_store: VectorStore = None, min_authority: int = 1):
         self.api_key = api_key
-        # Initialize or use provided vector store
-        self.vector_store = vector_store or VectorStore(in_memory=False)
-        # Initialize Tavily client for live web search
-        self.tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        # Use the provided vector store or the process-wide persistent one
+        self.vector_store = vector_store or registry.get_vector_store()
+        # Tavily client for live web search, shared across queries
+        self.tavily_client = registry.get_client("tavily", os.getenv("TAVILY_API_KEY"), _tavily_client)
         self.min_authority = min_authority
+        # Deps are created per run, so memoized tool calls never outlive the question
+        self.tool_cache = ToolRunCache()
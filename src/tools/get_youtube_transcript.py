@@ -4,6 +4,7 @@ from typing import List
 from youtube_transcript_api import YouTubeTranscriptApi
 from pydantic_ai import RunContext
 from src.models.schemas import ResearchDeps, SearchResult
+from src.utils.tracing import FETCH, span
 
 def get_youtube_transcript(ctx: RunContext[ResearchDeps], url: str) -> List[SearchResult]:
     """Extract the transcript from a YouTube video URL.
@@ -31,15 +32,27 @@ def get_youtube_transcript(ctx: RunContext[ResearchDeps], url: str) -> List[Sear
             return []
         
         video_id = video_id_match.group(1)
+
+        # The transcript is the largest tool output; never fetch or send the same one twice in a run
+        tool_cache = ctx.deps.tool_cache
+        # Video IDs are case-sensitive, so the key is not normalized like search queries
+        call_key = ("get_youtube_transcript", video_id)
+        earlier = tool_cache.earlier_results(call_key)
+        if earlier is not None:
+            print(f"  [YouTube Tool] Transcript already returned as {earlier}")
+            return [tool_cache.repeated_call_result(earlier)]
         
         # Fetch transcript using the pattern working in document_loader.py
-        api = YouTubeTranscriptApi()
-        transcript_list = api.fetch(video_id)
+        with span("youtube_transcript", FETCH, video_id=video_id):
+            api = YouTubeTranscriptApi()
+            transcript_list = api.fetch(video_id)
         full_text = " ".join([t.text for t in transcript_list])
+        label, _ = tool_cache.label(f"youtube:{video_id}")
+        tool_cache.record_call(call_key, [label])
         
         # Return as a SearchResult for consistent handling
         return [SearchResult(
-            title=f"YouTube Transcript: {video_id}",
+            title=f"[{label}] YouTube Transcript: {video_id}",
             url=url,
             snippet=full_text[:4000], # Increased snippet size for better research
             date_published=date.today()
@@ -2,6 +2,7 @@ from datetime import date
 from typing import List
 from pydantic_ai import RunContext
 from src.models.schemas import ResearchDeps, SearchResult
+from src.utils.tracing import FETCH, span
 
 def perform_web_search(ctx: RunContext[ResearchDeps], query: str, max_results: int = 3) -> List[SearchResult]:
     """Search the live internet for news and real-time updates.
@@ -22,20 +23,36 @@ def perform_web_search(ctx: RunContext[ResearchDeps], query: str, max_results: i
             snippet=f"Web search results were hidden because their authority score (5) is lower than your required minimum ({ctx.deps.min_authority}).",
             date_published=date.today()
         )]
-    response = ctx.deps.tavily_client.search(
-        query=query,
-        max_results=max_results,
-        search_depth="advanced"
-    )
+    tool_cache = ctx.deps.tool_cache
+    call_key = tool_cache.call_key("perform_web_search", query, max_results)
+    earlier = tool_cache.earlier_results(call_key)
+    if earlier is not None:
+        print(f"  [Web Search] Repeated search, pointing back to {earlier}: {query}")
+        return [tool_cache.repeated_call_result(earlier)]
+
+    with span("tavily_search", FETCH, query=query):
+        response = ctx.deps.tavily_client.search(
+            query=query,
+            max_results=max_results,
+            search_depth="advanced"
+        )
     
     # Map Tavily results to our SearchResult model
     results = []
+    labels = []
     for r in response.get("results", []):
+        # Pages already returned earlier in this run are only referenced, not repeated
+        label, is_new = tool_cache.label(r["url"])
+        labels.append(label)
+        if not is_new:
+            results.append(tool_cache.back_reference(label, r["url"]))
+            continue
         results.append(SearchResult(
-            title=r["title"],
+            title=f"[{label}] {r['title']}",
             url=r["url"],
             snippet=r["content"],
             date_published=date.today() # Tavily doesn't always provide a clear date
         ))
     
+    tool_cache.record_call(call_key, labels)
     return results
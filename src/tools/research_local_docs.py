@@ -11,6 +11,13 @@ def research_local_docs(ctx: RunContext[ResearchDeps], query: str, max_results:
         query: The specific topic to look up in the documents.
         max_results: Number of chunks to retrieve.
     """
+    tool_cache = ctx.deps.tool_cache
+    call_key = tool_cache.call_key("research_local_docs", query, max_results, ctx.deps.min_authority)
+    earlier = tool_cache.earlier_results(call_key)
+    if earlier is not None:
+        print(f"  [Retriever] Repeated search, pointing back to {earlier}: {query}")
+        return [tool_cache.repeated_call_result(earlier)]
+
     print(f"  [Retriever] Searching for: {query} (Min Authority: {ctx.deps.min_authority})")
     raw_results = ctx.deps.vector_store.search(
         query, 
@@ -21,14 +28,23 @@ def research_local_docs(ctx: RunContext[ResearchDeps], query: str, max_results:
     
     # Map raw vector results to our structured SearchResult model
     results = []
+    labels = []
     for r in raw_results:
         # Extract metadata, handling potential missing fields gracefully
         meta = r.get("metadata", {})
+        url = meta.get("source_url") or "local-file"
+        # Chunks already returned earlier in this run are only referenced, not repeated
+        label, is_new = tool_cache.label(r.get("id") or r["text"])
+        labels.append(label)
+        if not is_new:
+            results.append(tool_cache.back_reference(label, url))
+            continue
         results.append(SearchResult(
-            title=meta.get("title") or meta.get("source_url") or "Unknown Document",
-            url=meta.get("source_url") or "local-file",
+            title=f"[{label}] " + (meta.get("title") or meta.get("source_url") or "Unknown Document"),
+            url=url,
             snippet=r["text"][:500], # Pass the chunk text as snippet
             date_published=date.today() # Placeholder as we might not have real dates for all chunks
         ))
     
+    tool_cache.record_call(call_key, labels)
     return results
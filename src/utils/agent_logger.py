@@ -1,20 +1,66 @@
+import atexit
+import queue
 import sqlite3
+import threading
+import time
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, List, Tuple
 from src.utils.config import Config
+from src.utils.quantile_sketch import QuantileSketch
+
+# Rollup granularities and the length of the timestamp prefix ("YYYY-MM-DD HH:MM:SS") that keys them
+ROLLUP_GRANULARITIES = {"minute": 16, "hour": 13, "day": 10, "all": 0}
+NO_TOOL = "(none)"
 
 class AgentLogger:
-    """Manages agent interaction logs in a local SQLite database."""
-    
-    def __init__(self, db_path: str = None):
+    """
+    Manages agent interaction logs in a local SQLite database.
+
+    The database runs in WAL mode, so readers never block the writer. Writes are queued
+    and committed in batches by a background thread, so logging adds next to nothing to
+    the chat path; `flush()` waits for queued writes, and pending writes are flushed when
+    the logger is closed or the interpreter exits.
+
+    Each batch also updates rollup tables (per minute, hour, day and overall, plus per
+    tool) in the same transaction. Latency percentiles come from a mergeable quantile
+    sketch stored with every rollup row, so `get_stats` and `get_rollups` read a handful
+    of rows however large the log grows.
+
+    Trace spans (see src/utils/tracing.py) go through the same writer into `spans`.
+    """
+
+    # Seconds clear_logs waits for queued writes before deleting anyway
+    CLEAR_FLUSH_TIMEOUT = 10.0
+
+    def __init__(self, db_path: str = None, batch_size: int = 100, flush_interval: float = 0.5):
         self.db_path = db_path or str(Config.LOGS_DIR / "agent_history.db")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
         self._initialize_db()
 
+        # One connection for reads, shared by every session of this process
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="agent-logger-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL is durable at checkpoints; fsync on every commit is not needed for logs
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     def _initialize_db(self):
-        """Create the logs table if it doesn't exist."""
-        Config.LOGS_DIR.mkdir(exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
+        """Create the logs table and its indexes if they don't exist."""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS interactions (
@@ -30,56 +76,355 @@ class AgentLogger:
                 tools_used TEXT
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rollups (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                queries INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                cost FLOAT NOT NULL,
+                latency_sum FLOAT NOT NULL,
+                latency_max FLOAT NOT NULL,
+                latency_sketch BLOB NOT NULL,
+                PRIMARY KEY (granularity, bucket)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS spans (
+                id TEXT PRIMARY KEY,
+                trace_id TEXT NOT NULL,
+                parent_id TEXT,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                start REAL NOT NULL,
+                duration REAL NOT NULL,
+                status TEXT,
+                attributes TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_trace ON spans (trace_id)")
+        # Root spans are listed newest first to pick a run
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_roots ON spans (parent_id, start)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tool_rollups (
+                tool TEXT PRIMARY KEY,
+                calls INTEGER NOT NULL,
+                interactions INTEGER NOT NULL,
+                cost FLOAT NOT NULL
+            )
+        """)
         conn.commit()
+
+        # Logs written before rollups existed are rolled up once
+        has_totals = cursor.execute("SELECT 1 FROM rollups WHERE granularity = 'all'").fetchone()
+        has_logs = cursor.execute("SELECT 1 FROM interactions LIMIT 1").fetchone()
+        if has_logs and not has_totals:
+            self._rebuild_rollups(conn)
         conn.close()
 
+    def _rebuild_rollups(self, conn: sqlite3.Connection, chunk_size: int = 10000):
+        """Recompute every rollup from the interactions table."""
+        print("📊 [AgentLogger] Building metric rollups from existing logs...")
+        conn.execute("DELETE FROM rollups")
+        conn.execute("DELETE FROM tool_rollups")
+        cursor = conn.execute("""
+            SELECT timestamp, query, response, prompt_tokens, completion_tokens, total_tokens, cost, latency, tools_used
+            FROM interactions ORDER BY id
+        """)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            self._update_rollups(conn, rows)
+        conn.commit()
+
+    @staticmethod
+    def _update_rollups(conn: sqlite3.Connection, rows: List[Tuple]):
+        """Fold interaction rows into the rollup tables (the caller commits)."""
+        buckets: Dict[Tuple[str, str], Dict] = {}
+        tools: Dict[str, List] = {}
+        for timestamp, _, _, prompt_tokens, completion_tokens, total_tokens, cost, latency, tools_used in rows:
+            timestamp = str(timestamp)
+            latency = latency or 0.0
+            for granularity, prefix in ROLLUP_GRANULARITIES.items():
+                key = (granularity, timestamp[:prefix])
+                agg = buckets.get(key)
+                if agg is None:
+                    agg = buckets[key] = {"queries": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                                          "cost": 0.0, "latency_sum": 0.0, "latency_max": 0.0, "sketch": QuantileSketch()}
+                agg["queries"] += 1
+                agg["prompt_tokens"] += prompt_tokens or 0
+                agg["completion_tokens"] += completion_tokens or 0
+                agg["total_tokens"] += total_tokens or 0
+                agg["cost"] += cost or 0.0
+                agg["latency_sum"] += latency
+                agg["latency_max"] = max(agg["latency_max"], latency)
+                agg["sketch"].add(latency)
+
+            # An interaction's cost is split evenly across the tool calls it made
+            called = [t for t in (tools_used or "").split(",") if t] or [NO_TOOL]
+            for tool in set(called):
+                calls = called.count(tool)
+                stats = tools.setdefault(tool, [0, 0, 0.0])
+                stats[0] += calls
+                stats[1] += 1
+                stats[2] += (cost or 0.0) * calls / len(called)
+
+        for (granularity, bucket), agg in buckets.items():
+            existing = conn.execute(
+                """SELECT queries, prompt_tokens, completion_tokens, total_tokens, cost, latency_sum, latency_max, latency_sketch
+                   FROM rollups WHERE granularity = ? AND bucket = ?""",
+                (granularity, bucket)
+            ).fetchone()
+            if existing:
+                for i, name in enumerate(("queries", "prompt_tokens", "completion_tokens", "total_tokens", "cost", "latency_sum")):
+                    agg[name] += existing[i]
+                agg["latency_max"] = max(agg["latency_max"], existing[6])
+                agg["sketch"].merge(QuantileSketch.from_bytes(existing[7]))
+            conn.execute(
+                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (granularity, bucket, agg["queries"], agg["prompt_tokens"], agg["completion_tokens"],
+                 agg["total_tokens"], agg["cost"], agg["latency_sum"], agg["latency_max"], agg["sketch"].to_bytes())
+            )
+
+        for tool, (calls, interactions, cost) in tools.items():
+            conn.execute(
+                """INSERT INTO tool_rollups VALUES (?, ?, ?, ?)
+                   ON CONFLICT(tool) DO UPDATE SET calls = calls + excluded.calls,
+                   interactions = interactions + excluded.interactions, cost = cost + excluded.cost""",
+                (tool, calls, interactions, cost)
+            )
+
+    # --- Background writer ---
+
+    def _write_loop(self):
+        """Commit queued rows in batches: everything queued within `flush_interval`, up to `batch_size`."""
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = None
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)  # (table, row)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(0.0, timeout))
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write_batch(conn, batch)
+            finally:
+                # Waiters are released even if the batch failed, so flush() never hangs
+                for waiter in waiters:
+                    waiter.set()
+            if stop:
+                conn.close()
+                return
+
+    def _write_batch(self, conn: sqlite3.Connection, items: list):
+        interactions = [row for table, row in items if table == "interactions"]
+        spans = [row for table, row in items if table == "spans"]
+        try:
+            if interactions:
+                conn.executemany("""
+                    INSERT INTO interactions
+                    (timestamp, query, response, prompt_tokens, completion_tokens, total_tokens, cost, latency, tools_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, interactions)
+                self._update_rollups(conn, interactions)
+            if spans:
+                conn.executemany("INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", spans)
+            conn.commit()
+        except Exception as e:
+            # Any error (a locked database, or a bad value reaching the rollups) drops this
+            # batch only; the writer thread keeps serving later ones
+            conn.rollback()
+            print(f"   [WARNING] Failed to write {len(items)} log entries: {e}")
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every interaction logged so far is committed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread (safe to call more than once)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._read_lock:
+            self._read_conn.close()
+        atexit.unregister(self.close)
+
+    # --- Public API ---
+
     def log_interaction(self, query: str, response: str, usage, latency: float, tools: list):
-        """Record an agent interaction."""
-        prompt_tokens = usage.request_tokens or 0
-        completion_tokens = usage.response_tokens or 0
+        """Record an agent interaction (queued; committed by the background writer)."""
+        # pydantic-ai's usage exposes input/output tokens (request/response tokens in older versions)
+        prompt_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None) or 0
+        completion_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None) or 0
         total_tokens = usage.total_tokens or 0
-        
+
         # Mock cost calculation (Llama 3.3 70B hypothetical rates)
         # $0.15 per 1M input, $0.60 per 1M output
         cost = (prompt_tokens * 0.15 / 1_000_000) + (completion_tokens * 0.60 / 1_000_000)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO interactions 
-            (query, response, prompt_tokens, completion_tokens, total_tokens, cost, latency, tools_used)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (query, response, prompt_tokens, completion_tokens, total_tokens, cost, latency, ",".join(tools)))
-        conn.commit()
-        conn.close()
+
+        # Timestamped now (UTC, like CURRENT_TIMESTAMP), not when the batch is written
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        row = (timestamp, query, response, prompt_tokens, completion_tokens, total_tokens,
+               cost, latency, ",".join(tools))
+        self._enqueue("interactions", row)
+
+    def record_span(self, row: tuple):
+        """Queue a finished trace span (tracing.Span.to_row); use as the tracing sink."""
+        self._enqueue("spans", row)
+
+    def _enqueue(self, table: str, row: tuple):
+        if self._closed:
+            # After shutdown there is no writer thread; write directly rather than drop the row
+            conn = self._connect()
+            self._write_batch(conn, [(table, row)])
+            conn.close()
+            return
+        self._queue.put((table, row))
 
     def get_logs(self, limit: int = 100) -> pd.DataFrame:
         """Retrieve recent logs as a Pandas DataFrame."""
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query(f"SELECT * FROM interactions ORDER BY timestamp DESC LIMIT {limit}", conn)
-        conn.close()
-        return df
+        with self._read_lock:
+            return pd.read_sql_query(
+                "SELECT * FROM interactions ORDER BY timestamp DESC LIMIT ?", self._read_conn, params=(limit,)
+            )
 
-    def get_stats(self):
-        """Calculate aggregate statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*), SUM(total_tokens), SUM(cost), AVG(latency) FROM interactions")
-        total_queries, total_tokens, total_cost, avg_latency = cursor.fetchone()
-        
-        conn.close()
+    @staticmethod
+    def _summarize(queries, prompt_tokens, completion_tokens, total_tokens, cost, latency_sum, latency_max, sketch_bytes) -> Dict:
+        sketch = QuantileSketch.from_bytes(sketch_bytes)
         return {
-            "total_queries": total_queries or 0,
-            "total_tokens": total_tokens or 0,
-            "total_cost": total_cost or 0.0,
-            "avg_latency": avg_latency or 0.0
+            "total_queries": queries,
+            "total_tokens": total_tokens,
+            "total_cost": cost,
+            "avg_latency": latency_sum / queries if queries else 0.0,
+            "p50_latency": sketch.quantile(0.50),
+            "p95_latency": sketch.quantile(0.95),
+            "p99_latency": sketch.quantile(0.99),
+            "max_latency": latency_max,
+            # Generation throughput: completion tokens per second of end-to-end latency
+            "tokens_per_second": completion_tokens / latency_sum if latency_sum else 0.0,
         }
 
+    def get_stats(self):
+        """Aggregate statistics, read from the overall rollup row."""
+        with self._read_lock:
+            row = self._read_conn.execute(
+                """SELECT queries, prompt_tokens, completion_tokens, total_tokens, cost, latency_sum, latency_max, latency_sketch
+                   FROM rollups WHERE granularity = 'all'"""
+            ).fetchone()
+        if row is None:
+            return self._summarize(0, 0, 0, 0, 0.0, 0.0, 0.0, QuantileSketch().to_bytes())
+        return self._summarize(*row)
+
+    def get_rollups(self, granularity: str = "hour", limit: int = 48) -> pd.DataFrame:
+        """Most recent `limit` buckets of a granularity (minute, hour or day), oldest first."""
+        if granularity not in ROLLUP_GRANULARITIES or granularity == "all":
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                """SELECT bucket, queries, prompt_tokens, completion_tokens, total_tokens, cost, latency_sum, latency_max, latency_sketch
+                   FROM rollups WHERE granularity = ? ORDER BY bucket DESC LIMIT ?""",
+                (granularity, limit)
+            ).fetchall()
+        records = []
+        for row in reversed(rows):
+            bucket = row[0] + {"minute": "", "hour": ":00", "day": ""}[granularity]
+            records.append({"timestamp": pd.to_datetime(bucket), **self._summarize(*row[1:])})
+        return pd.DataFrame(records)
+
+    def get_tool_stats(self) -> pd.DataFrame:
+        """Calls, interactions and attributed cost per tool (interaction cost split across its tool calls)."""
+        with self._read_lock:
+            return pd.read_sql_query(
+                """SELECT tool, calls, interactions, cost, cost / calls AS cost_per_call
+                   FROM tool_rollups ORDER BY cost DESC""",
+                self._read_conn
+            )
+
+    def get_traces(self, limit: int = 20) -> pd.DataFrame:
+        """Most recent root spans (one per agent run or other traced operation)."""
+        with self._read_lock:
+            df = pd.read_sql_query(
+                """SELECT trace_id, name, kind, start, duration, status, attributes FROM spans
+                   WHERE parent_id IS NULL ORDER BY start DESC LIMIT ?""",
+                self._read_conn, params=(limit,)
+            )
+        df["start"] = pd.to_datetime(df["start"], unit="s")
+        return df
+
+    def get_trace(self, trace_id: str) -> pd.DataFrame:
+        """
+        Spans of one trace in waterfall order (depth-first by start time), with `depth` and
+        `offset` (seconds from the start of the trace).
+        """
+        with self._read_lock:
+            df = pd.read_sql_query(
+                "SELECT id, parent_id, name, kind, start, duration, status, attributes FROM spans WHERE trace_id = ?",
+                self._read_conn, params=(trace_id,)
+            )
+        if df.empty:
+            return df
+        # Spans whose parent was not recorded (e.g. still running) are shown at the top level
+        ids = set(df["id"])
+        children: Dict = {}
+        for row in df.sort_values("start").itertuples():
+            children.setdefault(row.parent_id if row.parent_id in ids else None, []).append(row.Index)
+        order, depth = [], {}
+        stack = [(i, 0) for i in reversed(children.get(None, []))]
+        while stack:
+            index, level = stack.pop()
+            order.append(index)
+            depth[index] = level
+            stack.extend((child, level + 1) for child in reversed(children.get(df.at[index, "id"], [])))
+        df = df.loc[order]
+        df["depth"] = [depth[i] for i in order]
+        df["offset"] = df["start"] - df["start"].min()
+        df["end"] = df["offset"] + df["duration"]
+        return df.reset_index(drop=True)
+
+    def get_stage_totals(self, traces: int = 100) -> pd.DataFrame:
+        """Total and mean time per span kind and name over the most recent `traces` traces."""
+        with self._read_lock:
+            return pd.read_sql_query(
+                """SELECT kind, name, COUNT(*) AS spans, SUM(duration) AS total_seconds, AVG(duration) AS avg_seconds
+                   FROM spans WHERE trace_id IN (
+                       SELECT trace_id FROM spans WHERE parent_id IS NULL ORDER BY start DESC LIMIT ?
+                   ) AND parent_id IS NOT NULL
+                   GROUP BY kind, name ORDER BY total_seconds DESC""",
+                self._read_conn, params=(traces,)
+            )
+
     def clear_logs(self):
-        """Delete all interaction records from the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM interactions")
-        conn.commit()
-        conn.close()
+        """Delete all interaction records (and their rollups and spans) from the database."""
+        # Rows still queued would otherwise be written after the delete
+        if not self.flush(timeout=self.CLEAR_FLUSH_TIMEOUT):
+            print("   [WARNING] Log writer did not flush in time; entries queued now may survive the clear.")
+        with self._read_lock:
+            self._read_conn.execute("DELETE FROM interactions")
+            self._read_conn.execute("DELETE FROM spans")
+            self._read_conn.execute("DELETE FROM rollups")
+            self._read_conn.execute("DELETE FROM tool_rollups")
+            self._read_conn.commit()
@@ -0,0 +1,112 @@
+"""Semantic answer cache: final agent answers keyed by query embedding, authority and collection version"""
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.utils.config import Config
+
+
+class AnswerCache:
+    """
+    Stores final agent answers in SQLite with the embedding of the question that produced them.
+
+    A cached answer is reused for a new question when:
+      - the collection version is unchanged (nothing indexed or cleared since),
+      - it was produced with a `min_authority` at least as strict as the one requested
+        (every source it could cite still qualifies),
+      - it is younger than `ttl_hours` (web search results go stale), and
+      - the cosine similarity of the two questions is at least `threshold`.
+    """
+
+    def __init__(self, db_path: str = None, threshold: float = None, ttl_hours: float = None):
+        self.db_path = db_path or str(Config.ANSWER_CACHE_PATH)
+        self.threshold = Config.ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl_hours = Config.ANSWER_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+        self._initialize_db()
+
+    def _initialize_db(self):
+        """Create the answers table if it doesn't exist."""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                collection_version TEXT NOT NULL,
+                min_authority INTEGER NOT NULL,
+                query TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                tools_used TEXT,
+                hits INTEGER DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_version ON answers (collection_version, min_authority)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, embedding: List[float], min_authority: int, collection_version: str) -> Optional[Dict]:
+        """Return the most similar compatible cached answer above the threshold, or None."""
+        cutoff = time.time() - self.ttl_hours * 3600 if self.ttl_hours else 0
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            """SELECT id, created_at, min_authority, query, embedding, answer, tools_used FROM answers
+               WHERE collection_version = ? AND min_authority >= ? AND created_at >= ?""",
+            (collection_version, min_authority, cutoff)
+        ).fetchall()
+        if not rows:
+            conn.close()
+            return None
+
+        query = self._normalize(embedding)
+        matrix = np.stack([np.frombuffer(row[4], dtype=np.float32) for row in rows])
+        similarities = matrix @ query
+        # Among equally similar answers, prefer one made with exactly the requested authority
+        best = max(range(len(rows)), key=lambda i: (similarities[i], rows[i][2] == min_authority))
+        if similarities[best] < self.threshold:
+            conn.close()
+            return None
+
+        row = rows[best]
+        conn.execute("UPDATE answers SET hits = hits + 1 WHERE id = ?", (row[0],))
+        conn.commit()
+        conn.close()
+        return {
+            "answer": row[5],
+            "query": row[3],
+            "similarity": float(similarities[best]),
+            "min_authority": row[2],
+            "created_at": row[1],
+            "tools_used": row[6].split(",") if row[6] else [],
+        }
+
+    def store(self, query: str, embedding: List[float], min_authority: int, collection_version: str,
+              answer: str, tools: List[str] = None):
+        """Record a final answer; embeddings are stored normalized so lookups are a dot product."""
+        conn = sqlite3.connect(self.db_path)
+        if self.ttl_hours:
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_hours * 3600,))
+        conn.execute(
+            """INSERT INTO answers (created_at, collection_version, min_authority, query, embedding, answer, tools_used)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (time.time(), collection_version, min_authority, query,
+             self._normalize(embedding).tobytes(), answer, ",".join(tools or []))
+        )
+        conn.commit()
+        conn.close()
+
+    def clear(self):
+        """Delete all cached answers."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM answers")
+        conn.commit()
+        conn.close()
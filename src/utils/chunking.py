@@ -0,0 +1,569 @@
+"""Chunking helpers used by the vector store"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CHUNK_BOUNDARY = "[CHUNK_BOUNDARY]"
+DOCUMENT_MARKER = "[DOCUMENT {}]"
+DOCUMENT_MARKER_PATTERN = re.compile(r"\[DOCUMENT (\d+)\]")
+
+# Chunks shorter than this are merged into their predecessor
+MIN_CHUNK_CHARS = 100
+
+# Chunks are (start, end) character offsets into the document text
+Span = Tuple[int, int]
+
+
+def _snap_back(text: str, lo: int, hi: int) -> int:
+    """Return the best break position in text[lo:hi], preferring paragraphs, then sentences, then words."""
+    for sep in ("\n\n", ". ", "\n", " "):
+        pos = text.rfind(sep, lo, hi)
+        if pos != -1:
+            return pos + len(sep)
+    return hi
+
+
+def split_windows(text: str, window_size: int, overlap: int) -> List[Span]:
+    """
+    Split text into overlapping (start, end) windows of at most window_size characters.
+
+    Window ends are snapped back to a paragraph/sentence/word break so that no
+    window cuts a word in half.
+    """
+    if len(text) <= window_size:
+        return [(0, len(text))]
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window_size, len(text))
+        if end < len(text):
+            end = _snap_back(text, start + window_size // 2, end)
+        windows.append((start, end))
+        if end >= len(text):
+            break
+        next_start = max(end - overlap, start + 1)
+        # Start the next window on a word boundary inside the overlap
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return windows
+
+
+def locate_boundaries(text: str, pieces: Sequence[str]) -> List[int]:
+    """
+    Map chunks returned by the LLM back to offsets in the original text.
+
+    Only the start of every chunk after the first is needed. Chunks that cannot be
+    found (e.g. the model paraphrased them) are skipped.
+    """
+    boundaries = []
+    cursor = 0
+    for piece in pieces[1:]:
+        prefix = piece[:50]
+        pos = text.find(prefix, cursor)
+        if pos == -1:
+            # Retry tolerating whitespace differences on the first few words
+            words = piece.split()[:6]
+            if not words:
+                continue
+            match = re.compile(r"\s+".join(re.escape(w) for w in words)).search(text, cursor)
+            if not match:
+                continue
+            pos = match.start()
+        if pos > 0:
+            boundaries.append(pos)
+        cursor = pos + 1
+    return boundaries
+
+
+def stitch_boundaries(windows: Sequence[Span], window_boundaries: Sequence[Sequence[int]]) -> List[int]:
+    """
+    Merge per-window boundaries (relative offsets) into global document boundaries.
+
+    Every window owns the region between the midpoints of its overlaps with its
+    neighbours; boundaries proposed outside that region are dropped in favour of
+    the neighbouring window, which saw that text with more context.
+    """
+    merged = set()
+    for i, ((start, end), boundaries) in enumerate(zip(windows, window_boundaries)):
+        lo = start if i == 0 else (start + windows[i - 1][1]) // 2
+        hi = end if i == len(windows) - 1 else (windows[i + 1][0] + end) // 2
+        for b in boundaries:
+            pos = start + b
+            if lo <= pos < hi:
+                merged.add(pos)
+    return sorted(merged)
+
+
+def _strip_span(text: str, start: int, end: int) -> Span:
+    """Shrink a span so that it does not start or end with whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def spans_from_boundaries(text: str, boundaries: Sequence[int], min_chars: int = MIN_CHUNK_CHARS) -> List[Span]:
+    """Cut text at the given offsets into (start, end) spans, trimming whitespace and merging tiny chunks."""
+    cuts = [0] + [b for b in boundaries if 0 < b < len(text)] + [len(text)]
+    spans = []
+    for start, end in zip(cuts, cuts[1:]):
+        start, end = _strip_span(text, start, end)
+        if start == end:
+            continue
+        if end - start < min_chars and spans:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def sliding_window_spans(text: str, chunk_size: int, overlap: int, min_chars: int = MIN_CHUNK_CHARS) -> List[Span]:
+    """Fixed-size character windows with overlap; a tiny final window is merged into its predecessor."""
+    spans = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        # Don't create tiny final chunks
+        if end - start < min_chars and spans:
+            spans[-1] = (spans[-1][0], end)
+            break
+        spans.append((start, end))
+        if end == len(text):
+            break
+        start = end - overlap
+    return spans
+
+
+class ChunkCache:
+    """
+    Persistent cache of LLM chunk boundaries keyed by (model, text hash).
+
+    Uses a small SQLite database so that re-ingesting unchanged documents makes no
+    LLM calls. Pass path=None for a process-local cache.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunk_boundaries (
+                model TEXT,
+                text_hash TEXT,
+                boundaries TEXT,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text_hash: str) -> Optional[List[int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT boundaries FROM chunk_boundaries WHERE model = ? AND text_hash = ?",
+                (model, text_hash)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, model: str, text_hash: str, boundaries: List[int]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunk_boundaries (model, text_hash, boundaries) VALUES (?, ?, ?)",
+                (model, text_hash, json.dumps(boundaries))
+            )
+            self._conn.commit()
+
+
+class LLMChunker:
+    """
+    Splits documents into semantic chunks with a chat-completion model.
+
+    Long texts are cut into overlapping windows that fit the model context, the
+    windows are sent concurrently with a bounded number of in-flight requests and
+    the resulting boundaries are stitched back together. Small texts are packed
+    into shared requests with per-document markers.
+    """
+
+    SYSTEM_PROMPT = "You are a document processing assistant that splits text into logical chunks."
+
+    def __init__(self, client, model: str, chunk_size: int, window_size: int,
+                 window_overlap: int, max_concurrency: int, cache: Optional[ChunkCache] = None):
+        self.client = client
+        self.model = model
+        self.chunk_size = chunk_size
+        self.window_size = window_size
+        self.window_overlap = window_overlap
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+
+    def _prompt(self, text: str) -> str:
+        return f"""
+        Analyze the following text and split it into logically coherent sections or paragraphs.
+        Each section should focus on a specific sub-topic or theme.
+
+        Guidelines:
+        1. Preserve the original text exactly.
+        2. Aim for chunks of approximately {self.chunk_size} characters where possible.
+        3. Return the chunks separated by a unique delimiter: {CHUNK_BOUNDARY}
+
+        Text to split:
+        ---
+        {text}
+        ---
+        """
+
+    def _request_boundaries(self, text: str) -> Optional[List[int]]:
+        """Ask the LLM to split a single window. Returns relative boundaries or None on failure."""
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
+                    {"role": "user", "content": self._prompt(text)}
+                ],
+                temperature=0.1  # Low temperature for consistency
+            )
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            print(f"   [WARNING] AI Chunking request failed: {e}")
+            return None
+
+        pieces = [c.strip() for c in content.split(CHUNK_BOUNDARY) if c.strip()]
+        return locate_boundaries(text, pieces)
+
+    def _packed_prompt(self, texts: Sequence[str]) -> str:
+        documents = "\n\n".join(f"{DOCUMENT_MARKER.format(i)}\n{text}" for i, text in enumerate(texts))
+        return f"""
+        Below are {len(texts)} independent documents, each introduced by a marker like {DOCUMENT_MARKER.format(0)}.
+        Split every document separately into logically coherent sections or paragraphs.
+        Each section should focus on a specific sub-topic or theme.
+
+        Guidelines:
+        1. Preserve the original text exactly.
+        2. Aim for chunks of approximately {self.chunk_size} characters where possible.
+        3. Repeat each document marker exactly once, before that document's chunks.
+        4. Separate the chunks of a document with a unique delimiter: {CHUNK_BOUNDARY}
+        5. Never merge text from different documents into one chunk.
+
+        Documents to split:
+        ---
+        {documents}
+        ---
+        """
+
+    def _request_packed_boundaries(self, texts: Sequence[str]) -> List[Optional[List[int]]]:
+        """
+        Split several small texts with a single LLM request and demultiplex the answer.
+
+        Returns relative boundaries per text, or None for texts missing from the response.
+        """
+        if len(texts) == 1:
+            return [self._request_boundaries(texts[0])]
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.SYSTEM_PROMPT},
+                    {"role": "user", "content": self._packed_prompt(texts)}
+                ],
+                temperature=0.1
+            )
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            print(f"   [WARNING] AI Chunking request failed: {e}")
+            return [None] * len(texts)
+
+        # re.split with a capture group yields [preamble, idx, body, idx, body, ...]
+        parts = DOCUMENT_MARKER_PATTERN.split(content)
+        results: List[Optional[List[int]]] = [None] * len(texts)
+        for idx, body in zip(parts[1::2], parts[2::2]):
+            i = int(idx)
+            if i < len(texts) and results[i] is None:
+                pieces = [c.strip() for c in body.split(CHUNK_BOUNDARY) if c.strip()]
+                results[i] = locate_boundaries(texts[i], pieces)
+        return results
+
+    def _pack(self, texts: Dict[str, str]) -> List[List[str]]:
+        """Group cache keys so that each group's texts fit together in one window."""
+        groups, current, size = [], [], 0
+        for key, text in sorted(texts.items(), key=lambda item: len(item[1])):
+            if current and size + len(text) > self.window_size:
+                groups.append(current)
+                current, size = [], 0
+            current.append(key)
+            size += len(text)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _cache_key(self, text: str) -> str:
+        # The target chunk size changes the answer, so it is part of the key
+        return ChunkCache.text_hash(f"{self.chunk_size}\0{text}")
+
+    def chunk_documents(self, texts: Sequence[str], fallback: Callable[[str], List[Span]]) -> List[List[Span]]:
+        """
+        Chunk several documents at once, sharing one bounded pool of LLM requests.
+
+        Documents no longer than one chunk skip the LLM entirely, and small texts are
+        packed together into shared requests. Documents whose windows cannot all be
+        chunked fall back to `fallback`.
+        """
+        # Short documents need no splitting: they get no windows and never reach the LLM
+        doc_windows = [
+            split_windows(text, self.window_size, self.window_overlap) if len(text) > self.chunk_size else []
+            for text in texts
+        ]
+
+        # Resolve every window from the cache or schedule a request, deduplicating identical windows
+        resolved: Dict[str, Optional[List[int]]] = {}
+        pending: Dict[str, str] = {}
+        for text, windows in zip(texts, doc_windows):
+            for start, end in windows:
+                window_text = text[start:end]
+                key = self._cache_key(window_text)
+                if key in resolved or key in pending:
+                    continue
+                cached = self.cache.get(self.model, key) if self.cache else None
+                if cached is not None:
+                    resolved[key] = cached
+                else:
+                    pending[key] = window_text
+
+        if pending:
+            groups = self._pack(pending)
+            print(f"   [AI] Chunking {len(pending)} windows in {len(groups)} requests "
+                  f"({len(resolved)} cached, {self.max_concurrency} concurrent)...")
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                futures = [(group, pool.submit(self._request_packed_boundaries, [pending[k] for k in group]))
+                           for group in groups]
+                for group, future in futures:
+                    for key, boundaries in zip(group, future.result()):
+                        resolved[key] = boundaries
+                        if boundaries is not None and self.cache:
+                            self.cache.set(self.model, key, boundaries)
+
+        results = []
+        for text, windows in zip(texts, doc_windows):
+            if not windows:
+                span = _strip_span(text, 0, len(text))
+                results.append([span] if span[0] < span[1] else [])
+                continue
+            window_boundaries = [resolved[self._cache_key(text[s:e])] for s, e in windows]
+            if any(b is None for b in window_boundaries):
+                print("   [WARNING] AI Chunking failed. Falling back to sliding window.")
+                results.append(fallback(text))
+                continue
+
+            chunks = spans_from_boundaries(text, stitch_boundaries(windows, window_boundaries))
+            if len(chunks) > 1 or len(text) <= self.chunk_size:
+                results.append(chunks)
+            else:
+                # A single chunk for a long text means the model did not split anything
+                results.append(fallback(text))
+        return results
+
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_sentences(text: str, max_chars: Optional[int] = None) -> List[Span]:
+    """
+    Split text into (start, end) sentence spans.
+
+    Sentences end at terminal punctuation followed by whitespace or at blank lines.
+    Sentences longer than max_chars are cut into max_chars pieces.
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if text[start:match.start()].strip():
+            spans.append((start, match.start()))
+        start = match.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+
+    if max_chars:
+        spans = [(s, min(s + max_chars, end)) for begin, end in spans for s in range(begin, end, max_chars)]
+    return spans
+
+
+class SemanticChunker:
+    """
+    Splits documents where the topic shifts, using a local sentence-embedding model.
+
+    Every sentence is embedded (in batches, across all documents at once) and a
+    boundary is placed where the cosine similarity between neighbouring sentences
+    falls below a per-document percentile, subject to min/max chunk sizes.
+    """
+
+    def __init__(self, model, min_size: int, max_size: int, breakpoint_percentile: float, batch_size: int = 64):
+        self.model = model
+        self.min_size = min_size
+        self.max_size = max_size
+        self.breakpoint_percentile = breakpoint_percentile
+        self.batch_size = batch_size
+
+    def _breaks(self, embeddings) -> "np.ndarray":
+        """Boolean mask: True at i when a boundary is proposed between sentence i and i + 1."""
+        import numpy as np
+
+        if len(embeddings) < 2:
+            return np.zeros(0, dtype=bool)
+        # Embeddings are normalized, so the row-wise dot product is the cosine similarity
+        similarities = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        threshold = np.percentile(similarities, self.breakpoint_percentile)
+        return similarities < threshold
+
+    def _group(self, text: str, spans: List[Span], breaks) -> List[Span]:
+        chunks = []
+        chunk_start = spans[0][0]
+        for i, (_, end) in enumerate(spans):
+            size = end - chunk_start
+            is_last = i == len(spans) - 1
+            next_size = spans[i + 1][1] - chunk_start if not is_last else 0
+            if is_last or (breaks[i] and size >= self.min_size) or next_size > self.max_size:
+                chunks.append(_strip_span(text, chunk_start, end))
+                if not is_last:
+                    chunk_start = spans[i + 1][0]
+        return chunks
+
+    def chunk_documents(self, texts: Sequence[str]) -> List[List[Span]]:
+        import numpy as np
+
+        doc_spans = [split_sentences(text, max_chars=self.max_size) for text in texts]
+        sentences = [text[s:e] for text, spans in zip(texts, doc_spans) for s, e in spans]
+        if not sentences:
+            return [[] for _ in texts]
+
+        embeddings = np.asarray(self.model.encode(
+            sentences,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            show_progress_bar=len(sentences) > 1000
+        ), dtype=np.float32)
+
+        results = []
+        offset = 0
+        for text, spans in zip(texts, doc_spans):
+            if not spans:
+                results.append([])
+                continue
+            doc_embeddings = embeddings[offset:offset + len(spans)]
+            offset += len(spans)
+            results.append(self._group(text, spans, self._breaks(doc_embeddings)))
+        return results
+
+
+def split_paragraphs(text: str) -> List[Span]:
+    """Split text into (start, end) paragraph spans separated by blank lines."""
+    spans = []
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        if text[start:match.start()].strip():
+            spans.append((start, match.start()))
+        start = match.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+
+def tokenizer_offsets(tokenizer) -> Callable[[str], List[int]]:
+    """
+    Build a function returning the end offset of every token of a text.
+
+    Supports Hugging Face fast tokenizers (offset mapping) and tiktoken encodings.
+    Without a usable tokenizer, words and punctuation approximate tokens.
+    """
+    def approximate(text: str) -> List[int]:
+        return [m.end() for m in re.finditer(r"\w+|[^\w\s]", text)]
+
+    if tokenizer is None:
+        return approximate
+
+    def token_ends(text: str) -> List[int]:
+        try:
+            if hasattr(tokenizer, "decode_with_offsets"):
+                # tiktoken: offsets are token starts
+                starts = tokenizer.decode_with_offsets(tokenizer.encode(text))[1]
+                ends = starts[1:] + [len(text)] if starts else []
+            else:
+                encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+                ends = [end for start, end in encoding["offset_mapping"] if end > start]
+            if ends or not text.strip():
+                return list(ends)
+        except Exception:
+            pass
+        return approximate(text)
+
+    return token_ends
+
+
+class TokenChunker:
+    """
+    Packs paragraphs (or sentences, for long paragraphs) into chunks bounded by the
+    embedding model's tokenizer, returning (start, end) spans instead of strings.
+
+    A chunk never exceeds max_tokens, so no text is silently truncated by the model.
+    Consecutive chunks share up to overlap_tokens worth of whole trailing sentences.
+    """
+
+    def __init__(self, token_ends: Callable[[str], List[int]], max_tokens: int, overlap_tokens: int = 0):
+        self.token_ends = token_ends
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, overlap_tokens)
+
+    def _units(self, text: str, ends: List[int]) -> List[Span]:
+        """Paragraphs that fit the budget, otherwise their sentences, otherwise hard token cuts."""
+        def count(start, end):
+            return bisect_right(ends, end) - bisect_right(ends, start)
+
+        units = []
+        for p_start, p_end in split_paragraphs(text):
+            if count(p_start, p_end) <= self.max_tokens:
+                units.append((p_start, p_end))
+                continue
+            for s_start, s_end in split_sentences(text[p_start:p_end]):
+                start, end = p_start + s_start, p_start + s_end
+                while count(start, end) > self.max_tokens:
+                    cut = ends[bisect_right(ends, start) + self.max_tokens - 1]
+                    units.append((start, cut))
+                    start = cut
+                if text[start:end].strip():
+                    units.append(_strip_span(text, start, end))
+        return units
+
+    def spans(self, text: str) -> List[Span]:
+        ends = self.token_ends(text)
+
+        def count(start, end):
+            return bisect_right(ends, end) - bisect_right(ends, start)
+
+        spans = []
+        current: List[Span] = []
+        for unit in self._units(text, ends):
+            if current and count(current[0][0], unit[1]) > self.max_tokens:
+                spans.append((current[0][0], current[-1][1]))
+                # Carry whole trailing units as overlap, never the entire previous chunk
+                carry: List[Span] = []
+                for prev in reversed(current[1:]):
+                    if count(prev[0], current[-1][1]) > self.overlap_tokens:
+                        break
+                    carry.insert(0, prev)
+                while carry and count(carry[0][0], unit[1]) > self.max_tokens:
+                    carry.pop(0)
+                current = carry
+            current.append(unit)
+        if current:
+            spans.append((current[0][0], current[-1][1]))
+        return spans
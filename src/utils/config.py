@@ -1,11 +1,26 @@
 """Configuration management for the AI Research Assistant"""
+import functools
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 
 # Load environment variables
 load_dotenv()
 
+@functools.lru_cache(maxsize=1)
+def _streamlit_secrets() -> dict:
+    """Read Streamlit secrets once, and only when already running under Streamlit."""
+    # Importing streamlit just to look for secrets would slow down every script (e.g. reindex.py)
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return {}
+    try:
+        # st.secrets behaves like a nested dict
+        return dict(st.secrets)
+    except Exception:
+        return {}
+
 def get_config(key, default=None):
     """Get config from environment or streamlit secrets"""
     # 1. Check OS Environment (Local/Docker)
@@ -14,15 +29,7 @@ def get_config(key, default=None):
         return val
     
     # 2. Check Streamlit Secrets (Cloud)
-    try:
-        import streamlit as st
-        # st.secrets behaves like a nested dict
-        if key in st.secrets:
-            return st.secrets[key]
-    except Exception:
-        pass
-        
-    return default
+    return _streamlit_secrets().get(key, default)
 
 class Config:
     """Application configuration"""
@@ -36,7 +43,6 @@ class Config:
 
     # LLM Provider (groq or openai)
     LLM_PROVIDER = get_config("LLM_PROVIDER", "groq")
-    print(f"LLM_PROVIDER: {LLM_PROVIDER}")
     
     # Groq Settings
     GROQ_MODEL = "llama-3.3-70b-versatile"  # Fast and capable
@@ -44,23 +50,47 @@ class Config:
     # Alternative models: "mixtral-8x7b-32768", "llama-3.1-8b-instant"
 
     # Embedding Settings
-    # Options: "local" (free), "openai" (premium)
+    # Options: "local" (free), "local_int8" (free, int8-quantized local model for CPU-only hosts), "openai" (premium)
+    # local_int8 produces vectors of the same size as local, so collections can be shared between them
     # If using openai, make sure to set OPENAI_API_KEY in .env file as well as EMBEDDING_PROVIDER = "openai"
     EMBEDDING_PROVIDER = get_config("EMBEDDING_PROVIDER", "local")
-    print(f"EMBEDDING_PROVIDER: {EMBEDDING_PROVIDER}")
   
     
     OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+    # OpenAI embedding requests: inputs are split into requests of at most this many tokens
+    # (API limit 300k), sent up to OPENAI_EMBEDDING_CONCURRENCY at a time, and 429/5xx
+    # responses are retried up to OPENAI_EMBEDDING_MAX_RETRIES times with backoff
+    OPENAI_EMBEDDING_REQUEST_TOKENS = int(get_config("OPENAI_EMBEDDING_REQUEST_TOKENS", 250000))
+    OPENAI_EMBEDDING_CONCURRENCY = int(get_config("OPENAI_EMBEDDING_CONCURRENCY", 4))
+    OPENAI_EMBEDDING_MAX_RETRIES = int(get_config("OPENAI_EMBEDDING_MAX_RETRIES", 5))
     LOCAL_EMBEDDING_MODEL = "multi-qa-distilbert-cos-v1"
     
     # Active model selection
     EMBEDDING_MODEL = OPENAI_EMBEDDING_MODEL if EMBEDDING_PROVIDER == "openai" else LOCAL_EMBEDDING_MODEL
-    print(f"EMBEDDING_MODEL: {EMBEDDING_MODEL}")
     
     # Vector size must match the model
     # all-MiniLM-L6-v2: 384, text-embedding-3-small: 1536
     VECTOR_SIZE = 1536 if EMBEDDING_PROVIDER == "openai" else 768
-    print(f"VECTOR_SIZE: {VECTOR_SIZE}")
+
+    # Vector database backend: "qdrant" (in-memory, ./qdrant_data or QDRANT_URL) or "embedded"
+    # (NumPy matrix memory-mapped from EMBEDDED_VECTOR_PATH, with an HNSW graph from
+    # EMBEDDED_HNSW_MIN_POINTS points when hnswlib is installed). QDRANT_URL always uses the server.
+    VECTOR_BACKEND = get_config("VECTOR_BACKEND", "qdrant")
+    EMBEDDED_VECTOR_PATH = get_config("EMBEDDED_VECTOR_PATH", "./vector_data")
+    EMBEDDED_HNSW_MIN_POINTS = int(get_config("EMBEDDED_HNSW_MIN_POINTS", 20000))
+
+    # Optional dimensionality reduction of stored vectors (0 keeps the full VECTOR_SIZE).
+    # The projection ("pca" or "random") is fitted on a sample of the first documents indexed
+    # into a collection and stored with it; use src/evaluation/projection_report.py to pick a size.
+    REDUCED_VECTOR_SIZE = int(get_config("REDUCED_VECTOR_SIZE", 0))
+    REDUCTION_METHOD = get_config("REDUCTION_METHOD", "pca")
+    REDUCTION_FIT_SAMPLE = int(get_config("REDUCTION_FIT_SAMPLE", 5000))
+
+    # Query embeddings from concurrent searches are micro-batched into one encode call.
+    # A batch is flushed after EMBEDDING_BATCH_MAX_WAIT_MS or at EMBEDDING_BATCH_MAX_SIZE
+    # requests; a wait of 0 still batches whatever queued up during the previous encode.
+    EMBEDDING_BATCH_MAX_SIZE = int(get_config("EMBEDDING_BATCH_MAX_SIZE", 32))
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(get_config("EMBEDDING_BATCH_MAX_WAIT_MS", 2))
 
 
     
@@ -71,26 +101,71 @@ class Config:
     # RAG Settings
     CHUNK_SIZE = 800
     CHUNK_OVERLAP = 200
+    # Token-aware chunking sizes, capped by the embedding model's max sequence length
+    CHUNK_MAX_TOKENS = 200
+    CHUNK_OVERLAP_TOKENS = 50
+    OPENAI_EMBEDDING_MAX_TOKENS = 8191
     TOP_K_RESULTS = 5
+    # Small-to-big retrieval: add N neighbouring chunks on each side of every hit (0 disables).
+    # When enabled, chunks are indexed without overlap.
+    NEIGHBOR_EXPANSION = int(get_config("NEIGHBOR_EXPANSION", 0))
     # if USE_INTELLIGENT_CHUNKING is True, make sure to set CHUNKING_LLM_MODEL in .env file as well
     USE_INTELLIGENT_CHUNKING = str(get_config("USE_INTELLIGENT_CHUNKING", "False")).lower() == "true"
 
 
-    print(f"USE_INTELLIGENT_CHUNKING: {USE_INTELLIGENT_CHUNKING}")
+
+    # Intelligent chunking: long texts are split into overlapping windows (in characters)
+    # that fit the chunking model context and are sent concurrently
+    CHUNKING_WINDOW_SIZE = int(get_config("CHUNKING_WINDOW_SIZE", 6000))
+    CHUNKING_WINDOW_OVERLAP = int(get_config("CHUNKING_WINDOW_OVERLAP", 800))
+    CHUNKING_MAX_CONCURRENCY = int(get_config("CHUNKING_MAX_CONCURRENCY", 4))
+
+    # Chunking strategy: "token" (tokenizer-bounded, sentence-aligned), "sliding" (character window),
+    # "llm" (Groq) or "semantic" (local embeddings)
+    CHUNKING_MODE = str(get_config("CHUNKING_MODE", "llm" if USE_INTELLIGENT_CHUNKING else "token")).lower()
+
+    # Semantic chunking: split where neighbouring sentence similarity drops below this percentile
+    SEMANTIC_CHUNK_MIN_SIZE = 200
+    SEMANTIC_CHUNK_MAX_SIZE = 1200
+    SEMANTIC_BREAKPOINT_PERCENTILE = 20
     
     COLLECTION_NAME = "research_documents"
+    # Metadata copied into every chunk payload (for filtering); everything else stays in the document table
+    FILTERABLE_METADATA_FIELDS = ("source_type", "source_authority", "topic")
     
     # Paths
     PROJECT_ROOT = Path(__file__).parent.parent.parent
     DATA_DIR = PROJECT_ROOT / "data"
     LOGS_DIR = PROJECT_ROOT / "logs"
+    CACHE_DIR = PROJECT_ROOT / "cache"
+    CHUNK_CACHE_PATH = CACHE_DIR / "chunk_cache.db"
+    INGESTION_JOBS_DB = CACHE_DIR / "ingestion_jobs.db"
+    ANSWER_CACHE_PATH = CACHE_DIR / "answer_cache.db"
+    # Embeddings by (model, text hash), reused across retrieval evaluation runs
+    EMBEDDING_CACHE_PATH = CACHE_DIR / "embedding_cache.db"
+    # Reuse a final answer for a question whose embedding has at least this cosine similarity
+    # to one already answered (same collection version, authority at least as strict)
+    ANSWER_CACHE_ENABLED = str(get_config("ANSWER_CACHE_ENABLED", "True")).lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(get_config("ANSWER_CACHE_THRESHOLD", 0.92))
+    ANSWER_CACHE_TTL_HOURS = float(get_config("ANSWER_CACHE_TTL_HOURS", 24))
+    # Documents indexed per add_documents call in a background ingestion job
+    # (smaller batches report progress and react to cancellation sooner)
+    INGESTION_JOB_BATCH_DOCS = int(get_config("INGESTION_JOB_BATCH_DOCS", 20))
+    # Evaluation (run_benchmark / data_generator): samples processed at once, and LLM calls
+    # started per minute across them (0 = unlimited; Groq's free tier allows about 30)
+    EVAL_CONCURRENCY = int(get_config("EVAL_CONCURRENCY", 4))
+    EVAL_REQUESTS_PER_MINUTE = float(get_config("EVAL_REQUESTS_PER_MINUTE", 0))
 
     # Qdrant Settings
     QDRANT_TIMEOUT = 60
     
+    _validated = False
+
     @classmethod
     def validate(cls):
-        """Validate required configuration"""
+        """Validate required configuration (only does the work once per process)"""
+        if cls._validated:
+            return
         if cls.LLM_PROVIDER == "groq" and not cls.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         elif cls.LLM_PROVIDER == "openai" and not cls.OPENAI_API_KEY:
@@ -99,6 +174,8 @@ class Config:
         # Create necessary directories
         cls.DATA_DIR.mkdir(exist_ok=True)
         cls.LOGS_DIR.mkdir(exist_ok=True)
+        cls.CACHE_DIR.mkdir(exist_ok=True)
+        cls._validated = True
 
 
 # Validate on import
@@ -64,6 +64,26 @@ class DocumentLoader:
                 file_context.close()
         
         return documents
+
+    @staticmethod
+    def load_file(file_path) -> List[Document]:
+        """Load a local PDF, or any other file as UTF-8 text (Markdown, plain text)"""
+        path = Path(file_path)
+        if path.suffix.lower() == ".pdf":
+            return DocumentLoader.load_pdf(path)
+
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        if not text.strip():
+            return []
+        return [Document(
+            content=text,
+            metadata={
+                "source_type": "text",
+                "source_path": str(path),
+                "filename": path.name,
+                "source_authority": 7
+            }
+        )]
     
     @staticmethod
     def load_web_page(url: str) -> Document:
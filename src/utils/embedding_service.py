@@ -0,0 +1,171 @@
+"""Dynamic micro-batching for concurrent embedding requests, and a persistent embedding cache"""
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+EncodeFn = Callable[[List[str]], List[List[float]]]
+
+
+class MicroBatcher:
+    """
+    Queues single-text embedding requests from many threads and encodes them together.
+
+    A worker thread takes the first waiting request, then keeps collecting until
+    `max_batch_size` requests are queued or `max_wait_ms` has passed, and encodes
+    the whole batch with one call. Each caller gets its own Future. Under load,
+    requests that arrive while a batch is being encoded form the next batch, so
+    throughput grows with concurrency instead of every caller competing for the CPU.
+    """
+
+    def __init__(self, encode: EncodeFn, max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._closed = False
+        # Orders submit against close, so nothing is queued behind the stop sentinel
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text and return a Future for its embedding."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text, blocking until its batch has been encoded."""
+        return self.submit(text).result()
+
+    def close(self):
+        """Stop the worker after it has flushed the requests already queued."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+
+            # Callers may have cancelled while waiting
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.encode([text for text, _ in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(f"Encoder returned {len(vectors)} embeddings for {len(batch)} texts")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+        # Whatever is still queued will never be encoded; fail it rather than leave callers waiting
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("MicroBatcher is closed"))
+
+
+class EmbeddingCache:
+    """
+    Persistent embeddings keyed by (model, text hash), in SQLite.
+
+    Used where the same texts are embedded over and over (e.g. evaluation sweeps that
+    re-chunk one corpus many ways), so only texts never seen by a model are encoded.
+    Pass path=None for a process-local cache.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT,
+                text_hash TEXT,
+                vector BLOB,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _get_many(self, model: str, hashes: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's limit on bound parameters
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                    (model, *part)
+                ).fetchall()
+                found.update((h, np.frombuffer(v, dtype=np.float32)) for h, v in rows)
+        return found
+
+    def embed(self, model: str, texts: List[str], encode: EncodeFn, batch_size: int = 256) -> np.ndarray:
+        """Embeddings of `texts` (float32, one row per text), encoding only those not cached for `model`."""
+        hashes = [self.text_hash(t) for t in texts]
+        vectors = self._get_many(model, list(set(hashes)))
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors:
+                missing.setdefault(h, text)
+        missing_items = list(missing.items())
+        for i in range(0, len(missing_items), batch_size):
+            batch = missing_items[i:i + batch_size]
+            encoded = np.asarray(encode([text for _, text in batch]), dtype=np.float32)
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                    [(model, h, vector.tobytes()) for (h, _), vector in zip(batch, encoded)]
+                )
+                self._conn.commit()
+            vectors.update((h, vector) for (h, _), vector in zip(batch, encoded))
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[h] for h in hashes])
@@ -0,0 +1,248 @@
+"""Background ingestion jobs: a persistent SQLite job table and a worker thread that indexes sources"""
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.config import Config
+from src.utils.document_loader import Document, DocumentLoader
+from src.utils.vector_store import IngestionCancelled
+
+STAGES = ("fetched", "chunked", "embedded", "upserted")
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def save_upload(name: str, data: bytes, upload_dir: Path = None) -> str:
+    """
+    Persist an uploaded file so a job can read it after the page reruns (or the process restarts).
+    Files are named by content hash, so uploading the same file twice stores it once.
+    """
+    upload_dir = Path(upload_dir or Config.CACHE_DIR / "uploads")
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    path = upload_dir / f"{hashlib.sha256(data).hexdigest()[:16]}_{Path(name).name}"
+    if not path.exists():
+        path.write_bytes(data)
+    return str(path)
+
+
+def load_source(loader: DocumentLoader, source: Dict) -> List[Document]:
+    """Load the documents of one job source: {"type": "pdf", "path", "name"} or {"type": "url", "url"}."""
+    if source["type"] == "pdf":
+        docs = loader.load_pdf(source["path"])
+        # Keep the original file name rather than the upload cache path
+        for doc in docs:
+            doc.metadata["source_path"] = source.get("name", source["path"])
+        return docs
+
+    url = source["url"]
+    gh_info = loader.parse_github_url(url)
+    if gh_info:
+        return loader.load_github_repo(gh_info['owner'], gh_info['repo'])
+    if "youtube.com" in url or "youtu.be" in url:
+        return [loader.load_youtube_transcript(url)]
+    return [loader.load_web_page(url)]
+
+
+def describe_source(source: Dict) -> str:
+    return (source.get("name") or source["path"]) if source["type"] == "pdf" else source["url"]
+
+
+class IngestionJobs:
+    """
+    Runs ingestion jobs on a background thread and records their progress in SQLite.
+
+    Each job indexes a list of sources. Per-stage counters (documents fetched, chunks
+    chunked, embedded and upserted) are updated as the job advances, so any session
+    can poll them with `get`/`list`. Jobs that were queued or running when the process
+    stopped are resumed on start-up; documents already indexed are skipped.
+    """
+
+    def __init__(self, vector_store, db_path: str = None, batch_docs: int = None, loader: DocumentLoader = None):
+        self.vector_store = vector_store
+        self.db_path = db_path or str(Config.INGESTION_JOBS_DB)
+        self.batch_docs = max(1, batch_docs or Config.INGESTION_JOB_BATCH_DOCS)
+        self.loader = loader or DocumentLoader()
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._initialize_db()
+        self._requeue_interrupted()
+        self._worker = threading.Thread(target=self._run, name="ingestion-worker", daemon=True)
+        self._worker.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _initialize_db(self):
+        """Create the jobs table if it doesn't exist."""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                status TEXT NOT NULL DEFAULT 'queued',
+                stage TEXT,
+                sources TEXT NOT NULL,
+                fetched INTEGER DEFAULT 0,
+                chunked INTEGER DEFAULT 0,
+                embedded INTEGER DEFAULT 0,
+                upserted INTEGER DEFAULT 0,
+                skipped INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                cancel_requested INTEGER DEFAULT 0,
+                error TEXT
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _requeue_interrupted(self):
+        """Queue again every job that had not finished when the previous process stopped."""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY id"
+        ).fetchall()
+        conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        conn.commit()
+        conn.close()
+        for row in rows:
+            print(f"🔁 [Ingestion] Resuming job {row['id']}")
+            self._queue.put(row["id"])
+
+    def _update(self, job_id: int, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        conn.execute(
+            f"UPDATE jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (*fields.values(), job_id)
+        )
+        conn.commit()
+        conn.close()
+
+    def _advance(self, job_id: int, stage: str, count: int):
+        """Add `count` to a stage counter, stopping the job if cancellation was requested."""
+        conn = self._connect()
+        conn.execute(
+            f"UPDATE jobs SET {stage} = {stage} + ?, stage = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (count, stage, job_id)
+        )
+        conn.commit()
+        cancelled = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        conn.close()
+        if cancelled:
+            raise IngestionCancelled(f"Job {job_id} cancelled")
+
+    # --- Public API ---
+
+    def submit(self, sources: List[Dict]) -> int:
+        """Queue a job for the given sources and return its ID."""
+        conn = self._connect()
+        cursor = conn.execute("INSERT INTO jobs (sources) VALUES (?)", (json.dumps(sources),))
+        job_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        self._queue.put(job_id)
+        return job_id
+
+    def cancel(self, job_id: int):
+        """Request cancellation; a queued job is cancelled at once, a running one at its next batch."""
+        conn = self._connect()
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,))
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'queued'",
+            (job_id,)
+        )
+        conn.commit()
+        conn.close()
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        conn.close()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 20) -> List[Dict]:
+        """Most recent jobs first."""
+        conn = self._connect()
+        rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        conn.close()
+        return [self._to_dict(row) for row in rows]
+
+    def wait(self, job_id: int, timeout: float = None, poll_interval: float = 0.1) -> Dict:
+        """Block until a job is no longer queued or running (for scripts and tests)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job["status"] not in ACTIVE_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def close(self):
+        """Stop the worker after the current job."""
+        self._queue.put(None)
+        self._worker.join()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["sources"] = json.loads(job["sources"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    # --- Worker ---
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            job = self.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue  # Cancelled while queued
+            try:
+                self._execute(job)
+            except IngestionCancelled:
+                self._update(job_id, status="cancelled")
+                print(f"🛑 [Ingestion] Job {job_id} cancelled")
+            except Exception as e:
+                traceback.print_exc()
+                self._update(job_id, status="failed", error=str(e))
+                print(f"❌ [Ingestion] Job {job_id} failed: {e}")
+
+    def _execute(self, job: Dict):
+        job_id = job["id"]
+        resuming = job["attempts"] > 0
+        # Counters restart with each attempt; a resumed job reports what it skipped instead
+        self._update(job_id, status="running", stage="fetched", attempts=job["attempts"] + 1, error=None,
+                     fetched=0, chunked=0, embedded=0, upserted=0, skipped=0)
+
+        for source in job["sources"]:
+            print(f"📥 [Ingestion] Job {job_id}: loading {describe_source(source)}")
+            docs = load_source(self.loader, source)
+            self._advance(job_id, "fetched", len(docs))
+
+            if resuming and docs:
+                done = self.vector_store.indexed(docs)
+                skipped = sum(done)
+                docs = [doc for doc, is_done in zip(docs, done) if not is_done]
+                if skipped:
+                    self._advance(job_id, "skipped", skipped)
+
+            # Documents are indexed a batch at a time, so progress and cancellation are fine-grained
+            for i in range(0, len(docs), self.batch_docs):
+                self.vector_store.add_documents(
+                    docs[i:i + self.batch_docs],
+                    progress=lambda stage, count: self._advance(job_id, stage, count)
+                )
+
+        self._update(job_id, status="completed", stage=None)
+        print(f"[OK] [Ingestion] Job {job_id} completed")
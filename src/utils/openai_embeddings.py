@@ -0,0 +1,108 @@
+"""OpenAI embeddings: token-bounded request splitting, concurrent requests and retries with backoff"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+# OpenAI limits: at most 2048 inputs and 300,000 tokens summed across inputs per request
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def tiktoken_counter(model: str) -> Callable[[str], int]:
+    """Token counter for an OpenAI model, approximated as 4 characters per token without tiktoken."""
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return lambda text: len(text) // 4 + 1
+
+
+def _retry_delay(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After), if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class OpenAIEmbedder:
+    """
+    Embeds any number of texts with the OpenAI embeddings API.
+
+    Texts are packed, in order, into requests bounded by `max_tokens_per_request` and
+    `max_inputs_per_request`; up to `max_concurrency` requests are in flight at once.
+    429/5xx responses and connection errors are retried with exponential backoff
+    (honouring Retry-After). Output order always matches input order.
+    """
+
+    def __init__(self, client, model: str, max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+                 max_inputs_per_request: int = MAX_INPUTS_PER_REQUEST, max_concurrency: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0, token_counter: Callable[[str], int] = None):
+        self.client = client
+        self.model = model
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = max_inputs_per_request
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.count_tokens = token_counter or tiktoken_counter(model)
+
+    def _split(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into consecutive requests within the token and input limits."""
+        requests, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            # A single oversized text still goes alone; the API reports it rather than us dropping it
+            if current and (current_tokens + tokens > self.max_tokens_per_request
+                            or len(current) >= self.max_inputs_per_request):
+                requests.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            requests.append(current)
+        return requests
+
+    def _create(self, inputs: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(model=self.model, input=inputs, encoding_format="float")
+                # The API returns items with an index; don't rely on their order
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = _retry_delay(e)
+                if delay is None:
+                    delay = min(MAX_BACKOFF_SECONDS, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"   [OpenAI] {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        requests = self._split(texts)
+        if len(requests) == 1:
+            return self._create(texts)
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(requests))) as pool:
+            futures = [(indexes, pool.submit(self._create, [texts[i] for i in indexes])) for indexes in requests]
+            for indexes, future in futures:
+                for i, embedding in zip(indexes, future.result()):
+                    embeddings[i] = embedding
+        return embeddings
@@ -0,0 +1,123 @@
+"""Corpus-fitted dimensionality reduction (PCA or random projection) for stored vectors"""
+import base64
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+PROJECTION_METHODS = ("pca", "random")
+
+
+def _encode_array(array: np.ndarray) -> Dict:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {"shape": list(array.shape), "data": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def _decode_array(encoded: Dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded["data"]), dtype=np.float32).reshape(encoded["shape"])
+
+
+class Projection:
+    """
+    Linear map from full-width embeddings to `dim` dimensions: x @ components.
+
+    PCA keeps the top singular directions of the fitted sample; random
+    projection uses a scaled Gaussian matrix and only needs the input width. Both are
+    applied identically at indexing and query time, and results are L2-normalized
+    so cosine scores stay comparable.
+    """
+
+    def __init__(self, method: str, components: np.ndarray):
+        self.method = method
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def input_dim(self) -> int:
+        return self.components.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, vectors: Sequence[Sequence[float]], dim: int, method: str = "pca", seed: int = 0) -> "Projection":
+        """
+        Fit a projection on a sample of vectors.
+
+        Args:
+            vectors: Sample of full-width embeddings (rows)
+            dim: Target dimension
+            method: "pca" or "random"
+            seed: Seed for the random projection matrix
+        """
+        x = np.asarray(vectors, dtype=np.float32)
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Unknown projection method '{method}', expected one of {PROJECTION_METHODS}")
+        if not 0 < dim <= x.shape[1]:
+            raise ValueError(f"Target dimension {dim} must be between 1 and the input width {x.shape[1]}")
+
+        if method == "random":
+            rng = np.random.default_rng(seed)
+            components = rng.standard_normal((x.shape[1], dim)).astype(np.float32) / np.sqrt(dim)
+            return cls(method, components)
+
+        # PCA without centering (truncated SVD): the top right-singular vectors best preserve
+        # the dot products that cosine search ranks by, whereas centering would shift them.
+        if x.shape[0] < dim:
+            raise ValueError(f"PCA needs at least {dim} sample vectors, got {x.shape[0]}")
+        _, _, vt = np.linalg.svd(x, full_matrices=False)
+        return cls(method, vt[:dim].T)
+
+    def transform(self, vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        """Project and L2-normalize a batch of vectors."""
+        x = np.asarray(vectors, dtype=np.float32)
+        projected = x @ self.components
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.where(norms == 0, 1, norms)
+
+    def to_payload(self) -> Dict:
+        return {"method": self.method, "components": _encode_array(self.components)}
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "Projection":
+        return cls(payload["method"], _decode_array(payload["components"]))
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms == 0, 1, norms)
+
+
+def recall_at_k(corpus: np.ndarray, queries: np.ndarray, projection: Optional[Projection], k: int = 10) -> float:
+    """
+    Fraction of the exact full-width cosine top-k that the projected vectors also rank in their top-k.
+    """
+    if projection is None:
+        return 1.0
+    corpus = np.asarray(corpus, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    k = min(k, len(corpus))
+
+    exact = _normalize(queries) @ _normalize(corpus).T
+    truth = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+
+    approx = projection.transform(queries) @ projection.transform(corpus).T
+    found = np.argpartition(-approx, k - 1, axis=1)[:, :k]
+
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / (k * len(queries))
+
+
+def recall_report(corpus: np.ndarray, queries: np.ndarray, dims: List[int], method: str = "pca",
+                  k: int = 10, seed: int = 0) -> List[Dict]:
+    """Recall@k and storage saving for each candidate dimension, fitted on the corpus."""
+    full_dim = np.asarray(corpus).shape[1]
+    report = []
+    for dim in dims:
+        projection = Projection.fit(corpus, dim, method=method, seed=seed)
+        report.append({
+            "dim": dim,
+            "method": method,
+            f"recall@{k}": round(recall_at_k(corpus, queries, projection, k), 4),
+            "size_ratio": round(dim / full_dim, 3)
+        })
+    return report
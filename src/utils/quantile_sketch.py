@@ -0,0 +1,75 @@
+"""Mergeable streaming quantile sketch with relative-error guarantees (DDSketch-style)"""
+import json
+import math
+from typing import Dict, Iterable
+
+
+class QuantileSketch:
+    """
+    Approximate quantiles of a stream of non-negative values in bounded memory.
+
+    Values fall into logarithmic buckets of width `relative_accuracy`, so any quantile is
+    returned within that relative error of the true value (1% by default). Sketches of
+    different time buckets merge exactly, so p95 over a day is the merge of its hours.
+    A latency range of 1ms..1h needs under 1,000 buckets.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1):
+        if value is None:
+            return
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1); 0.0 for an empty sketch."""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_bytes(self) -> bytes:
+        return json.dumps({
+            "a": self.relative_accuracy, "z": self.zero_count,
+            "b": {str(k): v for k, v in self.buckets.items()}
+        }).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        state = json.loads(data)
+        sketch = cls(state["a"])
+        sketch.zero_count = state["z"]
+        sketch.buckets = {int(k): v for k, v in state["b"].items()}
+        sketch.count = sketch.zero_count + sum(sketch.buckets.values())
+        return sketch
@@ -0,0 +1,27 @@
+"""int8 CPU embedding backend: dynamically quantized SentenceTransformer models"""
+import warnings
+
+
+def quantize_int8(model):
+    """
+    Quantize every nn.Linear layer of a CPU model to int8 weights in place.
+
+    Activations are quantized on the fly (dynamic quantization), so no calibration
+    data is needed. The model keeps its SentenceTransformer interface (encode,
+    tokenizer, max_seq_length).
+    """
+    import torch
+
+    model.to("cpu").eval()
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao but still ships with torch
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def load_quantized_model(model_name: str):
+    """Load a SentenceTransformer on CPU and return its int8 dynamically quantized version."""
+    from sentence_transformers import SentenceTransformer
+    return quantize_int8(SentenceTransformer(model_name, device="cpu"))
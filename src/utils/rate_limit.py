@@ -0,0 +1,53 @@
+"""Request budgets shared by concurrent asyncio tasks calling rate-limited APIs"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+
+class RateBudget:
+    """
+    Spaces request starts so no more than `per_minute` begin in any minute.
+
+    Tasks call `await budget.acquire()` right before each request; each caller is given
+    the next free slot, so concurrent tasks queue up instead of bursting into 429s.
+    A budget of 0 (or less) is unlimited.
+    """
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute and per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimitedModel(WrapperModel):
+    """
+    A pydantic-ai model that takes a slot from `budget` before every model request, so an
+    agent run that calls tools and asks the model again is charged once per LLM call.
+    """
+
+    def __init__(self, wrapped: Model, budget: RateBudget):
+        super().__init__(wrapped)
+        self.budget = budget
+
+    async def request(self, messages, model_settings, model_request_parameters):
+        await self.budget.acquire()
+        return await super().request(messages, model_settings, model_request_parameters)
+
+    @asynccontextmanager
+    async def request_stream(self, messages, model_settings, model_request_parameters, run_context=None):
+        await self.budget.acquire()
+        async with super().request_stream(messages, model_settings, model_request_parameters, run_context) as stream:
+            yield stream
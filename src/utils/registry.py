@@ -0,0 +1,120 @@
+"""Process-wide registry of shared embedding models, API clients and vector stores"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# One re-entrant lock guards every table; model loads run on a background thread outside it
+_lock = threading.RLock()
+_models: Dict[Tuple[str, str], Future] = {}
+_clients: Dict[Tuple[str, Hashable], Any] = {}
+_vector_stores: Dict[str, Any] = {}
+
+
+def _load_in_background(factory: Callable, *args) -> Future:
+    """
+    Run factory(*args) on a daemon thread and return a Future for its result.
+
+    A daemon thread (rather than an executor) lets short scripts exit without
+    waiting for a model they never used.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(factory(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="embedding-model-loader", daemon=True).start()
+    return future
+
+
+def load_model(provider: str, model_name: str, factory: Callable) -> Future:
+    """
+    Start loading the model for (provider, model_name) once per process.
+
+    Returns a Future shared by every caller. A failed load is retried by the
+    next call.
+    """
+    key = (provider, model_name)
+    with _lock:
+        future = _models.get(key)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _load_in_background(factory, model_name)
+            _models[key] = future
+        return future
+
+
+def get_model(provider: str, model_name: str, factory: Callable):
+    """Return the shared model for (provider, model_name), waiting for it to load."""
+    return load_model(provider, model_name, factory).result()
+
+
+def get_client(kind: str, key: Hashable, factory: Callable[[], Any]):
+    """
+    Return the shared client of the given kind for `key` (usually the API key or URL),
+    creating it with factory() on first use.
+    """
+    with _lock:
+        client = _clients.get((kind, key))
+        if client is None:
+            client = factory()
+            _clients[(kind, key)] = client
+        return client
+
+
+def get_vector_store(collection_name: str = None):
+    """
+    Return the shared persistent VectorStore for a collection.
+
+    Local-disk Qdrant can only be opened once per process, so every call site that
+    needs the persistent store should go through here. In-memory stores are
+    independent by design and are not registered.
+    """
+    from src.utils.config import Config
+    from src.utils.vector_store import VectorStore
+
+    name = collection_name or Config.COLLECTION_NAME
+    with _lock:
+        store = _vector_stores.get(name)
+        if store is None:
+            store = VectorStore(collection_name=name, in_memory=False)
+            _vector_stores[name] = store
+        return store
+
+
+def reset():
+    """Forget every registered model, client and store without closing them (used by tests)."""
+    with _lock:
+        _models.clear()
+        _clients.clear()
+        _vector_stores.clear()
+
+
+def close():
+    """
+    Close every registered vector store, then every client that supports it, and empty
+    the registry. Meant for process shutdown; stores and clients are unusable afterwards.
+    """
+    with _lock:
+        stores = list(_vector_stores.values())
+        clients = list(_clients.values())
+        reset()
+
+    # A store closes its backend, which is usually one of the shared clients
+    closed = set()
+    for store in stores:
+        _close(store)
+        closed.update({id(store.backend), id(getattr(store, "qdrant_client", None))})
+    for client in clients:
+        if id(client) not in closed:
+            _close(client)
+
+
+def _close(resource):
+    closer = getattr(resource, "close", None)
+    if callable(closer):
+        try:
+            closer()
+        except Exception as e:
+            print(f"⚠️ Failed to close {type(resource).__name__}: {e}")
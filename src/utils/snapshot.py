@@ -0,0 +1,278 @@
+"""Collection snapshots: vectors in an .npy file, payloads in Parquet (JSONL without pyarrow)"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tqdm.auto import tqdm
+
+from src.utils.vector_backend import Record, VectorBackend
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+CHUNK_VECTORS = "chunks.npy"
+# Document-table points only carry a dummy vector, so they are stored without one
+DOCUMENT_VECTOR = [0.0]
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _PayloadWriter:
+    """Streams (id, payload) rows into a Parquet file, or JSONL when pyarrow is unavailable."""
+
+    def __init__(self, path_without_ext: str, fmt: str):
+        self.fmt = fmt
+        self.path = f"{path_without_ext}.{fmt}"
+        self._writer = None
+        self._file = open(self.path, "w", encoding="utf-8") if fmt == "jsonl" else None
+
+    def write(self, records: List[Record]):
+        if not records:
+            return
+        ids = [str(r.id) for r in records]
+        payloads = [json.dumps(r.payload, ensure_ascii=False) for r in records]
+        if self.fmt == "jsonl":
+            for point_id, payload in zip(ids, payloads):
+                self._file.write(f'{{"id": {json.dumps(point_id)}, "payload": {payload}}}\n')
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({"id": pa.array(ids, pa.string()), "payload": pa.array(payloads, pa.string())})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression="zstd")
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _read_payloads(path: str, batch_size: int) -> Iterator[List[Tuple[str, Dict]]]:
+    """Yield batches of (id, payload) in file order."""
+    if path.endswith(".jsonl"):
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    batch.append((row["id"], row["payload"]))
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+        return
+
+    import pyarrow.parquet as pq
+    if not os.path.exists(path):
+        return  # Nothing was written for an empty collection
+    batch = []
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        columns = record_batch.to_pydict()
+        batch.extend((point_id, json.loads(payload)) for point_id, payload in zip(columns["id"], columns["payload"]))
+        # Row groups may split batches unevenly; re-chunk so batch boundaries are deterministic
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    if batch:
+        yield batch
+
+
+def export_collection(backend: VectorBackend, collection_name: str, documents_collection_name: str,
+                      vector_size: int, path: str, page_size: int = 1000, extra: Dict = None) -> Dict:
+    """
+    Stream a collection and its document table into `path`, page by page.
+
+    Vectors go to a preallocated .npy memmap, so memory use stays at one page regardless
+    of collection size. Returns the manifest.
+    """
+    import numpy as np
+
+    os.makedirs(path, exist_ok=True)
+    fmt = "parquet" if _has_pyarrow() else "jsonl"
+    total = backend.count(collection_name)
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(path, CHUNK_VECTORS), mode="w+", dtype=np.float32, shape=(total, vector_size)
+    )
+    chunk_writer = _PayloadWriter(os.path.join(path, "chunks"), fmt)
+    written, offset = 0, None
+    with tqdm(total=total, desc="📦 Exporting chunks") as progress:
+        while written < total:
+            page, offset = backend.scroll(collection_name, limit=page_size, offset=offset, with_vectors=True)
+            # Points added after the export started are left out
+            page = page[:total - written]
+            if page:
+                vectors[written:written + len(page)] = np.asarray([r.vector for r in page], dtype=np.float32)
+                chunk_writer.write(page)
+                written += len(page)
+                progress.update(len(page))
+            if offset is None:
+                break
+    vectors.flush()
+    del vectors
+    chunk_writer.close()
+
+    document_writer = _PayloadWriter(os.path.join(path, "documents"), fmt)
+    documents, offset = 0, None
+    while True:
+        page, offset = backend.scroll(documents_collection_name, limit=page_size, offset=offset)
+        document_writer.write(page)
+        documents += len(page)
+        if offset is None:
+            break
+    document_writer.close()
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "collection": collection_name,
+        "vector_size": vector_size,
+        "chunks": written,
+        "documents": documents,
+        "payload_format": fmt,
+        "created_at": datetime.datetime.now().isoformat(),
+        **(extra or {})
+    }
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"[OK] Exported {written} chunks and {documents} documents to {path}")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict:
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"No snapshot manifest at {manifest_path}")
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _ImportCheckpoint:
+    """Completed batch ranges of an import, persisted so an interrupted import can resume."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = set(json.load(f)["done"])
+
+    def mark(self, key: str):
+        with self._lock:
+            self.done.add(key)
+            if self.path:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"done": sorted(self.done)}, f)
+                os.replace(tmp, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def checkpoint_path(checkpoint_dir: str, snapshot_path: str, manifest: Dict, collection_name: str) -> str:
+    key = hashlib.sha256(f"{os.path.abspath(snapshot_path)}\0{manifest['created_at']}\0{collection_name}".encode()).hexdigest()[:16]
+    return os.path.join(checkpoint_dir, f"import_{collection_name}_{key}.json")
+
+
+def import_collection(backend: VectorBackend, collection_name: str, documents_collection_name: str,
+                      vector_size: int, path: str, batch_size: int = 500, workers: int = 4,
+                      checkpoint: Optional[str] = None) -> int:
+    """
+    Upsert a snapshot into existing collections with `workers` parallel uploads.
+
+    Batches already recorded in `checkpoint` are skipped, so re-running an interrupted
+    import resumes it; upserts are idempotent, so a batch that was sent but not recorded
+    is simply written again. Returns the number of chunks uploaded by this call.
+    """
+    import numpy as np
+
+    manifest = read_manifest(path)
+    if manifest["vector_size"] != vector_size:
+        raise ValueError(
+            f"Snapshot vectors have {manifest['vector_size']} dimensions but collection "
+            f"'{collection_name}' expects {vector_size}"
+        )
+    ext = manifest["payload_format"]
+    progress_log = _ImportCheckpoint(checkpoint)
+
+    # The document table is small; it goes first so joins work as soon as chunks arrive
+    for batch in _read_payloads(os.path.join(path, f"documents.{ext}"), batch_size * 10):
+        backend.upsert(documents_collection_name, [
+            Record(id=point_id, vector=DOCUMENT_VECTOR, payload=payload) for point_id, payload in batch
+        ])
+
+    vectors = np.load(os.path.join(path, CHUNK_VECTORS), mmap_mode="r") if manifest["chunks"] else None
+    uploaded = 0
+
+    def upload(start: int, batch: List[Tuple[str, Dict]]) -> int:
+        block = np.asarray(vectors[start:start + len(batch)], dtype=np.float32)
+        backend.upsert(collection_name, [
+            Record(id=point_id, vector=vector.tolist(), payload=payload)
+            for (point_id, payload), vector in zip(batch, block)
+        ])
+        progress_log.mark(f"{start}:{start + len(batch)}")
+        return len(batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+         tqdm(total=manifest["chunks"], desc="📥 Importing chunks") as progress:
+        pending = set()
+        start = 0
+        for batch in _read_payloads(os.path.join(path, f"chunks.{ext}"), batch_size):
+            key = f"{start}:{start + len(batch)}"
+            if key in progress_log.done:
+                progress.update(len(batch))
+            else:
+                # Bound the batches held in memory to a few per worker
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        n = future.result()
+                        uploaded += n
+                        progress.update(n)
+                pending.add(pool.submit(upload, start, batch))
+            start += len(batch)
+        for future in pending:
+            n = future.result()
+            uploaded += n
+            progress.update(n)
+
+    progress_log.clear()
+    print(f"[OK] Imported {uploaded} chunks ({manifest['chunks']} in snapshot) and {manifest['documents']} documents")
+    return uploaded
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.utils.config import Config
+    from src.utils import registry
+
+    parser = argparse.ArgumentParser(description="Export or import a collection snapshot (no re-embedding)")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot directory")
+    parser.add_argument("--collection", default=Config.COLLECTION_NAME)
+    parser.add_argument("--batch-size", type=int, default=500, help="Points per upsert when importing")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel upserts when importing")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint of a previous import")
+    args = parser.parse_args()
+
+    # Uses the configured persistent store (QDRANT_URL, ./qdrant_data or the embedded backend)
+    store = registry.get_vector_store(args.collection)
+    if args.action == "export":
+        store.export(args.path)
+    else:
+        store.import_(args.path, batch_size=args.batch_size, workers=args.workers, resume=not args.no_resume)
@@ -0,0 +1,109 @@
+"""Local trace spans: nested timings per agent run, recorded without any external exporter"""
+import contextvars
+import functools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Span kinds used across the app; the Monitoring tab aggregates time per kind
+AGENT, LLM, TOOL, EMBEDDING, VECTOR_QUERY, FETCH, INTERNAL = (
+    "agent", "llm", "tool", "embedding", "vector_query", "fetch", "internal"
+)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_sink: Optional[Callable[[Tuple], None]] = None
+_sink_lock = threading.Lock()
+
+
+def set_sink(sink: Optional[Callable[[Tuple], None]]):
+    """
+    Send finished spans (as row tuples, see Span.to_row) to `sink`, e.g. AgentLogger.record_span.
+    With no sink, spans are not created at all, so instrumentation costs nothing.
+    """
+    global _sink
+    with _sink_lock:
+        _sink = sink
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    trace_id: str
+    parent_id: Optional[str]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.time)
+    duration: float = 0.0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_row(self) -> Tuple:
+        """(id, trace_id, parent_id, name, kind, start, duration, status, attributes JSON)"""
+        return (self.id, self.trace_id, self.parent_id, self.name, self.kind, self.start, self.duration,
+                self.status, json.dumps(self.attributes, default=str))
+
+
+@contextmanager
+def span(name: str, kind: str = INTERNAL, **attributes):
+    """
+    Time a block as a child of the current span (or as the root of a new trace).
+
+    Yields the Span (None when no sink is set) so callers can attach attributes.
+    The current span follows contextvars, so it carries into asyncio tasks and
+    into threads started with a copied context.
+    """
+    sink = _sink
+    if sink is None:
+        yield None
+        return
+    parent = _current.get()
+    current = Span(
+        name=name, kind=kind,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        parent_id=parent.id if parent else None,
+        attributes=dict(attributes)
+    )
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Reset from another context (e.g. an async generator closed elsewhere)
+            _current.set(parent)
+        try:
+            sink(current.to_row())
+        except Exception as e:
+            print(f"   [WARNING] Failed to record span '{name}': {e}")
+
+
+def traced(name: str = None, kind: str = INTERNAL):
+    """Decorator form of `span` for synchronous functions; keeps the wrapped signature."""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace_id if current else None
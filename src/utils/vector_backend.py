@@ -0,0 +1,505 @@
+"""Storage backends behind VectorStore: Qdrant (server or local) and an embedded NumPy store"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+DISTANCES = ("cosine", "dot")
+
+
+@dataclass
+class Record:
+    """A stored point: its id and payload, plus the vector or search score when relevant."""
+    id: str
+    payload: Dict
+    vector: Optional[List[float]] = None
+    score: Optional[float] = None
+
+
+@dataclass
+class Filter:
+    """Conjunction of payload conditions: exact matches and inclusive numeric ranges (None = unbounded)."""
+    match: Dict[str, Any] = field(default_factory=dict)
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+
+
+class VectorBackend(ABC):
+    """The operations VectorStore needs from a vector database."""
+
+    @abstractmethod
+    def collection_names(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def create_collection(self, name: str, size: int, distance: str = "cosine"):
+        ...
+
+    @abstractmethod
+    def delete_collection(self, name: str):
+        ...
+
+    @abstractmethod
+    def count(self, name: str) -> int:
+        ...
+
+    @abstractmethod
+    def upsert(self, name: str, records: List[Record]):
+        ...
+
+    @abstractmethod
+    def search(self, name: str, vector: List[float], limit: int, filter: Optional[Filter] = None) -> List[Record]:
+        ...
+
+    @abstractmethod
+    def retrieve(self, name: str, ids: List[str]) -> List[Record]:
+        ...
+
+    @abstractmethod
+    def scroll(self, name: str, limit: int, offset: Any = None, with_vectors: bool = False) -> Tuple[List[Record], Any]:
+        """Return a page of records and the offset of the next page (None after the last one)."""
+
+    def close(self):
+        """Release connections and flush anything buffered; backends with nothing to release keep this no-op."""
+
+
+class QdrantBackend(VectorBackend):
+    """Qdrant through qdrant-client: a server (Docker/Cloud) or its local in-memory/on-disk mode."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _to_qdrant_filter(filter: Optional[Filter]):
+        if filter is None or not (filter.match or filter.ranges):
+            return None
+        from qdrant_client import models
+        conditions = [
+            models.FieldCondition(key=key, match=models.MatchValue(value=value))
+            for key, value in filter.match.items()
+        ]
+        conditions += [
+            models.FieldCondition(key=key, range=models.Range(gte=lo, lte=hi))
+            for key, (lo, hi) in filter.ranges.items()
+        ]
+        return models.Filter(must=conditions)
+
+    def collection_names(self) -> List[str]:
+        return [c.name for c in self.client.get_collections().collections]
+
+    def create_collection(self, name: str, size: int, distance: str = "cosine"):
+        from qdrant_client.models import Distance, VectorParams
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(size=size, distance=Distance.COSINE if distance == "cosine" else Distance.DOT)
+        )
+
+    def delete_collection(self, name: str):
+        self.client.delete_collection(name)
+
+    def count(self, name: str) -> int:
+        return self.client.count(name).count
+
+    def upsert(self, name: str, records: List[Record]):
+        from qdrant_client.models import PointStruct
+        self.client.upsert(
+            collection_name=name,
+            points=[PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records]
+        )
+
+    def search(self, name: str, vector: List[float], limit: int, filter: Optional[Filter] = None) -> List[Record]:
+        points = self.client.query_points(
+            collection_name=name,
+            query=vector,
+            query_filter=self._to_qdrant_filter(filter),
+            limit=limit
+        ).points
+        return [Record(id=str(p.id), payload=p.payload, score=p.score) for p in points]
+
+    def retrieve(self, name: str, ids: List[str]) -> List[Record]:
+        records = self.client.retrieve(collection_name=name, ids=ids, with_payload=True, with_vectors=False)
+        return [Record(id=str(r.id), payload=r.payload) for r in records]
+
+    def scroll(self, name: str, limit: int, offset: Any = None, with_vectors: bool = False) -> Tuple[List[Record], Any]:
+        page, next_offset = self.client.scroll(
+            collection_name=name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        return [Record(id=str(r.id), payload=r.payload, vector=r.vector if with_vectors else None) for r in page], next_offset
+
+    def close(self):
+        self.client.close()
+
+
+class _NumpyCollection:
+    """
+    One collection of the embedded backend.
+
+    Vectors live in a float32 matrix (a memory-mapped file when persistent), one row per
+    point; ids and payloads live in SQLite and are mirrored in memory. Points are never
+    deleted individually, so rows stay dense.
+
+    Every upsert bumps a generation number stored with the rows. A saved HNSW graph is
+    stamped with the generation it covers and only reused while that still matches.
+    """
+
+    INITIAL_CAPACITY = 1024
+    # Filters matching a smaller share of the points skip the HNSW graph for an exact scan
+    HNSW_MIN_FILTER_FRACTION = 0.1
+
+    def __init__(self, size: int, distance: str, directory: Optional[str] = None,
+                 hnsw_min_points: Optional[int] = None):
+        import numpy as np
+
+        self.size = size
+        self.distance = distance
+        self.directory = directory
+        self.hnsw_min_points = hnsw_min_points
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.payloads: List[Dict] = []
+        self._columns: Dict[Tuple[str, bool], Any] = {}
+        self._hnsw = None
+        self._db = None
+        self.generation = 0
+
+        if directory is None:
+            self._vectors = np.zeros((self.INITIAL_CAPACITY, size), dtype=np.float32)
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"size": size, "distance": distance}, f)
+
+        self._db = sqlite3.connect(os.path.join(directory, "points.db"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, payload TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        stamp = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self.generation = int(stamp[0]) if stamp else 0
+        for row, point_id, payload in self._db.execute("SELECT row, id, payload FROM points ORDER BY row"):
+            self.rows[point_id] = row
+            self.ids.append(point_id)
+            self.payloads.append(json.loads(payload))
+
+        vectors_path = os.path.join(directory, "vectors.f32")
+        if not os.path.exists(vectors_path):
+            self._resize_file(vectors_path, self.INITIAL_CAPACITY)
+        self._vectors = self._open_memmap(vectors_path)
+
+    @classmethod
+    def open(cls, directory: str, hnsw_min_points: Optional[int] = None) -> "_NumpyCollection":
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(meta["size"], meta["distance"], directory, hnsw_min_points)
+
+    # --- Storage ---
+
+    def _resize_file(self, path: str, capacity: int):
+        with open(path, "ab") as f:
+            f.truncate(capacity * self.size * 4)
+
+    def _open_memmap(self, path: str):
+        import numpy as np
+        capacity = os.path.getsize(path) // (self.size * 4)
+        return np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.size))
+
+    def _ensure_capacity(self, needed: int):
+        import numpy as np
+
+        capacity = len(self._vectors)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        if self.directory is None:
+            grown = np.zeros((new_capacity, self.size), dtype=np.float32)
+            grown[:capacity] = self._vectors
+            self._vectors = grown
+        else:
+            self._vectors.flush()
+            path = self._vectors.filename
+            del self._vectors
+            self._resize_file(path, new_capacity)
+            self._vectors = self._open_memmap(path)
+
+    def upsert(self, records: List[Record]):
+        import numpy as np
+
+        if not records:
+            return
+        vectors = np.asarray([r.vector for r in records], dtype=np.float32).reshape(len(records), self.size)
+        if self.distance == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+
+        rows = []
+        for record in records:
+            point_id = str(record.id)
+            row = self.rows.get(point_id)
+            if row is None:
+                row = len(self.ids)
+                self.rows[point_id] = row
+                self.ids.append(point_id)
+                self.payloads.append(record.payload)
+            else:
+                self.payloads[row] = record.payload
+            rows.append(row)
+
+        self._ensure_capacity(len(self.ids))
+        self._vectors[rows] = vectors
+        self._columns.clear()
+        self.generation += 1
+
+        if self._db is not None:
+            # Vectors are flushed before the rows that point at them are committed
+            self._vectors.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO points (row, id, payload) VALUES (?, ?, ?)",
+                [(row, self.ids[row], json.dumps(self.payloads[row])) for row in rows]
+            )
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(self.generation),))
+            self._db.commit()
+
+        if self._hnsw is not None:
+            if len(self.ids) > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(len(self._vectors))
+            # Re-adding an existing label replaces its vector
+            self._hnsw.add_items(vectors, rows)
+            self.save_index()
+
+    def vector(self, row: int) -> List[float]:
+        return self._vectors[row].tolist()
+
+    # --- Filtering ---
+
+    def _column(self, key: str, numeric: bool):
+        """Payload field as an array aligned with rows (NaN/None where missing), cached until the next upsert."""
+        import numpy as np
+
+        column = self._columns.get((key, numeric))
+        if column is None:
+            values = [p.get(key) for p in self.payloads]
+            if numeric:
+                column = np.array(
+                    [v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in values],
+                    dtype=np.float64
+                )
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            self._columns[(key, numeric)] = column
+        return column
+
+    def _mask(self, filter: Optional[Filter]):
+        import numpy as np
+
+        if filter is None or not (filter.match or filter.ranges):
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, value in filter.match.items():
+            mask &= self._column(key, numeric=False) == value
+        for key, (lo, hi) in filter.ranges.items():
+            column = self._column(key, numeric=True)
+            # NaN (missing field) fails both comparisons, like a Qdrant range condition
+            if lo is not None:
+                mask &= column >= lo
+            if hi is not None:
+                mask &= column <= hi
+        return mask
+
+    # --- Search ---
+
+    def _get_hnsw(self):
+        """The HNSW graph, built on first use once the collection is large enough (requires hnswlib)."""
+        if self._hnsw is not None or self.hnsw_min_points is None or len(self.ids) < self.hnsw_min_points:
+            return self._hnsw
+        try:
+            import hnswlib
+        except ImportError:
+            self.hnsw_min_points = None
+            return None
+
+        import numpy as np
+
+        if self._saved_index_generation() == self.generation:
+            index = hnswlib.Index(space="ip", dim=self.size)
+            index.load_index(os.path.join(self.directory, "hnsw.bin"), max_elements=len(self._vectors))
+            if index.get_current_count() == len(self.ids):
+                self._hnsw = index
+                return index
+
+        print(f"🕸️ Building HNSW index over {len(self.ids)} vectors...")
+        index = hnswlib.Index(space="ip", dim=self.size)
+        index.init_index(max_elements=len(self._vectors), ef_construction=200, M=16)
+        index.add_items(np.asarray(self._vectors[:len(self.ids)]), np.arange(len(self.ids)))
+        self._hnsw = index
+        # Saved right away, so the next process loads the graph instead of rebuilding it
+        self.save_index()
+        return index
+
+    def _saved_index_generation(self) -> Optional[int]:
+        """Generation the saved HNSW graph was built for, or None when there is none to reuse."""
+        if not self.directory or not os.path.exists(os.path.join(self.directory, "hnsw.bin")):
+            return None
+        try:
+            with open(os.path.join(self.directory, "hnsw.json"), encoding="utf-8") as f:
+                return json.load(f)["generation"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def search(self, vector: List[float], limit: int, filter: Optional[Filter] = None) -> List[Record]:
+        import numpy as np
+
+        n = len(self.ids)
+        if n == 0 or limit <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        if self.distance == "cosine":
+            norm = np.linalg.norm(query)
+            query = query / (norm or 1)
+        mask = self._mask(filter)
+        if mask is not None and not mask.any():
+            return []
+
+        hits = None
+        index = self._get_hnsw()
+        # A selective filter leaves the graph walk too few matches to fill k (hnswlib then
+        # raises), and the masked exact scan is cheap anyway
+        if index is not None and (mask is None or mask.sum() >= self.HNSW_MIN_FILTER_FRACTION * n):
+            k = min(limit, n if mask is None else int(mask.sum()))
+            index.set_ef(max(64, 2 * k))
+            try:
+                labels, distances = index.knn_query(
+                    query, k=k, filter=None if mask is None else (lambda label: bool(mask[label]))
+                )
+                # The "ip" space returns 1 - dot product
+                hits = zip(labels[0].tolist(), (1 - distances[0]).tolist())
+            except RuntimeError:
+                hits = None
+        if hits is None:
+            scores = np.asarray(self._vectors[:n]) @ query
+            if mask is not None:
+                scores = np.where(mask, scores, -np.inf)
+                k = min(limit, int(mask.sum()))
+            else:
+                k = min(limit, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            hits = zip(top.tolist(), scores[top].tolist())
+
+        return [Record(id=self.ids[row], payload=self.payloads[row], score=float(score)) for row, score in hits]
+
+    def save_index(self):
+        """Write the HNSW graph, then the stamp; a crash in between leaves a stamp that no longer matches."""
+        if self._hnsw is None or not self.directory:
+            return
+        self._hnsw.save_index(os.path.join(self.directory, "hnsw.bin"))
+        with open(os.path.join(self.directory, "hnsw.json"), "w", encoding="utf-8") as f:
+            json.dump({"generation": self.generation, "count": len(self.ids)}, f)
+
+    def close(self):
+        if self._db is not None:
+            self._vectors.flush()
+            self._db.close()
+            self._db = None
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Embedded backend with no server: exact vectorized scans over a float32 matrix, memory-mapped
+    from `path` when persistent (path=None keeps everything in RAM).
+
+    When hnswlib is installed, collections with at least `hnsw_min_points` points are searched
+    through an HNSW graph instead, saved next to the vectors whenever it is built or updated.
+    """
+
+    def __init__(self, path: Optional[str] = None, hnsw_min_points: Optional[int] = 20000):
+        self.path = path
+        self.hnsw_min_points = hnsw_min_points
+        self._collections: Dict[str, _NumpyCollection] = {}
+        self._lock = threading.RLock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _directory(self, name: str) -> Optional[str]:
+        return os.path.join(self.path, name) if self.path else None
+
+    def _get(self, name: str) -> _NumpyCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            directory = self._directory(name)
+            if directory is None or not os.path.exists(os.path.join(directory, "meta.json")):
+                raise ValueError(f"Collection '{name}' does not exist")
+            collection = _NumpyCollection.open(directory, self.hnsw_min_points)
+            self._collections[name] = collection
+        return collection
+
+    def collection_names(self) -> List[str]:
+        with self._lock:
+            names = set(self._collections)
+            if self.path:
+                names.update(d for d in os.listdir(self.path) if os.path.exists(os.path.join(self.path, d, "meta.json")))
+            return sorted(names)
+
+    def create_collection(self, name: str, size: int, distance: str = "cosine"):
+        if distance not in DISTANCES:
+            raise ValueError(f"Unknown distance '{distance}', expected one of {DISTANCES}")
+        with self._lock:
+            if name in self.collection_names():
+                raise ValueError(f"Collection '{name}' already exists")
+            self._collections[name] = _NumpyCollection(size, distance, self._directory(name), self.hnsw_min_points)
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            directory = self._directory(name)
+            if directory and os.path.exists(directory):
+                shutil.rmtree(directory)
+
+    def count(self, name: str) -> int:
+        with self._lock:
+            return len(self._get(name).ids)
+
+    def upsert(self, name: str, records: List[Record]):
+        with self._lock:
+            self._get(name).upsert(records)
+
+    def search(self, name: str, vector: List[float], limit: int, filter: Optional[Filter] = None) -> List[Record]:
+        with self._lock:
+            return self._get(name).search(vector, limit, filter)
+
+    def retrieve(self, name: str, ids: List[str]) -> List[Record]:
+        with self._lock:
+            collection = self._get(name)
+            rows = [collection.rows[str(i)] for i in ids if str(i) in collection.rows]
+            return [Record(id=collection.ids[row], payload=collection.payloads[row]) for row in rows]
+
+    def scroll(self, name: str, limit: int, offset: Any = None, with_vectors: bool = False) -> Tuple[List[Record], Any]:
+        with self._lock:
+            collection = self._get(name)
+            start = offset or 0
+            end = min(start + limit, len(collection.ids))
+            page = [
+                Record(
+                    id=collection.ids[row],
+                    payload=collection.payloads[row],
+                    vector=collection.vector(row) if with_vectors else None
+                )
+                for row in range(start, end)
+            ]
+            return page, (end if end < len(collection.ids) else None)
+
+    def close(self):
+        with self._lock:
+            for collection in self._collections.values():
+                collection.close()
+            self._collections.clear()
@@ -2,39 +2,190 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from typing import List, Dict, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from groq import Groq
-from openai import OpenAI
-from sentence_transformers import SentenceTransformer
+from typing import Callable, List, Dict, Optional
 from src.utils.config import Config
+from src.utils import registry
+from src.utils.embedding_service import MicroBatcher
+from src.utils.quantized_embeddings import load_quantized_model
+from src.utils.openai_embeddings import OpenAIEmbedder
+from src.utils.vector_backend import Filter, NumpyBackend, QdrantBackend, Record, VectorBackend
+from src.utils import snapshot
+from src.utils import tracing
 from src.utils.document_loader import Document, DocumentLoader
+from src.utils.chunking import (
+    ChunkCache, LLMChunker, SemanticChunker, Span, TokenChunker, sliding_window_spans, tokenizer_offsets
+)
+import datetime
+import functools
 import hashlib
+import threading
 import uuid
 from tqdm.auto import tqdm
-import logfire
 
-logfire.configure(send_to_logfire='if-token-present')
+
+# --- Lazy dependencies ---
+# qdrant-client, groq, openai, sentence-transformers and logfire take seconds to import,
+# so they are only imported when first used.
+
+def _make_qdrant_client(*args, **kwargs):
+    from qdrant_client import QdrantClient
+    return QdrantClient(*args, **kwargs)
+
+
+def _make_groq_client(*args, **kwargs):
+    from groq import Groq
+    return Groq(*args, **kwargs)
+
+
+def _make_openai_client(*args, **kwargs):
+    from openai import OpenAI
+    return OpenAI(*args, **kwargs)
+
+
+def _load_sentence_transformer(*args, **kwargs):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(*args, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_logfire():
+    """Import and configure logfire once, on the first instrumented call."""
+    import logfire
+    logfire.configure(send_to_logfire='if-token-present')
+    return logfire
+
+
+def _instrument(msg_template: str):
+    """
+    Lazy equivalent of `@logfire.instrument(msg_template, extract_args=True)`, also
+    recorded as a local trace span (logfire only exports when a token is present).
+    """
+    def decorator(func):
+        instrumented = None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal instrumented
+            if instrumented is None:
+                instrumented = _get_logfire().instrument(msg_template, extract_args=True)(func)
+            with tracing.span(msg_template):
+                return instrumented(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Expected types of the well-known metadata fields set by DocumentLoader.
+# Any other field (e.g. GitHub frontmatter) is normalized generically.
+METADATA_SCHEMA = {
+    "source_type": str,
+    "source_path": str,
+    "source_url": str,
+    "title": str,
+    "repo": str,
+    "filename": str,
+    "video_id": str,
+    "topic": str,
+    "source_authority": int,
+    "page_number": int,
+    "total_pages": int,
+}
+
+# Nested structures deeper than this are stringified, which also breaks circular references
+MAX_METADATA_DEPTH = 4
+
+
+class IngestionCancelled(Exception):
+    """Raised by an add_documents progress callback to stop ingestion between stages or batches."""
+
+
+def _normalize_value(value, depth: int = 0):
+    """Convert a value to Qdrant/JSON-friendly types (str, int, float, bool, None, list, dict)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if depth >= MAX_METADATA_DEPTH:
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): _normalize_value(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_normalize_value(v, depth + 1) for v in value]
+    return str(value)
+
+
+def merge_neighbor_windows(hits: List[Dict], radius: int) -> Dict[str, List[List[int]]]:
+    """
+    Expand each hit to the chunk indexes [i - radius, i + radius] of its document and
+    merge overlapping or adjacent windows.
+
+    Args:
+        hits: Dicts with 'doc_id', 'chunk_index' and 'total_chunks'
+        radius: Number of neighbouring chunks to add on each side
+
+    Returns:
+        Mapping of doc_id to sorted, disjoint [first, last] chunk index ranges
+    """
+    windows: Dict[str, List[List[int]]] = {}
+    for hit in hits:
+        last_index = hit["total_chunks"] - 1
+        lo = max(0, hit["chunk_index"] - radius)
+        hi = min(last_index, hit["chunk_index"] + radius)
+        windows.setdefault(hit["doc_id"], []).append([lo, hi])
+
+    merged = {}
+    for doc_id, ranges in windows.items():
+        ranges.sort()
+        out = [ranges[0]]
+        for lo, hi in ranges[1:]:
+            if lo <= out[-1][1] + 1:
+                out[-1][1] = max(out[-1][1], hi)
+            else:
+                out.append([lo, hi])
+        merged[doc_id] = out
+    return merged
+
+
+def normalize_metadata(metadata: Dict) -> Dict:
+    """Normalize document metadata, coercing schema fields to their expected type."""
+    clean = {}
+    for key, value in metadata.items():
+        expected = METADATA_SCHEMA.get(key)
+        if expected is not None and value is not None and not isinstance(value, expected):
+            try:
+                value = expected(value)
+            except (TypeError, ValueError):
+                value = str(value)
+        clean[str(key)] = _normalize_value(value)
+    return clean
 
 
 
 class VectorStore:
-    """Manages vector storage and retrieval using Qdrant"""
+    """Manages vector storage and retrieval using Qdrant or the embedded NumPy backend"""
     
-    def __init__(self, collection_name: str = None, in_memory: bool = True):
+    def __init__(self, collection_name: str = None, in_memory: bool = True, backend: str = None):
         """
         Initialize vector store
         
         Args:
             collection_name: Name of the collection
             in_memory: Use in-memory storage (True) or persistent (False)
+            backend: "qdrant" or "embedded" (defaults to Config.VECTOR_BACKEND). A configured
+                QDRANT_URL always uses the Qdrant server for persistent stores.
         """
         self.collection_name = collection_name or Config.COLLECTION_NAME
+        # Document-level metadata lives once per document in a companion collection
+        self.documents_collection_name = f"{self.collection_name}_documents"
+        backend = backend or Config.VECTOR_BACKEND
+        # Raw client of the Qdrant backend (None for the embedded one), kept for existing callers
+        self.qdrant_client = None
         
-        if in_memory:
+        if in_memory and backend == "embedded":
+            print("🏠 [VectorStore] Mode: Embedded In-Memory (Ephemeral)")
+            self.backend: VectorBackend = NumpyBackend(hnsw_min_points=Config.EMBEDDED_HNSW_MIN_POINTS)
+        elif in_memory:
             print("🏠 [VectorStore] Mode: In-Memory (Ephemeral)")
-            self.qdrant_client = QdrantClient(":memory:")
+            self.qdrant_client = _make_qdrant_client(":memory:")
         elif Config.QDRANT_URL:
             # Simplified detection for logging purposes
             is_cloud = "qdrant.tech" in Config.QDRANT_URL
@@ -44,188 +195,403 @@ class VectorStore:
             else:
                 print(f"🐳 [VectorStore] Mode: Docker/Local ({Config.QDRANT_URL})")
                 
-            self.qdrant_client = QdrantClient(
-                url=Config.QDRANT_URL, 
-                api_key=Config.QDRANT_API_KEY,
-                timeout=60
+            self.qdrant_client = registry.get_client(
+                "qdrant", Config.QDRANT_URL,
+                lambda: _make_qdrant_client(url=Config.QDRANT_URL, api_key=Config.QDRANT_API_KEY, timeout=60)
+            )
+        elif backend == "embedded":
+            print(f"📁 [VectorStore] Mode: Embedded Local Disk ({Config.EMBEDDED_VECTOR_PATH})")
+            # Memory-mapped files are opened once per process and shared by every store
+            self.backend = registry.get_client(
+                "embedded", Config.EMBEDDED_VECTOR_PATH,
+                lambda: NumpyBackend(Config.EMBEDDED_VECTOR_PATH, hnsw_min_points=Config.EMBEDDED_HNSW_MIN_POINTS)
             )
         else:
             print("📁 [VectorStore] Mode: Local Disk (./qdrant_data)")
-            self.qdrant_client = QdrantClient(
-                path="./qdrant_data", 
-                timeout=Config.QDRANT_TIMEOUT if hasattr(Config, 'QDRANT_TIMEOUT') else 60
+            # Local storage is locked per process, so every store on it shares one client
+            self.qdrant_client = registry.get_client(
+                "qdrant", "./qdrant_data",
+                lambda: _make_qdrant_client(
+                    path="./qdrant_data",
+                    timeout=Config.QDRANT_TIMEOUT if hasattr(Config, 'QDRANT_TIMEOUT') else 60
+                )
             )
+        if self.qdrant_client is not None:
+            self.backend = QdrantBackend(self.qdrant_client)
         
-        self.groq_client = Groq(api_key=Config.GROQ_API_KEY)
+        # Groq is only needed for intelligent chunking, so the client is created on first use
+        self._groq_client = None
         
         # Initialize embedding provider
+        self._local_model = None
+        self._local_model_future = None
         if Config.EMBEDDING_PROVIDER == "openai":
-            self.openai_client = OpenAI(api_key=Config.OPENAI_API_KEY)
-            self.local_model = None
+            # Retries are handled by OpenAIEmbedder, so the client itself does not retry
+            self.openai_client = registry.get_client(
+                "openai", Config.OPENAI_API_KEY, lambda: _make_openai_client(api_key=Config.OPENAI_API_KEY, max_retries=0)
+            )
+            self.openai_embedder = OpenAIEmbedder(
+                self.openai_client,
+                Config.EMBEDDING_MODEL,
+                max_tokens_per_request=Config.OPENAI_EMBEDDING_REQUEST_TOKENS,
+                max_concurrency=Config.OPENAI_EMBEDDING_CONCURRENCY,
+                max_retries=Config.OPENAI_EMBEDDING_MAX_RETRIES
+            )
         else:
             self.openai_client = None
-            self.local_model = SentenceTransformer(Config.EMBEDDING_MODEL)
-            
+            self.openai_embedder = None
+            # Shared per process and loaded in the background; the first embedding call waits for it
+            factory = load_quantized_model if Config.EMBEDDING_PROVIDER == "local_int8" else _load_sentence_transformer
+            self._local_model_future = registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL, factory)
+
+        # Stored vectors may be reduced to REDUCED_VECTOR_SIZE by a projection kept with the collection
+        self.reduced_vector_size = Config.REDUCED_VECTOR_SIZE
+        self.vector_size = self.reduced_vector_size or Config.VECTOR_SIZE
+        self._projection = None
+        self._query_batcher = None
+        self._query_batcher_lock = threading.Lock()
+        self._llm_chunker = None
+        self._semantic_model = None
+        self._token_chunker = None
+        # Bumped by add_documents, clear and import_; collection_version is recomputed after each
+        self._generation = 0
+        self._version = None
         self._initialize_collection()
+        if self.reduced_vector_size:
+            self._projection = self._load_projection()
     
+    @property
+    def groq_client(self):
+        if self._groq_client is None:
+            self._groq_client = registry.get_client(
+                "groq", Config.GROQ_API_KEY, lambda: _make_groq_client(api_key=Config.GROQ_API_KEY)
+            )
+        return self._groq_client
+
+    @property
+    def local_model(self):
+        """The local SentenceTransformer, waiting for the background load if still in progress."""
+        if self._local_model is None and self._local_model_future is not None:
+            self._local_model = self._local_model_future.result()
+            self._local_model_future = None
+        return self._local_model
+
+    @local_model.setter
+    def local_model(self, model):
+        self._local_model = model
+        self._local_model_future = None
+
     def _initialize_collection(self):
         print(f"Initializing collection: {self.collection_name}")
 
         """Create collection if it doesn't exist"""
-        collections = self.qdrant_client.get_collections().collections
-        collection_names = [c.name for c in collections]
+        collection_names = self.backend.collection_names()
         
         if self.collection_name not in collection_names:
-            self.qdrant_client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=Config.VECTOR_SIZE,
-                    distance=Distance.COSINE
-                )
-            )
+            self.backend.create_collection(self.collection_name, size=self.vector_size, distance="cosine")
             print(f"[OK] Created collection: {self.collection_name}")
-            count = self.qdrant_client.count(self.collection_name).count
+            count = self.backend.count(self.collection_name)
             print(f"Created new collection'{self.collection_name}' with {count} documents.")
         else:
-            count = self.qdrant_client.count(self.collection_name).count
+            count = self.backend.count(self.collection_name)
             print(f"Loaded existing collection '{self.collection_name}' with {count} documents.")
             print(f"[OK] Loaded existing collection: {self.collection_name}")
+
+        # The document table only stores payloads; backends still need a (dummy) vector per point
+        if self.documents_collection_name not in collection_names:
+            self.backend.create_collection(self.documents_collection_name, size=1, distance="dot")
+
+    def count(self) -> int:
+        """Number of chunks stored in the collection."""
+        return self.backend.count(self.collection_name)
     
+    @property
+    def _projection_id(self) -> str:
+        # The projection lives in the document table, so it is dropped together with the collection
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"projection:{self.collection_name}"))
+
+    def _load_projection(self):
+        """Load the projection stored with this collection, if one has been fitted."""
+        from src.utils.projection import Projection
+
+        try:
+            records = self.backend.retrieve(self.documents_collection_name, [self._projection_id])
+        except Exception as e:
+            print(f"   [WARNING] Projection lookup failed: {e}")
+            return None
+        if not records:
+            return None
+        projection = Projection.from_payload(records[0].payload["projection"])
+        print(f"📐 Loaded {projection.method} projection {projection.input_dim} -> {projection.dim}")
+        return projection
+
+    def _fit_projection(self, vectors: List[List[float]]):
+        """Fit the collection's projection on a sample of vectors and store it with the collection."""
+        import numpy as np
+        from src.utils.projection import Projection
+
+        sample = np.asarray(vectors, dtype=np.float32)
+        if len(sample) > Config.REDUCTION_FIT_SAMPLE:
+            rows = np.random.default_rng(0).choice(len(sample), Config.REDUCTION_FIT_SAMPLE, replace=False)
+            sample = sample[rows]
+
+        method = Config.REDUCTION_METHOD
+        if method == "pca" and len(sample) < self.reduced_vector_size:
+            print(f"   [WARNING] Only {len(sample)} vectors to fit PCA to {self.reduced_vector_size} dims, using random projection")
+            method = "random"
+        projection = Projection.fit(sample, self.reduced_vector_size, method=method)
+
+        self.backend.upsert(
+            self.documents_collection_name,
+            [Record(id=self._projection_id, vector=[0.0], payload={"projection": projection.to_payload()})]
+        )
+        print(f"📐 Fitted {method} projection {projection.input_dim} -> {projection.dim} on {len(sample)} vectors")
+        return projection
+
+    def _reduce(self, vectors: List[List[float]], fit: bool = False) -> Optional[List[List[float]]]:
+        """
+        Apply the collection's projection. With fit=True the projection is fitted on these
+        vectors if the collection has none yet; otherwise None is returned in that case.
+        """
+        if not self.reduced_vector_size:
+            return vectors
+        if self._projection is None:
+            # Another process may have indexed (and fitted) since this store was opened
+            self._projection = self._load_projection()
+        if self._projection is None:
+            if not fit:
+                return None
+            self._projection = self._fit_projection(vectors)
+        return self._projection.transform(vectors).tolist()
+
     def _get_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text."""
         return self._get_embeddings([text])[0]
 
-    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts in a single batch for performance."""
+    def _get_query_embedding(self, query: str) -> List[float]:
+        """Embed a search query, batched together with concurrent searches on this store."""
+        if self._query_batcher is None:
+            with self._query_batcher_lock:
+                if self._query_batcher is None:
+                    self._query_batcher = MicroBatcher(
+                        lambda texts: self._get_embeddings(texts, show_progress=False),
+                        max_batch_size=Config.EMBEDDING_BATCH_MAX_SIZE,
+                        max_wait_ms=Config.EMBEDDING_BATCH_MAX_WAIT_MS
+                    )
+        return self._query_batcher.embed(query)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Full-width embedding of a query (before any dimensionality reduction)."""
+        return self._get_query_embedding(query)
+
+    def collection_version(self) -> str:
+        """
+        Fingerprint of the collection's contents: the embedding model, the number of chunks
+        and the sorted IDs of the document table. Document IDs are derived from source and
+        content, so a different corpus gives a different version even at equal counts.
+
+        The ID scan is reused until this store changes the collection or the counts move.
+        """
+        try:
+            documents = self.backend.count(self.documents_collection_name)
+        except Exception:
+            documents = 0
+        state = (self._generation, self.count(), documents)
+        cached = self._version
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        doc_ids = []
+        try:
+            offset = None
+            while True:
+                page, offset = self.backend.scroll(self.documents_collection_name, limit=1000, offset=offset)
+                doc_ids.extend(str(record.id) for record in page)
+                if offset is None:
+                    break
+        except Exception as e:
+            print(f"   [WARNING] Could not read the document table for the collection version: {e}")
+        digest = hashlib.sha256(
+            f"{self.collection_name}:{Config.EMBEDDING_PROVIDER}:{Config.EMBEDDING_MODEL}:{state[1]}".encode("utf-8")
+        )
+        for doc_id in sorted(doc_ids):
+            digest.update(b"\n" + doc_id.encode("utf-8"))
+        version = digest.hexdigest()[:16]
+        self._version = (state, version)
+        return version
+
+    def _get_embeddings(self, texts: List[str], show_progress: bool = True) -> List[List[float]]:
+        """Generate embeddings for a list of texts in large batches for performance."""
         if Config.EMBEDDING_PROVIDER == "openai":
-            response = self.openai_client.embeddings.create(
-                model=Config.EMBEDDING_MODEL,
-                input=texts
-            )
-            return [r.embedding for r in response.data]
+            # Split into token-bounded requests sent concurrently, with retries
+            return self.openai_embedder.embed(texts)
         else:
             # Local embedding - SentenceTransformers is optimized for lists
-            embeddings = self.local_model.encode(texts, batch_size=32, show_progress_bar=True)
+            embeddings = self.local_model.encode(texts, batch_size=32, show_progress_bar=show_progress)
             return embeddings.tolist()
     
     def _chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
-        """Split text into chunks"""
+        """Split text into fixed-size character chunks"""
         chunk_size = chunk_size or Config.CHUNK_SIZE
         overlap = overlap or Config.CHUNK_OVERLAP
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            chunk = text[start:end]
-            
-            # Don't create tiny final chunks
-            if len(chunk) < 100 and chunks:
-                chunks[-1] += " " + chunk
-                break
-            
-            chunks.append(chunk)
-            start = end - overlap
-        
-        return chunks
-    
-    def _intelligent_chunk_text(self, text: str) -> List[str]:
-        """Split text into logically coherent chunks using LLM"""
-        print(f"   [AI] Performing intelligent chunking...")
-        
-        prompt = f"""
-        Analyze the following text and split it into logically coherent sections or paragraphs.
-        Each section should focus on a specific sub-topic or theme.
-        
-        Guidelines:
-        1. Preserve the original text exactly.
-        2. Aim for chunks of approximately {Config.CHUNK_SIZE} characters where possible.
-        3. Return the chunks separated by a unique delimiter: [CHUNK_BOUNDARY]
-        
-        Text to split:
-        ---
-        {text}
-        ---
+        return [text[start:end] for start, end in sliding_window_spans(text, chunk_size, overlap)]
+
+    def _chunk_overlap_enabled(self) -> bool:
+        # Neighbour expansion restores context at query time, so chunks can be overlap-free
+        return not Config.NEIGHBOR_EXPANSION
+
+    def _sliding_window_spans(self, text: str) -> List[Span]:
+        overlap = Config.CHUNK_OVERLAP if self._chunk_overlap_enabled() else 0
+        return sliding_window_spans(text, Config.CHUNK_SIZE, overlap)
+
+    def _get_token_chunker(self) -> TokenChunker:
+        """Build a chunker bounded by the embedding model's tokenizer and maximum sequence length."""
+        if self._token_chunker is None:
+            if self.local_model is not None:
+                tokenizer = getattr(self.local_model, "tokenizer", None)
+                model_limit = getattr(self.local_model, "max_seq_length", None)
+                # Leave room for the [CLS]/[SEP] special tokens
+                model_limit = model_limit - 2 if isinstance(model_limit, int) else None
+            else:
+                try:
+                    import tiktoken
+                    tokenizer = tiktoken.encoding_for_model(Config.EMBEDDING_MODEL)
+                except Exception:
+                    tokenizer = None
+                model_limit = Config.OPENAI_EMBEDDING_MAX_TOKENS
+
+            max_tokens = min(Config.CHUNK_MAX_TOKENS, model_limit) if model_limit else Config.CHUNK_MAX_TOKENS
+            self._token_chunker = TokenChunker(
+                token_ends=tokenizer_offsets(tokenizer),
+                max_tokens=max_tokens,
+                overlap_tokens=Config.CHUNK_OVERLAP_TOKENS if self._chunk_overlap_enabled() else 0
+            )
+        return self._token_chunker
+
+    def reset_chunkers(self):
         """
-        
-        try:
-            response = self.groq_client.chat.completions.create(
+        Drop the token and LLM chunkers, which are built once from the settings of the time,
+        so the next chunking follows the current Config (e.g. between runs of a settings sweep).
+        """
+        self._token_chunker = None
+        self._llm_chunker = None
+
+    def _get_llm_chunker(self) -> LLMChunker:
+        """Build the LLM chunker lazily, sharing the on-disk boundary cache."""
+        if self._llm_chunker is None:
+            self._llm_chunker = LLMChunker(
+                client=self.groq_client,
                 model=Config.CHUNKING_LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a document processing assistant that splits text into logical chunks."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1 # Low temperature for consistency
+                chunk_size=Config.CHUNK_SIZE,
+                window_size=Config.CHUNKING_WINDOW_SIZE,
+                window_overlap=Config.CHUNKING_WINDOW_OVERLAP,
+                max_concurrency=Config.CHUNKING_MAX_CONCURRENCY,
+                cache=ChunkCache(Config.CHUNK_CACHE_PATH)
             )
-            
-            content = response.choices[0].message.content
-            print(f"   [AI] Raw response: {content}")
-            chunks = content.split("[CHUNK_BOUNDARY]")
-            
-            # Clean and filter empty chunks
-            cleaned_chunks = [c.strip() for c in chunks if c.strip()]
+        return self._llm_chunker
 
-            #cleaned_chunks = []
+    def _intelligent_chunk_documents(self, texts: List[str]) -> List[List[Span]]:
+        """Split several texts into logically coherent chunks using LLM, with windowing, concurrency and caching"""
+        print(f"   [AI] Performing intelligent chunking on {len(texts)} documents...")
+        return self._get_llm_chunker().chunk_documents(texts, fallback=self._sliding_window_spans)
 
-            #for chunk in chunks:
-            #    clean_text = chunk.strip()
-            #    if clean_text:
-            #        cleaned_chunks.append(clean_text)
-            
-            if len(cleaned_chunks) > 1:
-                print(f"   [AI] Successfully created {len(cleaned_chunks)} semantic chunks.")
-                return cleaned_chunks
-            
-        except Exception as e:
-            print(f"   [WARNING] AI Chunking failed: {e}. Falling back to sliding window.")
-            
-        # Fallback to standard chunking
-        return self._chunk_text(text)
+    def _intelligent_chunk_text(self, text: str) -> List[str]:
+        """Split text into logically coherent chunks using LLM"""
+        return [text[start:end] for start, end in self._intelligent_chunk_documents([text])[0]]
+
+    def _semantic_chunk_documents(self, texts: List[str]) -> List[List[Span]]:
+        """Split texts where neighbouring sentence embeddings diverge, using the local model (no LLM calls)"""
+        if self._semantic_model is None:
+            # Reuse the loaded embedding model; OpenAI users still need a local model for sentences
+            self._semantic_model = self.local_model or registry.get_model(
+                "local", Config.LOCAL_EMBEDDING_MODEL, _load_sentence_transformer
+            )
+        chunker = SemanticChunker(
+            model=self._semantic_model,
+            min_size=Config.SEMANTIC_CHUNK_MIN_SIZE,
+            max_size=Config.SEMANTIC_CHUNK_MAX_SIZE,
+            breakpoint_percentile=Config.SEMANTIC_BREAKPOINT_PERCENTILE
+        )
+        print(f"   [Semantic] Chunking {len(texts)} documents with local embeddings...")
+        return chunker.chunk_documents(texts)
+
+    def _chunk_documents(self, texts: List[str]) -> List[List[Span]]:
+        """Chunk texts with the configured CHUNKING_MODE, returning (start, end) spans per text"""
+        if Config.CHUNKING_MODE == "llm":
+            # LLM chunking runs for all documents at once so requests can be issued concurrently
+            return self._intelligent_chunk_documents(texts)
+        if Config.CHUNKING_MODE == "semantic":
+            return self._semantic_chunk_documents(texts)
+        if Config.CHUNKING_MODE == "sliding":
+            return [self._sliding_window_spans(text) for text in tqdm(texts, desc="📂 Chunking Documents")]
+        chunker = self._get_token_chunker()
+        return [chunker.spans(text) for text in tqdm(texts, desc="📂 Chunking Documents")]
 
     def _sanitize_metadata(self, metadata: Dict) -> Dict:
         """
         Ensures metadata contains only Qdrant-friendly types (str, int, float, bool, list).
-        Uses JSON serialization as a forced bottleneck to break circular references 
-        and flatten complex structures.
+        Known fields are coerced to the types in METADATA_SCHEMA; anything else is
+        normalized recursively with a depth limit that also breaks circular references.
         """
-        import json
         try:
-            # Force a round-trip to JSON to flatten everything to basic types
-            # and break any circular references or custom objects
-            clean_json = json.dumps(metadata, default=str)
-            sanitized = json.loads(clean_json)
-            return sanitized
+            return normalize_metadata(metadata)
         except Exception as e:
             print(f"   [WARNING] Metadata sanitization issue: {e}. Using emergency stringify.")
             return {str(k): str(v) for k, v in metadata.items()}
 
-    @logfire.instrument("add_documents", extract_args=True)
-    def add_documents(self, documents: List[Document]) -> int:
+    @staticmethod
+    def _chunk_id(doc_id: str, chunk_index: int) -> str:
+        """Deterministic point ID, so neighbouring chunks can be fetched by index."""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}:{chunk_index}"))
+
+    def _document_id(self, doc: Document, metadata: Dict) -> str:
+        """Deterministic ID of a document, derived from its source and content."""
+        content_hash = hashlib.sha256(doc.content.encode("utf-8")).hexdigest()
+        source = metadata.get("source_url") or metadata.get("source_path") or metadata.get("filename") or ""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source}#{metadata.get('page_number', '')}:{content_hash}"))
+
+    @_instrument("add_documents")
+    def add_documents(self, documents: List[Document], progress: Callable[[str, int], None] = None) -> int:
         """
         Add documents to vector store with batched embeddings, batch upserts, and metadata sanitization.
+
+        `progress(stage, count)` is called with the number of chunks "chunked", "embedded"
+        and "upserted" as each stage advances; it may raise IngestionCancelled to stop.
         """
+        report = progress or (lambda stage, count: None)
         all_chunks_data = [] # List of tuples: (text, metadata, point_id)
         
         # 1. Collect all chunks and prepare metadata
-        for doc in tqdm(documents, desc="📂 Chunking Documents"):
-            if Config.USE_INTELLIGENT_CHUNKING:
-                chunks = self._intelligent_chunk_text(doc.content)
-            else:
-                chunks = self._chunk_text(doc.content)
-            
+        document_points = []
+        doc_spans = self._chunk_documents([doc.content for doc in documents])
+        for doc, spans in zip(documents, doc_spans):
+            if not spans:
+                continue
             sanitized_meta = self._sanitize_metadata(doc.metadata)
+            doc_id = self._document_id(doc, sanitized_meta)
+            # Full metadata is stored once per document; chunks only carry the filterable fields
+            document_points.append(Record(
+                id=doc_id,
+                vector=[0.0],
+                payload={**sanitized_meta, "doc_id": doc_id, "total_chunks": len(spans)}
+            ))
+            filterable_meta = {k: sanitized_meta[k] for k in Config.FILTERABLE_METADATA_FIELDS if k in sanitized_meta}
             
-            for chunk_idx, chunk in enumerate(chunks):
+            for chunk_idx, (start, end) in enumerate(spans):
+                # Chunk strings are only materialized here, once, for embedding and payload
+                chunk = doc.content[start:end]
                 # Create unique UUID for point
-                point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{doc.content[:100]}_{chunk_idx}_{chunk[:50]}"))
+                point_id = self._chunk_id(doc_id, chunk_idx)
                 
                 # Prepare metadata
                 payload = {
                     "text": chunk,
                     "chunk_index": chunk_idx,
-                    "total_chunks": len(chunks),
-                    **sanitized_meta
+                    "total_chunks": len(spans),
+                    "char_start": start,
+                    "char_end": end,
+                    "doc_id": doc_id,
+                    **filterable_meta
                 }
                 all_chunks_data.append({
                     "text": chunk,
@@ -235,23 +601,27 @@ class VectorStore:
 
         if not all_chunks_data:
             return 0
+        report("chunked", len(all_chunks_data))
 
         # 2. Generate embeddings in large batches (optimized for Speed)
         texts_to_embed = [item["text"] for item in all_chunks_data]
         print(f"🧠 Generating embeddings for {len(texts_to_embed)} chunks...")
-        all_embeddings = self._get_embeddings(texts_to_embed)
+        with tracing.span("embed_documents", tracing.EMBEDDING, texts=len(texts_to_embed)):
+            all_embeddings = self._get_embeddings(texts_to_embed)
+        all_embeddings = self._reduce(all_embeddings, fit=True)
+        report("embedded", len(all_embeddings))
 
         # 3. Create Points
         all_points = []
         for i, item in enumerate(all_chunks_data):
-            point = PointStruct(
+            point = Record(
                 id=item["id"],
                 vector=all_embeddings[i],
                 payload=item["payload"]
             )
             all_points.append(point)
 
-        # 4. Upload to Qdrant in batches (optimized for Stability)
+        # 4. Upload to the backend in batches (optimized for Stability)
         batch_size = 50 # Even smaller batches for diagnostic safety
         total_added = 0
         import traceback
@@ -260,11 +630,11 @@ class VectorStore:
             for i in range(0, len(all_points), batch_size):
                 batch = all_points[i : i + batch_size]
                 try:
-                    self.qdrant_client.upsert(
-                        collection_name=self.collection_name,
-                        points=batch
-                    )
+                    self.backend.upsert(self.collection_name, batch)
                     total_added += len(batch)
+                    report("upserted", len(batch))
+                except IngestionCancelled:
+                    raise
                 except RecursionError:
                     print(f"\n❌ [CRITICAL] RecursionError detected in batch starting at {i}!")
                     # In case of recursion error, try to identify the offending point
@@ -280,15 +650,25 @@ class VectorStore:
                 except Exception as e:
                     print(f"   [Batch Error] {e}")
                     continue
+
+            # Document table rows are small, so they go in larger batches
+            for i in range(0, len(document_points), batch_size * 10):
+                self.backend.upsert(self.documents_collection_name, document_points[i : i + batch_size * 10])
+        except IngestionCancelled:
+            # Document rows are only written once all of their chunks are in, so a
+            # cancelled batch is never mistaken for an indexed one
+            print(f"[CANCELLED] Ingestion stopped after {total_added} chunks.")
+            raise
         except Exception as e:
             print(f"   [Ingestion Failed] {e}")
             traceback.print_exc()
         
+        self._generation += 1
         print(f"[OK] Successfully indexed {total_added} chunks across {len(documents)} documents.")
         return total_added
     
-    @logfire.instrument("vector_search", extract_args=True)
-    def search(self, query: str, min_authority: int = None, top_k: int = None) -> List[Dict]:
+    @_instrument("vector_search")
+    def search(self, query: str, min_authority: int = None, top_k: int = None, expand_neighbors: int = None) -> List[Dict]:
         """
         Search for relevant documents
         
@@ -296,65 +676,202 @@ class VectorStore:
             query: Search query
             min_authority: Minimum source authority (1-10)
             top_k: Number of results to return
+            expand_neighbors: Add the N chunks before and after each hit from the same
+                document (small-to-big retrieval). Defaults to Config.NEIGHBOR_EXPANSION.
             
         Returns:
             List of search results with text and metadata
         """
         top_k = top_k or Config.TOP_K_RESULTS
+        if expand_neighbors is None:
+            expand_neighbors = Config.NEIGHBOR_EXPANSION
         
-        # Generate query embedding
-        query_embedding = self._get_embedding(query)
+        # Generate query embedding, projected like the stored vectors
+        with tracing.span("embed_query", tracing.EMBEDDING):
+            query_embedding = self._reduce([self._get_query_embedding(query)])
+        if query_embedding is None:
+            # Nothing has been indexed (or projected) yet
+            return []
+        query_embedding = query_embedding[0]
         
         # Prepare filter if min_authority is specified
         query_filter = None
         if min_authority is not None:
-            from qdrant_client import models
-            query_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="source_authority",
-                        range=models.Range(gte=min_authority)
-                    )
-                ]
-            )
+            query_filter = Filter(ranges={"source_authority": (min_authority, None)})
 
-        # Search using the modern 'query_points' API
-        results = self.qdrant_client.query_points(
-            collection_name=self.collection_name,
-            query=query_embedding,
-            query_filter=query_filter,
-            limit=top_k
-        ).points
+        with tracing.span("vector_query", tracing.VECTOR_QUERY, top_k=top_k) as query_span:
+            results = self.backend.search(self.collection_name, query_embedding, limit=top_k, filter=query_filter)
+            if query_span is not None:
+                query_span.set(results=len(results))
         
+        # Join the document-level metadata back in with a single batched lookup
+        documents = self._get_document_metadata([p.payload.get("doc_id") for p in results])
+
         # Format results
         formatted_results = []
         for point in results:
+            chunk_meta = {k: v for k, v in point.payload.items() if k != "text"}
             formatted_results.append({
+                "id": str(point.id),
                 "text": point.payload["text"],
                 "score": point.score,
-                "metadata": {k: v for k, v in point.payload.items() if k != "text"}
+                "metadata": {**documents.get(point.payload.get("doc_id"), {}), **chunk_meta}
             })
+
+        if expand_neighbors and expand_neighbors > 0:
+            formatted_results = self._expand_neighbors(formatted_results, expand_neighbors)
         
         return formatted_results
+
+    def _expand_neighbors(self, results: List[Dict], radius: int) -> List[Dict]:
+        """
+        Replace hits with merged windows of their neighbouring chunks.
+
+        All missing neighbours are fetched with one batched retrieve call. Hits whose
+        windows overlap are merged into one result carrying the best score.
+        """
+        expandable = [r for r in results if {"doc_id", "chunk_index", "total_chunks"} <= r["metadata"].keys()]
+        if not expandable:
+            return results
+        windows = merge_neighbor_windows([r["metadata"] for r in expandable], radius)
+
+        chunks = {(r["metadata"]["doc_id"], r["metadata"]["chunk_index"]): r for r in expandable}
+        missing = [
+            self._chunk_id(doc_id, i)
+            for doc_id, ranges in windows.items()
+            for lo, hi in ranges
+            for i in range(lo, hi + 1)
+            if (doc_id, i) not in chunks
+        ]
+        if missing:
+            try:
+                with tracing.span("neighbor_lookup", tracing.VECTOR_QUERY, ids=len(missing)):
+                    records = self.backend.retrieve(self.collection_name, missing)
+            except Exception as e:
+                print(f"   [WARNING] Neighbour expansion failed: {e}")
+                records = []
+            for record in records:
+                payload = record.payload
+                chunks[(payload["doc_id"], payload["chunk_index"])] = {"text": payload["text"], "metadata": payload}
+
+        expanded = []
+        for doc_id, ranges in windows.items():
+            for lo, hi in ranges:
+                window = [chunks[(doc_id, i)] for i in range(lo, hi + 1) if (doc_id, i) in chunks]
+                hits = [r for r in expandable if r["metadata"]["doc_id"] == doc_id and lo <= r["metadata"]["chunk_index"] <= hi]
+                best = max(hits, key=lambda r: r["score"])
+                expanded.append({
+                    "id": best["id"],
+                    "text": self._join_chunks(window),
+                    "score": best["score"],
+                    "metadata": {**best["metadata"], "chunk_range": [lo, hi]}
+                })
+
+        # Results without chunk positions (e.g. legacy points) are kept as they are
+        expanded.extend(r for r in results if r not in expandable)
+        expanded.sort(key=lambda r: r["score"], reverse=True)
+        return expanded
+
+    @staticmethod
+    def _join_chunks(chunks: List[Dict]) -> str:
+        """Concatenate consecutive chunks, dropping text they share when offsets are known."""
+        text = chunks[0]["text"]
+        prev_end = chunks[0]["metadata"].get("char_end")
+        for chunk in chunks[1:]:
+            start = chunk["metadata"].get("char_start")
+            if prev_end is not None and start is not None and start < prev_end:
+                text += chunk["text"][prev_end - start:]
+            else:
+                text += "\n" + chunk["text"]
+            prev_end = chunk["metadata"].get("char_end")
+        return text
+
+    def indexed(self, documents: List[Document]) -> List[bool]:
+        """Whether each document is already fully indexed (its document-table row exists)."""
+        doc_ids = [self._document_id(doc, self._sanitize_metadata(doc.metadata)) for doc in documents]
+        found = self._get_document_metadata(doc_ids)
+        return [doc_id in found for doc_id in doc_ids]
+
+    def _get_document_metadata(self, doc_ids: List[Optional[str]]) -> Dict[str, Dict]:
+        """Fetch full metadata for the given document IDs from the document table."""
+        unique_ids = list({doc_id for doc_id in doc_ids if doc_id})
+        if not unique_ids:
+            return {}
+        try:
+            with tracing.span("document_lookup", tracing.VECTOR_QUERY, ids=len(unique_ids)):
+                records = self.backend.retrieve(self.documents_collection_name, unique_ids)
+        except Exception as e:
+            print(f"   [WARNING] Document metadata lookup failed: {e}")
+            return {}
+        return {str(r.id): r.payload for r in records}
     
     def clear(self):
         """Clear all data from collection by dropping and recreating it"""
         print(f"🧹 Aggressively clearing collection: {self.collection_name}")
         
         try:
-            # 1. Drop the collection (much faster than deleting points one by one)
-            self.qdrant_client.delete_collection(self.collection_name)
+            # 1. Drop the collections (much faster than deleting points one by one)
+            self.backend.delete_collection(self.collection_name)
+            self.backend.delete_collection(self.documents_collection_name)
             print(f"[OK] Drop collection: {self.collection_name}")
         except Exception as e:
             print(f"[INFO] Collection drop message (it might not exist): {e}")
         
-        # 2. Re-initialize fresh
+        # 2. Re-initialize fresh; the next add_documents fits a new projection
+        self._projection = None
+        self._generation += 1
         self._initialize_collection()
         
         # Final count check
-        final_count = self.qdrant_client.count(self.collection_name).count
+        final_count = self.count()
         print(f"[OK] Collection {self.collection_name} clear complete. Final count: {final_count}")
 
+    def export(self, path: str, page_size: int = 1000) -> Dict:
+        """
+        Export the collection and its document table to a snapshot directory
+        (vectors as .npy, payloads as Parquet) without re-embedding anything.
+        """
+        return snapshot.export_collection(
+            self.backend, self.collection_name, self.documents_collection_name, self.vector_size, path,
+            page_size=page_size,
+            extra={"embedding_model": Config.EMBEDDING_MODEL, "reduced_vector_size": self.reduced_vector_size}
+        )
+
+    def import_(self, path: str, batch_size: int = 500, workers: int = 4, resume: bool = True) -> int:
+        """
+        Load a snapshot written by export() into this collection with parallel batch upserts.
+
+        With resume=True, progress is checkpointed under Config.CACHE_DIR and re-running an
+        interrupted import skips the batches already uploaded.
+        """
+        manifest = snapshot.read_manifest(path)
+        if manifest.get("embedding_model") not in (None, Config.EMBEDDING_MODEL):
+            print(f"   [WARNING] Snapshot was embedded with {manifest['embedding_model']}, "
+                  f"but this store queries with {Config.EMBEDDING_MODEL}")
+        checkpoint = None
+        if resume:
+            os.makedirs(Config.CACHE_DIR, exist_ok=True)
+            checkpoint = snapshot.checkpoint_path(str(Config.CACHE_DIR), path, manifest, self.collection_name)
+        uploaded = snapshot.import_collection(
+            self.backend, self.collection_name, self.documents_collection_name, self.vector_size, path,
+            batch_size=batch_size, workers=workers, checkpoint=checkpoint
+        )
+        self._generation += 1
+        if self.reduced_vector_size:
+            # The projection travels in the document table
+            self._projection = self._load_projection()
+        return uploaded
+
+    def close(self):
+        """
+        Stop the query batcher and close the backend, flushing the embedded store's files.
+        Persistent stores share their backend process-wide, so close them through registry.close().
+        """
+        if self._query_batcher is not None:
+            self._query_batcher.close()
+            self._query_batcher = None
+        self.backend.close()
+
     def get_all_sources(self) -> List[Dict]:
         """
         Retrieve a list of unique sources currently in the collection.
@@ -362,16 +879,18 @@ class VectorStore:
             List of dicts with 'source_type' and 'source_name/url'
         """
         try:
-            # We can use the 'scroll' API to get all points (up to a limit)
-            # and then extract unique source info from payloads.
-            # For a production app with many points, we might want a different approach,
-            # but for this scale, scrolling is fine.
-            results, _ = self.qdrant_client.scroll(
-                collection_name=self.collection_name,
-                limit=1000,
-                with_payload=True,
-                with_vectors=False
-            )
+            # The document table has one point per document, so scrolling all of it is cheap.
+            # Collections indexed before the document table existed fall back to chunk payloads.
+            results = []
+            for collection_name in (self.documents_collection_name, self.collection_name):
+                offset = None
+                while True:
+                    page, offset = self.backend.scroll(collection_name, limit=1000, offset=offset)
+                    results.extend(page)
+                    if offset is None or collection_name == self.collection_name:
+                        break
+                if results:
+                    break
             
             sources = {}
             for point in results:
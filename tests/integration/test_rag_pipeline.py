@@ -18,7 +18,7 @@ with patch('sentence_transformers.SentenceTransformer'):
 @pytest.mark.asyncio
 async def test_rag_pipeline_end_to_end():
     # 1. Setup Vector Store with in-memory storage
-    with patch('src.utils.vector_store.SentenceTransformer') as mock_st:
+    with patch('src.utils.vector_store._load_sentence_transformer') as mock_st:
         mock_instance = MagicMock()
         mock_instance.encode.return_value.tolist.return_value = [[0.1]*768]
         mock_st.return_value = mock_instance
@@ -29,7 +29,8 @@ async def test_rag_pipeline_end_to_end():
         
         # 2. Ingest a known document
         test_content = "The capital of France is Paris."
-        doc = Document(content=test_content, metadata={"title": "Test Doc", "source_url": "test.com"})
+        # DocumentLoader always sets an authority; the tool filters on it (ResearchDeps defaults to 1)
+        doc = Document(content=test_content, metadata={"title": "Test Doc", "source_url": "test.com", "source_authority": 5})
         vector_store.add_documents([doc])
         
         # 3. Verify ingestion
@@ -39,12 +40,16 @@ async def test_rag_pipeline_end_to_end():
         
         # 4. Test tool in isolation
         from src.tools.research_local_docs import research_local_docs
+        from src.models.schemas import ToolRunCache
         
         # We don't need to patch VectorStore because research_local_docs 
         # uses the one provided in ctx.deps.
         mock_ctx = MagicMock()
         mock_ctx.deps = MagicMock()
         mock_ctx.deps.vector_store = vector_store
+        mock_ctx.deps.min_authority = 1
+        # Tools memoize calls per run; a fresh cache means this is the first call
+        mock_ctx.deps.tool_cache = ToolRunCache()
         
         tool_results = research_local_docs(mock_ctx, "What is the capital of France?")
         
@@ -0,0 +1,140 @@
+import sys
+import os
+import sqlite3
+import time
+from types import SimpleNamespace
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.agent_logger import AgentLogger
+
+
+def usage(input_tokens=100, output_tokens=20):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens)
+
+
+def test_writes_are_batched_and_visible_after_flush(tmp_path):
+    logger = AgentLogger(db_path=str(tmp_path / "history.db"), batch_size=50, flush_interval=10)
+
+    for i in range(120):
+        logger.log_interaction(f"q{i}", "a", usage(), latency=0.5, tools=["research_local_docs"])
+    assert logger.flush(timeout=5)
+
+    stats = logger.get_stats()
+    assert stats["total_queries"] == 120
+    assert stats["total_tokens"] == 120 * 120
+    assert stats["avg_latency"] == 0.5
+    logs = logger.get_logs(limit=10)
+    assert len(logs) == 10 and logs["prompt_tokens"].iloc[0] == 100
+    logger.close()
+
+
+def test_logging_does_not_wait_for_the_database(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    logger = AgentLogger(db_path=db_path, flush_interval=0.01)
+    # Another process holding the write lock would make a synchronous insert wait
+    blocker = sqlite3.connect(db_path)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    start = time.perf_counter()
+    for i in range(200):
+        logger.log_interaction("q", "a", usage(), latency=1.0, tools=[])
+    assert time.perf_counter() - start < 0.5
+
+    blocker.rollback()
+    blocker.close()
+    assert logger.flush(timeout=10)
+    assert logger.get_stats()["total_queries"] == 200
+    logger.close()
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    logger = AgentLogger(db_path=db_path, flush_interval=60)
+    logger.log_interaction("q", "a", usage(), latency=1.0, tools=["perform_web_search"])
+    logger.close()
+    logger.close()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT query, tools_used FROM interactions").fetchall() == [("q", "perform_web_search")]
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(interactions)")]
+    assert "idx_interactions_timestamp" in indexes
+    conn.close()
+
+
+def test_clear_logs_includes_queued_rows(tmp_path):
+    logger = AgentLogger(db_path=str(tmp_path / "history.db"), flush_interval=60)
+    logger.log_interaction("q", "a", usage(), latency=1.0, tools=[])
+    logger.clear_logs()
+    logger.flush()
+    assert logger.get_stats()["total_queries"] == 0
+    logger.close()
+
+
+def test_writer_survives_a_batch_that_fails(tmp_path):
+    logger = AgentLogger(db_path=str(tmp_path / "history.db"), flush_interval=0.01)
+    # A non-numeric latency fails in the rollups, not in SQLite
+    logger.log_interaction("bad", "a", usage(), latency="slow", tools=[])
+    assert logger.flush(timeout=5)
+
+    logger.log_interaction("good", "a", usage(), latency=1.0, tools=[])
+    assert logger.flush(timeout=5)
+    assert logger.get_logs()["query"].tolist() == ["good"]
+    logger.clear_logs()
+    assert logger.get_stats()["total_queries"] == 0
+    logger.close()
+
+
+def test_rollups_track_percentiles_tokens_per_second_and_tool_cost(tmp_path):
+    logger = AgentLogger(db_path=str(tmp_path / "history.db"))
+    for i in range(1, 101):
+        logger.log_interaction(f"q{i}", "a", usage(1000, 100), latency=float(i), tools=["research_local_docs"] * (i % 2 + 1))
+    logger.log_interaction("web", "a", usage(1000, 100), latency=1.0, tools=["research_local_docs", "perform_web_search"])
+    logger.flush()
+
+    stats = logger.get_stats()
+    assert stats["total_queries"] == 101
+    assert abs(stats["p50_latency"] - 50) <= 1
+    assert abs(stats["p95_latency"] - 95) <= 1.5
+    assert abs(stats["p99_latency"] - 99) <= 1.5
+    assert stats["max_latency"] == 100.0
+    assert stats["tokens_per_second"] == 101 * 100 / (5050 + 1)
+
+    hours = logger.get_rollups("hour")
+    assert hours["total_queries"].sum() == 101
+    assert list(hours.columns[:2]) == ["timestamp", "total_queries"]
+
+    tools = logger.get_tool_stats().set_index("tool")
+    assert tools.loc["research_local_docs", "calls"] == 150 + 1
+    assert tools.loc["perform_web_search", "interactions"] == 1
+    cost = 1000 * 0.15 / 1_000_000 + 100 * 0.60 / 1_000_000
+    assert abs(tools["cost"].sum() - 101 * cost) < 1e-12
+    logger.close()
+
+
+def test_rollups_are_built_for_existing_logs(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE interactions (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        query TEXT, response TEXT, prompt_tokens INTEGER, completion_tokens INTEGER, total_tokens INTEGER,
+        cost FLOAT, latency FLOAT, tools_used TEXT)""")
+    conn.executemany(
+        "INSERT INTO interactions (timestamp, query, total_tokens, cost, latency, tools_used) VALUES (?, 'q', 10, 0.1, ?, '')",
+        [("2024-01-01 10:15:00", 2.0), ("2024-01-01 11:30:00", 4.0), ("2024-01-02 09:00:00", 6.0)]
+    )
+    conn.commit()
+    conn.close()
+
+    logger = AgentLogger(db_path=db_path)
+    assert logger.get_stats()["total_queries"] == 3
+    days = logger.get_rollups("day")
+    assert days["total_queries"].tolist() == [2, 1]
+    assert days["avg_latency"].tolist() == [3.0, 6.0]
+    assert len(logger.get_rollups("minute")) == 3
+
+    logger.clear_logs()
+    assert logger.get_stats()["total_queries"] == 0
+    assert logger.get_rollups("hour").empty
+    logger.close()
@@ -0,0 +1,48 @@
+import sys
+import os
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.answer_cache import AnswerCache
+
+
+def make_cache(tmp_path, **kwargs):
+    return AnswerCache(db_path=str(tmp_path / "answers.db"), threshold=0.9, ttl_hours=24, **kwargs)
+
+
+def test_similar_question_hits_and_dissimilar_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("What is Qdrant?", [1.0, 0.0, 0.0], 3, "v1", "A vector database.", ["research_local_docs"])
+
+    hit = cache.lookup([0.99, 0.1, 0.0], 3, "v1")
+    assert hit["answer"] == "A vector database."
+    assert hit["query"] == "What is Qdrant?"
+    assert hit["similarity"] > 0.99
+    assert hit["tools_used"] == ["research_local_docs"]
+
+    assert cache.lookup([0.0, 1.0, 0.0], 3, "v1") is None
+
+
+def test_collection_version_and_authority_must_be_compatible(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("q", [1.0, 0.0], 5, "v1", "answer")
+
+    assert cache.lookup([1.0, 0.0], 5, "v2") is None  # collection changed since
+    assert cache.lookup([1.0, 0.0], 7, "v1") is None  # cached answer may cite authority 5 sources
+    assert cache.lookup([1.0, 0.0], 3, "v1")["answer"] == "answer"  # stricter answers still qualify
+
+
+def test_prefers_exact_authority_and_expires(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("q", [1.0, 0.0], 9, "v1", "strict answer")
+    cache.store("q", [1.0, 0.0], 4, "v1", "matching answer")
+    assert cache.lookup([1.0, 0.0], 4, "v1")["answer"] == "matching answer"
+
+    expired = AnswerCache(db_path=cache.db_path, threshold=0.9, ttl_hours=1 / 3600)
+    time.sleep(1.1)
+    assert expired.lookup([1.0, 0.0], 4, "v1") is None
+
+    cache.clear()
+    assert cache.lookup([1.0, 0.0], 4, "v1") is None
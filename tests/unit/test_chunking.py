@@ -0,0 +1,139 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.chunking import (
+    CHUNK_BOUNDARY, DOCUMENT_MARKER, DOCUMENT_MARKER_PATTERN, ChunkCache, LLMChunker,
+    sliding_window_spans, split_windows, stitch_boundaries
+)
+
+PARAGRAPHS = [f"Paragraph {i} talks about topic number {i} in some detail. " * 4 for i in range(12)]
+TEXT = "\n\n".join(PARAGRAPHS)
+
+
+def make_client():
+    """Fake Groq client that splits its input on blank lines, like a well-behaved model."""
+    client = MagicMock()
+
+    def create(model, messages, temperature):
+        body = messages[1]["content"].split("---", 1)[1].rsplit("---", 1)[0].strip()
+        parts = DOCUMENT_MARKER_PATTERN.split(body)
+        response = MagicMock()
+        if len(parts) == 1:
+            response.choices[0].message.content = CHUNK_BOUNDARY.join(body.split("\n\n"))
+        else:
+            response.choices[0].message.content = "\n".join(
+                DOCUMENT_MARKER.format(i) + "\n" + CHUNK_BOUNDARY.join(doc.strip().split("\n\n"))
+                for i, doc in zip(parts[1::2], parts[2::2])
+            )
+        return response
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+
+def test_split_windows_overlap_and_cover():
+    windows = split_windows(TEXT, window_size=600, overlap=100)
+
+    assert len(windows) > 1
+    assert windows[0][0] == 0
+    assert windows[-1][1] == len(TEXT)
+    for (_, prev_end), (start, _) in zip(windows, windows[1:]):
+        assert start < prev_end  # consecutive windows overlap
+    assert all(end - start <= 600 for start, end in windows)
+
+
+def test_stitch_boundaries_drops_duplicates_from_overlap():
+    windows = [(0, 100), (80, 200)]
+    # Both windows propose the boundary at global offset 90
+    merged = stitch_boundaries(windows, [[50, 90], [10, 60]])
+    assert merged == [50, 90, 140]
+
+
+def test_sliding_window_spans_stop_at_end_of_text():
+    assert sliding_window_spans("x" * 310, chunk_size=800, overlap=200) == [(0, 310)]
+    assert sliding_window_spans("x" * 900, chunk_size=800, overlap=200) == [(0, 800), (600, 900)]
+
+
+def test_llm_chunker_windows_and_cache():
+    client = make_client()
+    cache = ChunkCache()
+    chunker = LLMChunker(client, "test-model", chunk_size=200, window_size=600,
+                         window_overlap=100, max_concurrency=3, cache=cache)
+
+    spans = chunker.chunk_documents([TEXT], fallback=lambda t: [(0, 1)])[0]
+
+    assert [TEXT[s:e] for s, e in spans] == [p.strip() for p in PARAGRAPHS]
+    assert client.chat.completions.create.call_count <= len(split_windows(TEXT, 600, 100))
+
+    # Re-chunking the same text is served entirely from the cache
+    client.chat.completions.create.reset_mock()
+    assert chunker.chunk_documents([TEXT], fallback=lambda t: [(0, 1)])[0] == spans
+    client.chat.completions.create.assert_not_called()
+
+
+def test_llm_chunker_falls_back_on_error():
+    client = MagicMock()
+    client.chat.completions.create.side_effect = RuntimeError("timeout")
+    chunker = LLMChunker(client, "test-model", chunk_size=200, window_size=600,
+                         window_overlap=100, max_concurrency=2, cache=ChunkCache())
+
+    assert chunker.chunk_documents([TEXT], fallback=lambda t: [(0, 1)]) == [[(0, 1)]]
+
+
+def test_llm_chunker_skips_and_packs_small_documents():
+    client = make_client()
+    chunker = LLMChunker(client, "test-model", chunk_size=200, window_size=2000,
+                         window_overlap=100, max_concurrency=2, cache=ChunkCache())
+    tiny = [f"Short note number {i}." for i in range(20)]
+    medium = ["\n\n".join(PARAGRAPHS[i:i + 2]) for i in range(10)]
+
+    results = chunker.chunk_documents(tiny + medium, fallback=lambda t: [(0, 1)])
+
+    # Tiny documents never reach the LLM and medium ones share requests
+    assert results[:20] == [[(0, len(t))] for t in tiny]
+    for doc, spans in zip(medium, results[20:]):
+        assert [doc[s:e] for s, e in spans] == [p.strip() for p in doc.split("\n\n")]
+    assert client.chat.completions.create.call_count == 3  # 10 documents, 4 per 2000-char request
+
+
+def test_semantic_chunker_splits_on_topic_shift():
+    import numpy as np
+    from src.utils.chunking import SemanticChunker
+
+    cats = ["Cats purr when they are content. " * 3 + "Cats sleep most of the day."] * 3
+    rockets = ["Rockets burn fuel to produce thrust. " * 3 + "Rockets reach orbit quickly."] * 3
+    text = " ".join(cats + rockets)
+
+    model = MagicMock()
+    model.encode.side_effect = lambda sentences, **kwargs: np.array(
+        [[1.0, 0.0] if "Cats" in s else [0.0, 1.0] for s in sentences]
+    )
+    chunker = SemanticChunker(model, min_size=50, max_size=1000, breakpoint_percentile=10)
+
+    chunks = [text[s:e] for s, e in chunker.chunk_documents([text])[0]]
+
+    assert len(chunks) == 2
+    assert "Rockets" not in chunks[0] and "Cats" not in chunks[1]
+    model.encode.assert_called_once()
+
+
+def test_token_chunker_respects_limit_and_sentences():
+    from src.utils.chunking import TokenChunker, tokenizer_offsets
+
+    token_ends = tokenizer_offsets(None)  # word/punctuation approximation
+    chunker = TokenChunker(token_ends, max_tokens=40, overlap_tokens=12)
+
+    spans = chunker.spans(TEXT)
+
+    assert len(spans) > 1
+    assert spans[0][0] == 0 and spans[-1][1] == len(TEXT.rstrip())
+    for start, end in spans:
+        assert len(token_ends(TEXT[start:end])) <= 40
+        assert TEXT[end - 1] == "."  # chunks end on sentence boundaries
+    # Consecutive chunks overlap by whole sentences but never repeat a full chunk
+    for (s1, e1), (s2, e2) in zip(spans, spans[1:]):
+        assert s1 < s2 <= e1 < e2
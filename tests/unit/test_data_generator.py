@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import time
+import asyncio
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.evaluation.data_generator import EvalDataGenerator
+
+
+def make_generator(fail=()):
+    generator = EvalDataGenerator(concurrency=4, requests_per_minute=0)
+    calls = []
+
+    def generate_qa_pair(context):
+        calls.append(context)
+        time.sleep(0.1)
+        if any(marker in context for marker in fail):
+            return None
+        return {"question": f"q{len(calls)}", "answer": "a"}
+
+    generator.generate_qa_pair = generate_qa_pair
+    return generator, calls
+
+
+def write_source(path, name, paragraphs):
+    source = path / name
+    source.write_text(" ".join(f"{name} paragraph {i} " + "filler " * 300 for i in range(paragraphs)))
+    return str(source)
+
+
+def test_concurrent_generation_appends_and_resumes(tmp_path):
+    first = write_source(tmp_path, "first.txt", 8)
+    second = write_source(tmp_path, "second.md", 8)
+    output = str(tmp_path / "testset.jsonl")
+
+    generator, calls = make_generator(fail={"first.txt paragraph 0 "})
+    start = time.perf_counter()
+    samples = asyncio.run(generator.generate([first, second], num_samples=4, output_path=output))
+    # 8 requests of 0.1s with 4 in flight
+    assert time.perf_counter() - start < 0.6
+    assert len(calls) == 8 and len(samples) == 7
+
+    with open(output) as f:
+        written = [json.loads(line) for line in f]
+    assert len(written) == 7
+    assert {s["source"] for s in written} == {first, second}
+
+    # A torn final line is ignored, and only the failed context and new ones are generated
+    with open(output, "a") as f:
+        f.write('{"question": "torn')
+    generator, calls = make_generator()
+    asyncio.run(generator.generate([first, second], num_samples=5, output_path=output))
+    assert len(calls) == 3
+
+    with open(output) as f:
+        lines = f.read().splitlines()
+    complete = [json.loads(line) for line in lines if line.endswith("}")]
+    assert len(complete) == 10
+    assert len({(s["source"], s["context"]) for s in complete}) == 10
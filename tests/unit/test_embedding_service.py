@@ -0,0 +1,94 @@
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.embedding_service import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        time.sleep(0.01)  # let more requests queue up behind the running batch
+        return [[float(len(t))] for t in texts]
+
+    batcher = MicroBatcher(encode, max_batch_size=8, max_wait_ms=5)
+    texts = ["x" * i for i in range(1, 41)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(batcher.embed, texts))
+    batcher.close()
+
+    # Every caller gets its own embedding back
+    assert results == [[float(len(t))] for t in texts]
+    assert len(calls) < len(texts)
+    assert all(len(batch) <= 8 for batch in calls)
+
+
+def test_encode_errors_reach_every_caller():
+    def encode(texts):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(encode, max_wait_ms=1)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            future.result(timeout=5)
+    batcher.close()
+
+
+def test_close_flushes_queued_requests():
+    batcher = MicroBatcher(lambda texts: [[1.0] for _ in texts], max_wait_ms=50)
+    future = batcher.submit("pending")
+    batcher.close()
+
+    assert future.result(timeout=1) == [1.0]
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
+
+
+def test_requests_racing_close_never_hang():
+    batcher = MicroBatcher(lambda texts: [[1.0] for _ in texts], max_wait_ms=1)
+
+    def submit(i):
+        if i == 50:
+            batcher.close()
+        try:
+            return batcher.submit(str(i))
+        except RuntimeError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [f for f in pool.map(submit, range(200)) if f is not None]
+    batcher.close()
+
+    # Every request accepted before close is answered, none is left waiting
+    assert all(f.result(timeout=2) == [1.0] for f in futures)
+
+
+def test_embedding_cache_encodes_each_text_once(tmp_path):
+    from src.utils.embedding_service import EmbeddingCache
+
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    path = tmp_path / "embeddings.db"
+    first = EmbeddingCache(path).embed("model-a", ["alpha", "beta", "alpha"], encode)
+    assert first.tolist() == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+    assert encoded == ["alpha", "beta"]
+
+    # A new process reuses the stored vectors; another model does not
+    cache = EmbeddingCache(path)
+    assert cache.embed("model-a", ["beta", "gamma"], encode).tolist() == [[4.0, 1.0], [5.0, 1.0]]
+    cache.embed("model-b", ["beta"], encode)
+    assert encoded == ["alpha", "beta", "gamma", "beta"]
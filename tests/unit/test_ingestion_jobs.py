@@ -0,0 +1,122 @@
+import sys
+import os
+import sqlite3
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.document_loader import Document
+from src.utils.ingestion_jobs import IngestionJobs, save_upload
+from src.utils.vector_store import IngestionCancelled
+
+
+class FakeStore:
+    """Stands in for VectorStore.add_documents: one chunk per document, reported stage by stage."""
+
+    def __init__(self, indexed_ids=(), gate=None):
+        self.added = []
+        self.indexed_ids = set(indexed_ids)
+        self.gate = gate
+        self.started = threading.Event()
+
+    def indexed(self, documents):
+        return [doc.metadata["id"] in self.indexed_ids for doc in documents]
+
+    def add_documents(self, documents, progress=None):
+        self.started.set()
+        if self.gate:
+            self.gate.wait()
+        progress("chunked", len(documents))
+        progress("embedded", len(documents))
+        self.added.extend(doc.metadata["id"] for doc in documents)
+        progress("upserted", len(documents))
+        return len(documents)
+
+
+@pytest.fixture
+def loader():
+    loader = MagicMock()
+    loader.parse_github_url.return_value = None
+    loader.load_web_page.side_effect = lambda url: Document(content=url, metadata={"id": url})
+    loader.load_pdf.side_effect = lambda path: [
+        Document(content=f"page {i}", metadata={"id": f"{path}:{i}"}) for i in range(5)
+    ]
+    return loader
+
+
+def test_job_reports_stage_progress(tmp_path, loader):
+    store = FakeStore()
+    jobs = IngestionJobs(store, db_path=str(tmp_path / "jobs.db"), batch_docs=2, loader=loader)
+
+    job_id = jobs.submit([{"type": "pdf", "path": "a.pdf", "name": "a.pdf"}, {"type": "url", "url": "https://x.org"}])
+    job = jobs.wait(job_id, timeout=5)
+    jobs.close()
+
+    assert job["status"] == "completed"
+    assert (job["fetched"], job["chunked"], job["embedded"], job["upserted"]) == (6, 6, 6, 6)
+    assert len(store.added) == 6
+    assert [j["id"] for j in jobs.list()] == [job_id]
+
+
+def test_cancel_stops_running_and_queued_jobs(tmp_path, loader):
+    gate = threading.Event()
+    store = FakeStore(gate=gate)
+    jobs = IngestionJobs(store, db_path=str(tmp_path / "jobs.db"), batch_docs=1, loader=loader)
+
+    running = jobs.submit([{"type": "pdf", "path": "a.pdf"}])
+    queued = jobs.submit([{"type": "url", "url": "https://x.org"}])
+    assert store.started.wait(timeout=5)
+    assert jobs.get(running)["status"] == "running"
+    jobs.cancel(running)
+    jobs.cancel(queued)
+    gate.set()
+
+    assert jobs.wait(running, timeout=5)["status"] == "cancelled"
+    assert jobs.wait(queued, timeout=5)["status"] == "cancelled"
+    jobs.close()
+    # The running job stops at its first progress report, before anything is upserted
+    assert store.added == []
+
+
+def test_interrupted_jobs_resume_and_skip_indexed_documents(tmp_path, loader):
+    db_path = str(tmp_path / "jobs.db")
+    jobs = IngestionJobs(FakeStore(), db_path=db_path, loader=loader)
+    jobs.close()
+    # Simulate a job that was running when the process died
+    conn = sqlite3.connect(db_path)
+    conn.execute("""INSERT INTO jobs (status, sources, attempts, upserted) VALUES ('running', '[{"type": "pdf", "path": "a.pdf"}]', 1, 2)""")
+    conn.commit()
+    conn.close()
+
+    store = FakeStore(indexed_ids={"a.pdf:0", "a.pdf:1"})
+    jobs = IngestionJobs(store, db_path=db_path, loader=loader)
+    job = jobs.wait(jobs.list()[0]["id"], timeout=5)
+    jobs.close()
+
+    assert job["status"] == "completed"
+    assert job["attempts"] == 2
+    assert (job["skipped"], job["upserted"]) == (2, 3)
+    assert store.added == ["a.pdf:2", "a.pdf:3", "a.pdf:4"]
+
+
+def test_failed_job_records_error(tmp_path, loader):
+    loader.load_web_page.side_effect = ValueError("unreachable")
+    jobs = IngestionJobs(FakeStore(), db_path=str(tmp_path / "jobs.db"), loader=loader)
+    job = jobs.wait(jobs.submit([{"type": "url", "url": "https://x.org"}]), timeout=5)
+    jobs.close()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "unreachable"
+
+
+def test_save_upload_is_content_addressed(tmp_path):
+    first = save_upload("doc.pdf", b"%PDF-1", upload_dir=tmp_path)
+    again = save_upload("doc.pdf", b"%PDF-1", upload_dir=tmp_path)
+    other = save_upload("doc.pdf", b"%PDF-2", upload_dir=tmp_path)
+
+    assert first == again != other
+    assert open(first, "rb").read() == b"%PDF-1"
@@ -0,0 +1,110 @@
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.openai_embeddings import OpenAIEmbedder
+
+
+class FakeEmbeddingsServer:
+    """Local stand-in for POST /v1/embeddings that can fail the first requests it receives."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)  # status codes returned, in order, before succeeding
+        self.requests = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    status = server.failures.pop(0) if server.failures else 200
+                    server.requests.append((status, body["input"]))
+                if status != 200:
+                    self._send(status, {"error": {"message": "try again", "type": "server_error"}},
+                               {"retry-after": "0"} if status == 429 else {})
+                    return
+                # Each embedding encodes its input, so the test can check ordering
+                data = [{"object": "embedding", "index": i, "embedding": [float(len(text)), float(text.split()[-1])]}
+                        for i, text in enumerate(body["input"])]
+                data.reverse()  # the client must not rely on response order
+                self._send(200, {"object": "list", "data": data, "model": body["model"],
+                                 "usage": {"prompt_tokens": 0, "total_tokens": 0}})
+
+            def _send(self, status, payload, headers=None):
+                raw = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def client(self):
+        from openai import OpenAI
+        return OpenAI(api_key="test", base_url=f"http://127.0.0.1:{self.httpd.server_port}/v1", max_retries=0)
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_splits_by_tokens_and_preserves_order():
+    texts = [f"text number {i}" for i in range(50)]  # 3 "tokens" each
+    with FakeEmbeddingsServer() as server:
+        embedder = OpenAIEmbedder(server.client(), "text-embedding-3-small", max_tokens_per_request=30,
+                                  max_concurrency=4, backoff_base=0.01, token_counter=word_count)
+        embeddings = embedder.embed(texts)
+
+    assert embeddings == [[float(len(t)), float(i)] for i, t in enumerate(texts)]
+    assert len(server.requests) == 5
+    assert all(sum(word_count(t) for t in inputs) <= 30 for _, inputs in server.requests)
+
+
+def test_retries_rate_limits_and_server_errors():
+    texts = [f"text number {i}" for i in range(10)]
+    with FakeEmbeddingsServer(failures=[429, 500, 503]) as server:
+        embedder = OpenAIEmbedder(server.client(), "text-embedding-3-small", max_tokens_per_request=15,
+                                  max_concurrency=2, backoff_base=0.01, token_counter=word_count)
+        embeddings = embedder.embed(texts)
+
+    assert embeddings == [[float(len(t)), float(i)] for i, t in enumerate(texts)]
+    assert [status for status, _ in server.requests].count(200) == 2
+
+
+def test_gives_up_after_max_retries_and_on_client_errors():
+    import openai
+
+    with FakeEmbeddingsServer(failures=[500] * 3) as server:
+        embedder = OpenAIEmbedder(server.client(), "m", max_retries=2, backoff_base=0.01, token_counter=word_count)
+        with pytest.raises(openai.InternalServerError):
+            embedder.embed(["a 1"])
+        assert len(server.requests) == 3
+
+    with FakeEmbeddingsServer(failures=[400]) as server:
+        embedder = OpenAIEmbedder(server.client(), "m", max_retries=5, backoff_base=0.01, token_counter=word_count)
+        with pytest.raises(openai.BadRequestError):
+            embedder.embed(["a 1"])
+        assert len(server.requests) == 1
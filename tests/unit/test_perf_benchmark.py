@@ -0,0 +1,61 @@
+import sys
+import os
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.evaluation.perf_benchmark import StubEmbeddingModel, calibrated_corpus, compare_to_baseline, synthetic_corpus
+
+
+def sizes(**metrics):
+    return {"sizes": {"1000": {"documents": 100, "chunks": 1000, **metrics}}}
+
+
+def test_compare_to_baseline_knows_which_direction_is_worse():
+    baseline = sizes(query_p50_ms=10.0, peak_rss_mb=100.0, upsert_chunks_per_s=1000.0)
+
+    slower = compare_to_baseline(sizes(query_p50_ms=13.0, peak_rss_mb=100.0, upsert_chunks_per_s=1000.0), baseline, 0.2)
+    assert len(slower) == 1 and "query_p50_ms" in slower[0]
+    bigger = compare_to_baseline(sizes(query_p50_ms=10.0, peak_rss_mb=130.0, upsert_chunks_per_s=1000.0), baseline, 0.2)
+    assert len(bigger) == 1 and "peak_rss_mb" in bigger[0]
+    lower_throughput = compare_to_baseline(sizes(query_p50_ms=10.0, peak_rss_mb=100.0, upsert_chunks_per_s=700.0), baseline, 0.2)
+    assert len(lower_throughput) == 1 and "upsert_chunks_per_s" in lower_throughput[0]
+
+    # Faster, smaller and higher throughput are improvements
+    assert compare_to_baseline(sizes(query_p50_ms=5.0, peak_rss_mb=50.0, upsert_chunks_per_s=2000.0), baseline, 0.2) == []
+
+
+def test_compare_to_baseline_threshold_and_missing_sizes():
+    baseline = sizes(query_p50_ms=10.0)
+    assert compare_to_baseline(sizes(query_p50_ms=11.9), baseline, 0.2) == []
+    assert len(compare_to_baseline(sizes(query_p50_ms=12.1), baseline, 0.2)) == 1
+    assert compare_to_baseline(sizes(query_p50_ms=12.1), baseline, 0.25) == []
+
+    # Sizes or metrics missing from the baseline are not compared
+    assert compare_to_baseline({"sizes": {"10000": {"query_p50_ms": 99.0}}}, baseline, 0.2) == []
+    assert compare_to_baseline(sizes(query_p50_ms=10.0, query_p99_ms=99.0), baseline, 0.2) == []
+    assert compare_to_baseline(sizes(query_p50_ms=99.0), {}, 0.2) == []
+
+
+def test_stub_embedder_is_deterministic_and_normalized():
+    texts = ["docker volume network", "vector embedding chunk", ""]
+    first, second = StubEmbeddingModel(64).encode(texts), StubEmbeddingModel(64).encode(texts)
+
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first[:2], axis=1), 1.0)
+    assert not first[2].any()
+    assert np.array_equal(StubEmbeddingModel(64).encode(texts[0]), first[0])
+
+
+def test_calibrated_corpus_reaches_the_requested_chunk_count():
+    # A chunker that cuts fewer chunks than the corpus has paragraphs, like the token chunker
+    def chunk_texts(texts):
+        return [[None] * max(1, len(text.split("\n\n")) * 3 // 4) for text in texts]
+
+    documents = calibrated_corpus(200, 400, chunk_texts, seed=7)
+    total = sum(len(spans) for spans in chunk_texts([doc.content for doc in documents]))
+    assert 200 <= total < 200 + 8
+    # The calibrated corpus is a prefix of the plain one, so the seed still fixes its content
+    assert [d.content for d in documents] == [d.content for d in synthetic_corpus(len(documents) * 10, 400, seed=7)]
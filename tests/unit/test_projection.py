@@ -0,0 +1,76 @@
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils.projection import Projection, recall_at_k
+
+
+def low_rank_vectors(n, dim=64, rank=8, seed=0):
+    basis = np.random.default_rng(0).standard_normal((rank, dim))
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, rank)) @ basis + 0.01 * rng.standard_normal((n, dim))
+
+
+def test_pca_preserves_neighbours_of_low_rank_data():
+    corpus = low_rank_vectors(500)
+    queries = low_rank_vectors(20, seed=1)
+
+    projection = Projection.fit(corpus, dim=8, method="pca")
+
+    assert projection.transform(corpus).shape == (500, 8)
+    assert recall_at_k(corpus, queries, projection, k=10) > 0.9
+
+
+def test_projection_payload_round_trip():
+    projection = Projection.fit(low_rank_vectors(50), dim=4, method="random", seed=3)
+    restored = Projection.from_payload(projection.to_payload())
+
+    x = low_rank_vectors(5, seed=2)
+    assert restored.method == "random"
+    assert np.allclose(restored.transform(x), projection.transform(x))
+
+
+def test_vector_store_reduces_stored_and_query_vectors():
+    from src.utils import registry
+    from src.utils.document_loader import Document
+    from src.utils.vector_store import VectorStore
+
+    vocab = ["docker", "container", "image", "python", "list", "remove", "network", "volume"]
+    basis = np.random.default_rng(0).standard_normal((len(vocab), Config.VECTOR_SIZE))
+
+    def encode(texts, **kwargs):
+        counts = np.array([[t.lower().count(w) for w in vocab] for t in texts], dtype=float)
+        return counts @ basis + 1e-3
+
+    model = MagicMock()
+    model.encode.side_effect = encode
+    registry.reset()
+    with patch.object(Config, "EMBEDDING_PROVIDER", "local"), \
+         patch.object(Config, "REDUCED_VECTOR_SIZE", 16), \
+         patch.object(Config, "REDUCTION_METHOD", "pca"), \
+         patch.object(Config, "CHUNKING_MODE", "sliding"), \
+         patch('src.utils.vector_store._load_sentence_transformer', return_value=model):
+        vs = VectorStore(collection_name="test_projection", in_memory=True)
+        docs = [Document(content=f"{w} " * 30 + f"{v} " * 10, metadata={"title": f"{w}-{v}"})
+                for w in vocab for v in vocab if w != v]
+        vs.add_documents(docs)
+
+        info = vs.qdrant_client.get_collection("test_projection")
+        assert info.config.params.vectors.size == 16
+
+        results = vs.search("docker docker docker", top_k=3, expand_neighbors=0)
+        assert results and all(r["metadata"]["title"].startswith("docker") for r in results)
+
+        # A new store on the same collection reuses the stored projection
+        reopened = VectorStore.__new__(VectorStore)
+        reopened.backend = vs.backend
+        reopened.collection_name = vs.collection_name
+        reopened.documents_collection_name = vs.documents_collection_name
+        loaded = reopened._load_projection()
+        assert np.allclose(loaded.components, vs._projection.components)
@@ -0,0 +1,40 @@
+import sys
+import os
+
+import numpy as np
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.quantile_sketch import QuantileSketch
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(0, 1, 50000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.extend(values.tolist())
+
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) / exact < 0.02
+    assert len(sketch.buckets) < 1000
+
+
+def test_merge_and_serialization_are_exact():
+    a, b, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for v in range(1, 501):
+        (a if v % 2 else b).add(v / 10)
+        both.add(v / 10)
+    a.merge(QuantileSketch.from_bytes(b.to_bytes()))
+
+    assert a.count == both.count == 500
+    assert a.buckets == both.buckets
+    assert a.quantile(0.99) == both.quantile(0.99)
+
+
+def test_zero_and_empty():
+    assert QuantileSketch().quantile(0.5) == 0.0
+    sketch = QuantileSketch()
+    sketch.extend([0.0, 0.0, 0.0, 2.0])
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(1.0) - 2.0) < 0.02
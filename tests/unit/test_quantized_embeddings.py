@@ -0,0 +1,23 @@
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.quantized_embeddings import quantize_int8
+
+
+def test_quantize_int8_keeps_outputs_close():
+    import torch
+
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(torch.nn.Linear(64, 128), torch.nn.ReLU(), torch.nn.Linear(128, 32))
+    x = torch.randn(16, 64)
+    with torch.no_grad():
+        expected = model(x)
+        quantized = quantize_int8(model)
+        actual = quantized(x)
+
+    assert not any(type(m) is torch.nn.Linear for m in quantized.modules())
+    cosine = torch.nn.functional.cosine_similarity(expected, actual, dim=1)
+    assert cosine.min() > 0.99
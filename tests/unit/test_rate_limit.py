@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.rate_limit import RateBudget, RateLimitedModel
+
+
+def test_budget_spaces_concurrent_requests():
+    async def main():
+        budget = RateBudget(per_minute=1200)  # one slot every 50ms
+        starts = []
+
+        async def request():
+            await budget.acquire()
+            starts.append(time.monotonic())
+
+        await asyncio.gather(*(request() for _ in range(5)))
+        return sorted(starts)
+
+    starts = asyncio.run(main())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_zero_budget_is_unlimited():
+    async def main():
+        budget = RateBudget(per_minute=0)
+        start = time.monotonic()
+        await asyncio.gather(*(budget.acquire() for _ in range(100)))
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.1
+
+
+def test_rate_limited_model_charges_every_model_request():
+    from pydantic_ai import Agent
+    from pydantic_ai.models.test import TestModel
+
+    class CountingBudget(RateBudget):
+        acquired = 0
+
+        async def acquire(self):
+            self.acquired += 1
+
+    agent = Agent(TestModel())
+
+    @agent.tool_plain
+    def lookup(query: str) -> str:
+        return "found"
+
+    budget = CountingBudget(per_minute=0)
+    asyncio.run(agent.run("question", model=RateLimitedModel(agent.model, budget)))
+    # One request that calls the tool, one that answers with its result
+    assert budget.acquired == 2
@@ -0,0 +1,61 @@
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils import registry
+
+
+def setup_function():
+    registry.reset()
+
+
+def test_model_loaded_once_per_provider_and_name():
+    factory = MagicMock(side_effect=lambda name: f"model:{name}")
+
+    first = registry.get_model("local", "model-a", factory)
+    second = registry.get_model("local", "model-a", factory)
+    other = registry.get_model("local", "model-b", factory)
+
+    assert first == second == "model:model-a"
+    assert other == "model:model-b"
+    assert factory.call_count == 2
+
+
+def test_failed_model_load_is_retried():
+    factory = MagicMock(side_effect=[OSError("offline"), "model"])
+
+    future = registry.load_model("local", "model-a", factory)
+    assert isinstance(future.exception(), OSError)
+
+    assert registry.get_model("local", "model-a", factory) == "model"
+
+
+def test_clients_are_pooled_and_closed():
+    factory = MagicMock(side_effect=lambda: MagicMock())
+
+    client = registry.get_client("groq", "key-1", factory)
+    assert registry.get_client("groq", "key-1", factory) is client
+    assert registry.get_client("groq", "key-2", factory) is not client
+
+    registry.close()
+
+    client.close.assert_called_once()
+    assert registry.get_client("groq", "key-1", factory) is not client
+
+
+def test_close_closes_registered_stores_before_their_clients():
+    client = MagicMock()
+    store = MagicMock(backend=MagicMock(), qdrant_client=client)
+    registry._clients[("qdrant", "./qdrant_data")] = client
+    other = registry.get_client("groq", "key-1", MagicMock)
+    registry._vector_stores["research"] = store
+
+    registry.close()
+
+    store.close.assert_called_once()
+    client.close.assert_not_called()  # already closed by the store's backend
+    other.close.assert_called_once()
+    assert registry._vector_stores == {}
@@ -0,0 +1,100 @@
+import sys
+import os
+import json
+import math
+
+import numpy as np
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils import registry
+from src.evaluation.perf_benchmark import StubEmbeddingModel
+from src.evaluation.retrieval_eval import (
+    DEFAULT_MODE_GRIDS, chunk_corpus, config_overrides, evaluate_configuration, expand_grid, overlap, parse_sweep,
+    ranking_metrics, run_retrieval_sweep, shingles
+)
+from src.utils.document_loader import Document
+
+
+def test_ranking_metrics():
+    metrics = ranking_metrics([7, 3, 9, 1], relevant={3, 1}, k=3)
+    assert metrics["recall"] == 0.5
+    assert metrics["mrr"] == 0.5
+    # One hit at rank 2 against an ideal of hits at ranks 1 and 2
+    assert metrics["ndcg"] == pytest.approx((1 / math.log2(3)) / (1 + 1 / math.log2(3)))
+    assert ranking_metrics([7, 9], relevant={3}, k=2) == {"recall": 0.0, "mrr": 0.0, "ndcg": 0.0}
+
+
+def test_overlap_ignores_whitespace_and_page_joins():
+    context = "Docker containers are   started with\ndocker run. Images are built with docker build."
+    assert overlap(shingles("docker run. Images are built"), shingles(context)) == 1.0
+    assert overlap(shingles("Qdrant stores vectors with payloads"), shingles(context)) == 0.0
+
+
+def test_evaluate_configuration_matches_chunks_to_context():
+    chunks = [("a.pdf", "alpha beta gamma delta"), ("a.pdf", "epsilon zeta eta theta"), ("b.pdf", "alpha beta gamma delta")]
+    samples = [{"question": "q", "context": "intro alpha beta gamma delta outro", "source": "a.pdf"}]
+    # The chunk from the other source ranks first but does not count as relevant
+    results = evaluate_configuration(
+        samples, chunks,
+        question_vectors=np.array([[1.0, 0.0]]),
+        chunk_vectors=np.array([[0.9, 0.1], [0.0, 1.0], [1.0, 0.0]]),
+        top_ks=[1, 2], min_overlap=0.5
+    )
+    assert results["matched_questions"] == 1
+    assert results["recall@1"] == 0.0 and results["recall@2"] == 1.0
+    assert results["mrr@2"] == 0.5
+
+
+def test_sweep_values_are_typed_and_overrides_restored():
+    sweep, grids = parse_sweep(["sliding:chunk_size=400,800", "CHUNKING_MODE=token,sliding", "TOP_K_RESULTS=3,5"])
+    assert sweep == {"TOP_K_RESULTS": [3, 5]}
+    assert grids == {"token": DEFAULT_MODE_GRIDS["token"], "sliding": {"CHUNK_SIZE": [400, 800]}}
+    for spec in ("NOT_A_SETTING=1", "CHUNK_SIZE=400", "token:CHUNK_SIZE=400"):
+        with pytest.raises(ValueError):
+            parse_sweep([spec])
+
+    original = Config.CHUNK_SIZE, Config.EMBEDDING_MODEL
+    with config_overrides({"CHUNK_SIZE": 123, "EMBEDDING_PROVIDER": "local_int8"}):
+        assert Config.CHUNK_SIZE == 123
+        assert Config.EMBEDDING_MODEL == Config.LOCAL_EMBEDDING_MODEL
+    assert (Config.CHUNK_SIZE, Config.EMBEDDING_MODEL) == original
+
+
+@pytest.fixture
+def stub_vector_store():
+    from src.utils.vector_store import VectorStore
+
+    # Seed the shared model slot so the store never loads a real model
+    registry.reset()
+    registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL, lambda name: StubEmbeddingModel(Config.VECTOR_SIZE))
+    yield VectorStore(collection_name="retrieval_eval_test", in_memory=True, backend="embedded")
+    registry.reset()
+
+
+def test_token_grid_changes_chunks(stub_vector_store):
+    corpus = [("a.txt", Document(" ".join(f"Sentence number {i} is about docker." for i in range(300)), {}))]
+    chunkings = set()
+    for settings in expand_grid({}, {"token": DEFAULT_MODE_GRIDS["token"]}):
+        with config_overrides({**settings, "NEIGHBOR_EXPANSION": 0}):
+            chunkings.add(tuple(text for _, text in chunk_corpus(stub_vector_store, corpus)))
+    assert len(chunkings) == 4
+
+
+def test_sweep_skips_configurations_with_identical_chunks(tmp_path, stub_vector_store):
+    source = tmp_path / "notes.txt"
+    source.write_text(" ".join(f"Sentence number {i} is about docker." for i in range(300)))
+    context = source.read_text()[:2000]
+    testset = tmp_path / "testset.jsonl"
+    testset.write_text(json.dumps({"question": "Sentence number 3", "answer": "a", "context": context, "source": str(source)}))
+
+    # Overlap is dropped when neighbour expansion is on, so both overlaps chunk identically
+    with config_overrides({"NEIGHBOR_EXPANSION": 1}):
+        results = run_retrieval_sweep(str(testset), {"TOP_K_RESULTS": [3]},
+                                      {"sliding": {"CHUNK_SIZE": [400], "CHUNK_OVERLAP": [0, 200]}},
+                                      cache_path=str(tmp_path / "embeddings.db"))
+    assert len(results) == 1
+    assert results[0]["matched_questions"] == 1
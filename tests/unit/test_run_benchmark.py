@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.evaluation import run_benchmark as rb
+
+
+class FakeAgent:
+    model = "test"
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.questions = []
+
+    async def run(self, question, deps=None, model=None):
+        self.questions.append(question)
+        await asyncio.sleep(0.1)
+        if question in self.fail:
+            raise RuntimeError("model unavailable")
+        return SimpleNamespace(output=f"answer to {question}")
+
+
+class SlowJudge:
+    def evaluate_correctness(self, question, ground_truth, answer):
+        time.sleep(0.1)
+        return {"score": 4, "reasoning": "ok"}
+
+    def evaluate_faithfulness(self, question, context, answer):
+        time.sleep(0.1)
+        return {"score": 5, "reasoning": "ok"}
+
+
+def run(tmp_path, agent, concurrency=4):
+    with patch.object(rb, "agent", agent), patch.object(rb, "LLMJudge", SlowJudge), \
+            patch.object(rb, "VectorStore", MagicMock()):
+        start = time.perf_counter()
+        asyncio.run(rb.run_benchmark(str(tmp_path / "testset.jsonl"), concurrency=concurrency, requests_per_minute=0,
+                                     checkpoint_path=str(tmp_path / "checkpoint.jsonl"),
+                                     output_path=str(tmp_path / "results.json")))
+        return time.perf_counter() - start
+
+
+def test_concurrent_run_checkpoints_and_resumes(tmp_path):
+    questions = [f"question {i}" for i in range(8)]
+    with open(tmp_path / "testset.jsonl", "w") as f:
+        for q in questions:
+            f.write(json.dumps({"question": q, "answer": "a", "context": "c", "source": "notes.txt"}) + "\n")
+
+    # 8 samples of ~0.2s each (agent, then both judges in parallel) take ~0.4s at concurrency 4
+    elapsed = run(tmp_path, FakeAgent(fail={"question 3"}))
+    assert elapsed < 1.2
+
+    with open(tmp_path / "checkpoint.jsonl") as f:
+        checkpointed = [json.loads(line)["question"] for line in f]
+    assert sorted(checkpointed) == sorted(q for q in questions if q != "question 3")
+
+    # The failed sample is the only one evaluated again
+    agent = FakeAgent()
+    run(tmp_path, agent)
+    assert agent.questions == ["question 3"]
+
+    with open(tmp_path / "results.json") as f:
+        results = json.load(f)
+    assert [r["question"] for r in results["detailed_results"]] == questions
+    assert results["average_correctness"] == 4
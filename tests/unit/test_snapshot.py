@@ -0,0 +1,85 @@
+import sys
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils import snapshot
+from src.utils.vector_backend import NumpyBackend, Record
+
+
+def make_backend(n_chunks=1234, n_docs=7, dim=8):
+    backend = NumpyBackend()
+    backend.create_collection("c", size=dim)
+    backend.create_collection("c_documents", size=1, distance="dot")
+    vectors = np.random.default_rng(0).standard_normal((n_chunks, dim))
+    backend.upsert("c", [Record(id=f"p{i}", vector=v.tolist(), payload={"text": f"chunk {i}", "doc_id": f"d{i % n_docs}"})
+                         for i, v in enumerate(vectors)])
+    backend.upsert("c_documents", [Record(id=f"d{i}", vector=[0.0], payload={"title": f"doc {i}"}) for i in range(n_docs)])
+    return backend
+
+
+def empty_backend(dim=8):
+    backend = NumpyBackend()
+    backend.create_collection("c", size=dim)
+    backend.create_collection("c_documents", size=1, distance="dot")
+    return backend
+
+
+@pytest.mark.parametrize("payload_format", ["parquet", "jsonl"])
+def test_export_import_round_trip(tmp_path, payload_format):
+    source = make_backend()
+    with patch.object(snapshot, "_has_pyarrow", return_value=payload_format == "parquet"):
+        manifest = snapshot.export_collection(source, "c", "c_documents", 8, str(tmp_path), page_size=100)
+    assert manifest["chunks"] == 1234 and manifest["documents"] == 7
+    assert (tmp_path / f"chunks.{payload_format}").exists()
+
+    target = empty_backend()
+    uploaded = snapshot.import_collection(target, "c", "c_documents", 8, str(tmp_path), batch_size=100, workers=3)
+
+    assert uploaded == 1234
+    assert target.count("c") == 1234 and target.count("c_documents") == 7
+    query = source.retrieve("c", ["p42"])[0]
+    assert target.retrieve("c", ["p42"])[0].payload == query.payload
+    assert target.search("c", source._get("c").vector(42), limit=1)[0].id == "p42"
+
+
+def test_import_resumes_from_checkpoint(tmp_path):
+    snapshot.export_collection(make_backend(), "c", "c_documents", 8, str(tmp_path / "snap"))
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    target = empty_backend()
+    original_upsert = target.upsert
+    calls = {"n": 0}
+
+    def flaky_upsert(name, records):
+        if name == "c":
+            calls["n"] += 1
+            if calls["n"] == 5:
+                raise ConnectionError("lost connection")
+        original_upsert(name, records)
+
+    target.upsert = flaky_upsert
+    with pytest.raises(ConnectionError):
+        snapshot.import_collection(target, "c", "c_documents", 8, str(tmp_path / "snap"),
+                                   batch_size=100, workers=1, checkpoint=checkpoint)
+    assert os.path.exists(checkpoint)
+
+    target.upsert = original_upsert
+    uploaded = snapshot.import_collection(target, "c", "c_documents", 8, str(tmp_path / "snap"),
+                                          batch_size=100, workers=1, checkpoint=checkpoint)
+
+    # The four batches stored before the failure (and any that finished after it) are skipped
+    assert 0 < uploaded <= 1234 - 400
+    assert target.count("c") == 1234
+    assert not os.path.exists(checkpoint)
+
+
+def test_import_rejects_mismatched_vector_size(tmp_path):
+    snapshot.export_collection(make_backend(), "c", "c_documents", 8, str(tmp_path))
+    with pytest.raises(ValueError, match="dimensions"):
+        snapshot.import_collection(empty_backend(dim=16), "c", "c_documents", 16, str(tmp_path))
@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from src.agents.streaming import get_event_loop, stream_run_sync
+
+
+async def scripted_model(messages, info: AgentInfo):
+    """First response calls the lookup tool, the second streams the answer word by word."""
+    if not any(isinstance(p, ToolReturnPart) for m in messages for p in getattr(m, "parts", [])):
+        yield "Thought: I need to look this up. "
+        yield {0: DeltaToolCall(name="lookup", json_args='{"topic": "qdrant"}', tool_call_id="call_1")}
+        return
+    for word in ["Qdrant ", "is ", "a ", "vector ", "database."]:
+        yield word
+
+
+def make_agent(tool_delay: float = 0.0):
+    agent = Agent(FunctionModel(stream_function=scripted_model))
+
+    @agent.tool_plain
+    def lookup(topic: str) -> str:
+        time.sleep(tool_delay)
+        return f"notes on {topic}"
+
+    return agent
+
+
+def test_stream_yields_text_and_tool_events_in_order():
+    events = list(stream_run_sync(make_agent(), "What is Qdrant?"))
+    kinds = [e.kind for e in events]
+
+    assert kinds[-1] == "done"
+    assert events[-1].result.output == "Qdrant is a vector database."
+
+    start = kinds.index("tool_start")
+    end = kinds.index("tool_end")
+    assert kinds.index("text") < start < end
+    assert events[start].tool_name == events[end].tool_name == "lookup"
+    assert events[end].content == "notes on qdrant"
+
+    answer_events = events[end + 1:-1]
+    assert "".join(e.text for e in answer_events if e.kind == "text") == "Qdrant is a vector database."
+
+
+def test_first_text_arrives_before_tools_finish():
+    events = []
+    for event in stream_run_sync(make_agent(tool_delay=0.3), "What is Qdrant?"):
+        events.append(event)
+    first_text = next(e for e in events if e.kind == "text")
+    tool_end = next(e for e in events if e.kind == "tool_end")
+
+    assert first_text.elapsed < 0.3 <= tool_end.elapsed
+
+
+def test_runs_share_one_loop_and_errors_propagate():
+    loop = get_event_loop()
+    agent = make_agent()
+
+    async def failing_model(messages, info):
+        raise RuntimeError("model unavailable")
+        yield  # pragma: no cover
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        list(stream_run_sync(Agent(FunctionModel(stream_function=failing_model)), "hi"))
+
+    assert list(stream_run_sync(agent, "again"))[-1].kind == "done"
+    assert get_event_loop() is loop
@@ -0,0 +1,67 @@
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.models.schemas import ToolRunCache
+from src.tools.research_local_docs import research_local_docs
+from src.tools.perform_web_search import perform_web_search
+
+
+def hit(chunk_id, text):
+    return {"id": chunk_id, "text": text, "score": 0.9, "metadata": {"source_url": f"https://docs/{chunk_id}"}}
+
+
+def make_ctx(search_results):
+    vector_store = MagicMock()
+    vector_store.search.side_effect = lambda query, **kw: search_results[query]
+    tavily = MagicMock()
+    tavily.search.return_value = {"results": [
+        {"title": "Page", "url": "https://a.org", "content": "web text " * 50},
+    ]}
+    deps = SimpleNamespace(vector_store=vector_store, tavily_client=tavily, min_authority=1, tool_cache=ToolRunCache())
+    return SimpleNamespace(deps=deps)
+
+
+def test_repeated_query_is_memoized_after_normalization():
+    ctx = make_ctx({"What is HNSW?": [hit("c1", "graph index " * 40), hit("c2", "layers " * 40)]})
+
+    first = research_local_docs(ctx, "What is HNSW?")
+    again = research_local_docs(ctx, "  what is   hnsw ")
+
+    assert ctx.deps.vector_store.search.call_count == 1
+    assert [r.title.split()[0] for r in first] == ["[R1]", "[R2]"]
+    assert len(again) == 1 and "[R1], [R2]" in again[0].snippet
+    assert ctx.deps.tool_cache.memo_hits == 1
+
+
+def test_overlapping_queries_back_reference_seen_chunks():
+    ctx = make_ctx({
+        "hnsw": [hit("c1", "graph index " * 40), hit("c2", "layers " * 40)],
+        "hnsw parameters": [hit("c2", "layers " * 40), hit("c3", "ef_construction " * 40)],
+    })
+
+    first = research_local_docs(ctx, "hnsw")
+    second = research_local_docs(ctx, "hnsw parameters")
+
+    assert second[0].snippet == "Same passage as [R2] above."
+    assert second[1].title.startswith("[R3]") and second[1].snippet.startswith("ef_construction")
+    # The repeated passage costs a fraction of the prompt space it took the first time
+    assert len(second[0].snippet) < len(first[1].snippet) / 10
+    assert ctx.deps.tool_cache.back_references == 1
+
+
+def test_web_search_memoizes_and_shares_labels():
+    ctx = make_ctx({})
+
+    first = perform_web_search(ctx, "qdrant release")
+    again = perform_web_search(ctx, "Qdrant release?")
+    other = perform_web_search(ctx, "qdrant news")
+
+    assert ctx.deps.tavily_client.search.call_count == 2
+    assert first[0].title == "[R1] Page"
+    assert "[R1]" in again[0].snippet
+    assert other[0].snippet == "Same passage as [R1] above."
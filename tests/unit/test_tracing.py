@@ -0,0 +1,99 @@
+import sys
+import os
+
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ToolReturnPart
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+
+from src.agents.streaming import stream_run_sync
+from src.utils import tracing
+from src.utils.agent_logger import AgentLogger
+
+
+@pytest.fixture
+def spans():
+    rows = []
+    tracing.set_sink(rows.append)
+    yield rows
+    tracing.set_sink(None)
+
+
+def by_name(rows):
+    return {row[3]: row for row in rows}
+
+
+def test_spans_nest_and_record_errors(spans):
+    with tracing.span("outer", tracing.AGENT):
+        with tracing.span("inner", tracing.FETCH, url="https://x.org") as inner:
+            inner.set(bytes=10)
+        with pytest.raises(ValueError):
+            with tracing.span("broken"):
+                raise ValueError("boom")
+
+    rows = by_name(spans)
+    outer_id, trace_id = rows["outer"][0], rows["outer"][1]
+    assert rows["outer"][2] is None
+    assert rows["inner"][1:3] == (trace_id, outer_id)
+    assert '"bytes": 10' in rows["inner"][8]
+    assert rows["broken"][7] == "error" and "ValueError: boom" in rows["broken"][8]
+    assert tracing.current_trace_id() is None
+
+
+def test_no_sink_records_nothing():
+    with tracing.span("ignored") as current:
+        assert current is None
+
+
+def test_agent_run_trace_covers_llm_tools_and_fetches(spans):
+    async def model(messages, info):
+        if not any(isinstance(p, ToolReturnPart) for m in messages for p in getattr(m, "parts", [])):
+            yield {0: DeltaToolCall(name="lookup", json_args='{"topic": "x"}', tool_call_id="c1")}
+            return
+        yield "answer"
+
+    agent = Agent(FunctionModel(stream_function=model))
+
+    @agent.tool_plain
+    @tracing.traced("lookup", tracing.TOOL)
+    def lookup(topic: str) -> str:
+        with tracing.span("fetch_page", tracing.FETCH):
+            return "notes"
+
+    list(stream_run_sync(agent, "question"))
+
+    rows = by_name(spans)
+    run = rows["agent_run"]
+    assert {row[1] for row in spans} == {run[1]}
+    assert [row[3] for row in spans if row[2] == run[0]].count("llm_call") == 2
+    assert rows["lookup"][2] == run[0]
+    assert rows["fetch_page"][2] == rows["lookup"][0]
+
+
+def test_logger_stores_waterfall_and_stage_totals(tmp_path, spans):
+    logger = AgentLogger(db_path=str(tmp_path / "history.db"))
+    tracing.set_sink(logger.record_span)
+    with tracing.span("agent_run", tracing.AGENT):
+        with tracing.span("llm_call", tracing.LLM):
+            pass
+        with tracing.span("research_local_docs", tracing.TOOL):
+            with tracing.span("embed_query", tracing.EMBEDDING):
+                pass
+            with tracing.span("vector_query", tracing.VECTOR_QUERY):
+                pass
+    logger.flush()
+
+    traces = logger.get_traces()
+    assert traces["name"].tolist() == ["agent_run"]
+    waterfall = logger.get_trace(traces["trace_id"][0])
+    assert waterfall["name"].tolist() == ["agent_run", "llm_call", "research_local_docs", "embed_query", "vector_query"]
+    assert waterfall["depth"].tolist() == [0, 1, 1, 2, 2]
+    assert (waterfall["offset"] >= 0).all() and waterfall["offset"][0] == 0
+
+    totals = logger.get_stage_totals()
+    assert set(totals["kind"]) == {"llm", "tool", "embedding", "vector_query"}
+    logger.close()
@@ -0,0 +1,206 @@
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.utils.config import Config
+from src.utils.vector_backend import Filter, NumpyBackend, Record
+
+
+def make_records(n, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim))
+    return [Record(id=f"p{i}", vector=v.tolist(), payload={"i": i, "source_authority": i % 10, "topic": f"t{i % 3}"})
+            for i, v in enumerate(vectors)]
+
+
+def test_exact_search_matches_brute_force():
+    backend = NumpyBackend()
+    backend.create_collection("c", size=8)
+    records = make_records(200)
+    backend.upsert("c", records)
+
+    query = np.random.default_rng(1).standard_normal(8)
+    hits = backend.search("c", query.tolist(), limit=5)
+
+    vectors = np.array([r.vector for r in records])
+    scores = vectors @ query / np.linalg.norm(vectors, axis=1) / np.linalg.norm(query)
+    assert [h.id for h in hits] == [f"p{i}" for i in np.argsort(-scores)[:5]]
+    assert hits[0].score == pytest.approx(scores.max(), abs=1e-5)
+
+
+def test_search_filters_and_upsert_replaces():
+    backend = NumpyBackend()
+    backend.create_collection("c", size=8)
+    backend.upsert("c", make_records(100))
+
+    hits = backend.search("c", [1.0] * 8, limit=50, filter=Filter(match={"topic": "t1"}, ranges={"source_authority": (7, None)}))
+    assert hits and all(h.payload["topic"] == "t1" and h.payload["source_authority"] >= 7 for h in hits)
+    assert backend.search("c", [1.0] * 8, limit=5, filter=Filter(match={"topic": "missing"})) == []
+
+    backend.upsert("c", [Record(id="p3", vector=[1.0] * 8, payload={"i": 3, "replaced": True})])
+    assert backend.count("c") == 100
+    assert backend.retrieve("c", ["p3", "unknown"])[0].payload["replaced"] is True
+    assert backend.search("c", [1.0] * 8, limit=1)[0].id == "p3"
+
+
+def test_scroll_pages_through_everything():
+    backend = NumpyBackend()
+    backend.create_collection("c", size=8)
+    backend.upsert("c", make_records(25))
+
+    ids, offset = [], None
+    while True:
+        page, offset = backend.scroll("c", limit=10, offset=offset)
+        ids.extend(r.id for r in page)
+        if offset is None:
+            break
+    assert ids == [f"p{i}" for i in range(25)]
+
+
+def test_persistent_collection_survives_reopen(tmp_path):
+    backend = NumpyBackend(str(tmp_path))
+    backend.create_collection("c", size=8)
+    records = make_records(1500)  # more than the initial capacity, so the memmap grows
+    backend.upsert("c", records)
+    query = records[1234].vector
+    expected = [h.id for h in backend.search("c", query, limit=3)]
+    backend.close()
+
+    reopened = NumpyBackend(str(tmp_path))
+    assert reopened.collection_names() == ["c"]
+    assert reopened.count("c") == 1500
+    assert [h.id for h in reopened.search("c", query, limit=3)] == expected
+    assert expected[0] == "p1234"
+
+    reopened.delete_collection("c")
+    assert reopened.collection_names() == []
+
+
+def test_hnsw_search_agrees_with_exact_scan():
+    pytest.importorskip("hnswlib")
+    exact, approx = NumpyBackend(hnsw_min_points=None), NumpyBackend(hnsw_min_points=10)
+    records = make_records(500, dim=16)
+    for backend in (exact, approx):
+        backend.create_collection("c", size=16)
+        backend.upsert("c", records)
+
+    query = records[42].vector
+    assert approx.search("c", query, limit=1)[0].id == exact.search("c", query, limit=1)[0].id == "p42"
+
+
+def test_backend_missing_a_method_cannot_be_instantiated():
+    from src.utils.vector_backend import VectorBackend
+
+    class Partial(VectorBackend):
+        def collection_names(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_saved_hnsw_index_is_reused_only_while_current(tmp_path):
+    pytest.importorskip("hnswlib")
+    records = make_records(200, dim=16)
+    backend = NumpyBackend(path=str(tmp_path), hnsw_min_points=10)
+    backend.create_collection("c", size=16)
+    backend.upsert("c", records)
+    backend.search("c", records[0].vector, limit=1)
+    # The graph is written as soon as it is built, without waiting for close()
+    assert (tmp_path / "c" / "hnsw.bin").exists() and (tmp_path / "c" / "hnsw.json").exists()
+
+    # Another process replaces a vector without the graph: same point count, new content
+    exact = NumpyBackend(path=str(tmp_path), hnsw_min_points=None)
+    replaced = Record(id="p5", vector=records[150].vector, payload=records[5].payload)
+    exact.upsert("c", [replaced])
+
+    reopened = NumpyBackend(path=str(tmp_path), hnsw_min_points=10)
+    hits = reopened.search("c", records[150].vector, limit=2)
+    assert {h.id for h in hits} == {"p5", "p150"}
+
+
+def test_hnsw_search_with_selective_filter_matches_exact_scan():
+    pytest.importorskip("hnswlib")
+    exact, approx = NumpyBackend(hnsw_min_points=None), NumpyBackend(hnsw_min_points=10)
+    records = make_records(500, dim=16)
+    for backend in (exact, approx):
+        backend.create_collection("c", size=16)
+        backend.upsert("c", records)
+
+    # About 17 of 500 points match, fewer than the requested limit
+    selective = Filter(match={"topic": "t1"}, ranges={"source_authority": (9, None)})
+    hits = approx.search("c", records[0].vector, limit=50, filter=selective)
+    assert [h.id for h in hits] == [h.id for h in exact.search("c", records[0].vector, limit=50, filter=selective)]
+    assert 0 < len(hits) < 50
+
+
+def test_hnsw_failure_falls_back_to_exact_scan():
+    backend = NumpyBackend(hnsw_min_points=None)
+    backend.create_collection("c", size=8)
+    backend.upsert("c", make_records(100))
+    expected = backend.search("c", [1.0] * 8, limit=5, filter=Filter(match={"topic": "t1"}))
+
+    index = MagicMock()
+    index.knn_query.side_effect = RuntimeError("Cannot return the results in a contiguous 2D array")
+    backend._collections["c"]._hnsw = index
+    hits = backend.search("c", [1.0] * 8, limit=5, filter=Filter(match={"topic": "t1"}))
+    index.knn_query.assert_called_once()
+    assert [h.id for h in hits] == [h.id for h in expected]
+
+
+@pytest.mark.parametrize("backend", ["qdrant", "embedded"])
+def test_vector_store_behaves_the_same_on_both_backends(backend):
+    from src.utils import registry
+    from src.utils.document_loader import Document
+    from src.utils.vector_store import VectorStore
+
+    vocab = ["docker", "python", "network", "volume"]
+    basis = np.random.default_rng(0).standard_normal((len(vocab), Config.VECTOR_SIZE))
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, **kwargs: (
+        np.array([[t.lower().count(w) for w in vocab] for t in texts], dtype=float) @ basis + 1e-3
+    )
+
+    registry.reset()
+    with patch.object(Config, "EMBEDDING_PROVIDER", "local"), \
+         patch.object(Config, "REDUCED_VECTOR_SIZE", 0), \
+         patch.object(Config, "CHUNKING_MODE", "sliding"), \
+         patch('src.utils.vector_store._load_sentence_transformer', return_value=model):
+        vs = VectorStore(collection_name=f"test_{backend}", in_memory=True, backend=backend)
+        docs = [Document(content=f"{w} " * 40 + f"authority {a}", metadata={"title": w, "source_authority": a})
+                for w in vocab for a in (2, 8)]
+        vs.add_documents(docs)
+
+        assert vs.count() == len(docs)
+        results = vs.search("docker", top_k=2, min_authority=5, expand_neighbors=0)
+        assert [(r["metadata"]["title"], r["metadata"]["source_authority"]) for r in results][0] == ("docker", 8)
+        assert all(r["metadata"]["source_authority"] >= 5 for r in results)
+        assert {s["source_type"] for s in vs.get_all_sources()} <= {None}
+
+
+def test_vector_store_close_flushes_the_embedded_backend(tmp_path):
+    from src.utils import registry
+    from src.utils.document_loader import Document
+    from src.evaluation.perf_benchmark import StubEmbeddingModel
+
+    registry.reset()
+    registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL, lambda name: StubEmbeddingModel(Config.VECTOR_SIZE))
+    try:
+        with patch.object(Config, "VECTOR_BACKEND", "embedded"), patch.object(Config, "EMBEDDED_VECTOR_PATH", str(tmp_path)), \
+                patch.object(Config, "QDRANT_URL", None):
+            store = registry.get_vector_store("closing")
+            store.add_documents([Document(content="Docker removes stopped containers.", metadata={"filename": "a.txt"})])
+            store.search("docker")
+            registry.close()
+
+            assert store._query_batcher is None
+            assert store.backend._collections == {}
+            # A new process sees everything that was written
+            assert NumpyBackend(str(tmp_path)).count("closing") == 1
+    finally:
+        registry.reset()
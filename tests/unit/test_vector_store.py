@@ -10,21 +10,24 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 import logfire
 logfire.configure(send_to_logfire='never')
 
+from src.utils import registry
 from src.utils.vector_store import VectorStore
 from src.utils.document_loader import Document
 
 @pytest.fixture
 def mock_qdrant_client():
-    with patch('src.utils.vector_store.QdrantClient') as mock:
+    with patch('src.utils.vector_store._make_qdrant_client') as mock:
         yield mock
 
 @pytest.fixture
 def mock_groq_client():
-    with patch('src.utils.vector_store.Groq') as mock:
+    with patch('src.utils.vector_store._make_groq_client') as mock:
         yield mock
 
 @pytest.fixture
 def vector_store(mock_qdrant_client, mock_groq_client):
+    # Models and clients are shared per process; start every test from an empty registry
+    registry.reset()
     # Ensure Config uses local embedding for this test to avoid OpenAI calls
     with patch('src.utils.vector_store.Config') as MockConfig:
         MockConfig.EMBEDDING_PROVIDER = "local"
@@ -33,8 +36,9 @@ def vector_store(mock_qdrant_client, mock_groq_client):
         MockConfig.COLLECTION_NAME = "test_collection"
         MockConfig.TOP_K_RESULTS = 3
         MockConfig.VECTOR_SIZE = 768
+        MockConfig.REDUCED_VECTOR_SIZE = 0
         
-        with patch('src.utils.vector_store.SentenceTransformer') as mock_st:
+        with patch('src.utils.vector_store._load_sentence_transformer') as mock_st:
             mock_instance = MagicMock()
             # Set up the mock instance to return a list when encoded
             # _get_embeddings returns a list of lists.
@@ -52,8 +56,9 @@ def test_add_documents(vector_store):
     count = vector_store.add_documents([doc])
     
     assert count == 1
-    # Check if upsert was called
-    vector_store.qdrant_client.upsert.assert_called_once()
+    # Check if upsert was called once for the chunks and once for the document table
+    upserted = [c.kwargs["collection_name"] for c in vector_store.qdrant_client.upsert.call_args_list]
+    assert upserted == ["test_collection", "test_collection_documents"]
 
 def test_search(vector_store):
     # Mock search return
@@ -70,3 +75,89 @@ def test_search(vector_store):
     assert len(results) == 1
     assert results[0]["text"] == "result text"
     assert results[0]["score"] == 0.95
+
+def test_merge_neighbor_windows():
+    from src.utils.vector_store import merge_neighbor_windows
+
+    hits = [
+        {"doc_id": "a", "chunk_index": 2, "total_chunks": 10},
+        {"doc_id": "a", "chunk_index": 4, "total_chunks": 10},
+        {"doc_id": "a", "chunk_index": 9, "total_chunks": 10},
+        {"doc_id": "b", "chunk_index": 0, "total_chunks": 3},
+    ]
+
+    assert merge_neighbor_windows(hits, 1) == {"a": [[1, 5], [8, 9]], "b": [[0, 1]]}
+
+def test_search_expands_neighbors(vector_store):
+    text = "0123456789" * 3
+    def payload(i):
+        return {"text": text[i * 10:i * 10 + 12], "chunk_index": i, "total_chunks": 3,
+                "char_start": i * 10, "char_end": i * 10 + 12, "doc_id": "doc"}
+
+    hit = MagicMock()
+    hit.id, hit.payload, hit.score = "p1", payload(1), 0.9
+    vector_store.qdrant_client.query_points.return_value.points = [hit]
+    vector_store.qdrant_client.retrieve.side_effect = lambda collection_name, ids, **kw: (
+        [MagicMock(payload=payload(0)), MagicMock(payload=payload(2))]
+        if collection_name == vector_store.collection_name else []
+    )
+
+    results = vector_store.search("query", expand_neighbors=1)
+
+    assert len(results) == 1
+    assert results[0]["text"] == text  # overlapping chunk text is not repeated
+    assert results[0]["metadata"]["chunk_range"] == [0, 2]
+
+def test_add_documents_reports_progress_and_can_be_cancelled(vector_store):
+    from src.utils.vector_store import IngestionCancelled
+
+    stages = []
+    doc = Document(content="This is a test document.", metadata={"id": "doc1"})
+    vector_store.add_documents([doc], progress=lambda stage, count: stages.append((stage, count)))
+    assert stages == [("chunked", 1), ("embedded", 1), ("upserted", 1)]
+
+    def cancel(stage, count):
+        raise IngestionCancelled()
+
+    vector_store.qdrant_client.upsert.reset_mock()
+    with pytest.raises(IngestionCancelled):
+        vector_store.add_documents([doc], progress=cancel)
+    vector_store.qdrant_client.upsert.assert_not_called()
+
+def test_collection_version_changes_with_content_at_equal_counts():
+    from src.utils.config import Config
+    from src.evaluation.perf_benchmark import StubEmbeddingModel
+
+    registry.reset()
+    registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL, lambda name: StubEmbeddingModel(Config.VECTOR_SIZE))
+    try:
+        vs = VectorStore(collection_name="version_test", in_memory=True, backend="embedded")
+        vs.add_documents([Document(content="Docker removes stopped containers.", metadata={"filename": "a.txt"})])
+        first = vs.collection_version()
+        assert vs.collection_version() == first
+
+        vs.clear()
+        vs.add_documents([Document(content="Qdrant stores vectors with payloads.", metadata={"filename": "b.txt"})])
+        assert vs.count() == 1
+        assert vs.collection_version() != first
+    finally:
+        registry.reset()
+
+
+def test_reset_chunkers_applies_new_settings():
+    from src.utils.config import Config
+    from src.evaluation.perf_benchmark import StubEmbeddingModel
+
+    registry.reset()
+    registry.load_model(Config.EMBEDDING_PROVIDER, Config.EMBEDDING_MODEL, lambda name: StubEmbeddingModel(Config.VECTOR_SIZE))
+    try:
+        vs = VectorStore(collection_name="chunker_test", in_memory=True, backend="embedded")
+        text = " ".join(f"Sentence number {i} is about docker." for i in range(200))
+        with patch.object(Config, "CHUNKING_MODE", "token"), patch.object(Config, "CHUNK_MAX_TOKENS", 200):
+            coarse = vs._chunk_documents([text])[0]
+            with patch.object(Config, "CHUNK_MAX_TOKENS", 50):
+                assert vs._chunk_documents([text])[0] == coarse  # built once, from the old settings
+                vs.reset_chunkers()
+                assert len(vs._chunk_documents([text])[0]) > len(coarse)
+    finally:
+        registry.reset()